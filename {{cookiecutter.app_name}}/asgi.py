@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Create an ASGI application instance, e.g. ``uvicorn asgi:app``.
+
+Flask stays a WSGI app: requests run in a thread pool and async views in an
+event loop per request, so this serves the same views as ``autoapp.py`` to
+ASGI servers, to compare with the gunicorn gevent workers.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from {{cookiecutter.app_name}}.app import create_app
+
+app = WsgiToAsgi(create_app())
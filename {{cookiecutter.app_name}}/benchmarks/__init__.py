@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks, run from the project root: ``python -m benchmarks.<name> --help``."""
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Helpers shared by the benchmarks."""
+import argparse
+import math
+import os
+import statistics
+import tempfile
+
+
+def default_database_uri() -> str:
+    """A SQLite file in the temporary directory."""
+    return "sqlite:///" + os.path.join(tempfile.gettempdir(), "bench.db")
+
+
+def make_app(database_uri=None, **overrides):
+    """The project settings with local backends and ``database_uri``."""
+    from {{cookiecutter.app_name}}.app import create_app, make_settings
+
+    database_uri = database_uri or default_database_uri()
+    config = {
+        "CACHE_TYPE": "SimpleCache",
+        "JWT_BLOCKLIST_BACKEND": "memory",
+        "DEBUG_TB_ENABLED": False,
+        "SQLALCHEMY_RECORD_QUERIES": False,
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+    }
+    if database_uri.startswith("sqlite"):
+        # READ COMMITTED and pool sizes are MySQL settings
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = {}
+    config.update(overrides)
+    return create_app(make_settings(**config))
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    """Argument parser with the options every benchmark takes."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--database-uri",
+        default=None,
+        help="database to run against, a temporary SQLite file by default",
+    )
+    return parser
+
+
+def report(name: str, ops: int, seconds: float, **extra) -> None:
+    """Print the throughput of ``ops`` operations run in ``seconds``."""
+    details = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(
+        f"{name:<32} {ops:>8} ops {seconds:>8.3f}s {ops / seconds:>10.1f} ops/s {details}"
+    )
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank ``q`` percentile of ``samples``."""
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies, seconds=None) -> dict:
+    """``{"p50", "p99", "ops"}`` of per-operation ``latencies`` in seconds.
+
+    ``ops`` is the throughput over ``seconds`` of wall time when given, else
+    the one of a single caller at the median latency.
+    """
+    ops = len(latencies) / seconds if seconds else 1 / statistics.median(latencies)
+    return {
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "ops": ops,
+    }
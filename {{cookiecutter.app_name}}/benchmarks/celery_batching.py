@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Throughput of one task per item versus ``@batched_task``.
+
+``--items`` items are sent through Celery's in-memory broker to a worker
+running in this process, first with one ``.delay(item)`` message per item,
+then buffered by ``tasks.batching.batched_task`` into messages of
+``--batch-size`` items. Each run is timed from the first ``.delay()`` until
+the worker has handled the last item, and the time spent in ``.delay()``
+(what a request pays) is reported apart::
+
+    python -m benchmarks.celery_batching --items 5000 --batch-size 100
+"""
+import threading
+import time
+
+from ._common import make_app, parser, report
+
+
+class BenchCeleryConfig(object):
+    broker_url = "memory://"
+    broker_connection_retry_on_startup = True
+    # the virtual transports poll an empty queue once a second by default
+    broker_transport_options = {"polling_interval": 0.01}
+    task_ignore_result = True
+    worker_prefetch_multiplier = 1
+    task_serializer = "json"
+    accept_content = ["json"]
+
+
+class Counter(object):
+    def __init__(self):
+        self.count = 0
+        self.target = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def reset(self, target: int) -> None:
+        self.count, self.target = 0, target
+        self.done.clear()
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.count += count
+            if self.count >= self.target:
+                self.done.set()
+
+
+handled = Counter()
+
+
+def define_tasks(batch_size: int):
+    from celery import shared_task
+    from {{cookiecutter.app_name}}.tasks.batching import batched_task
+
+    @shared_task(name="bench.handle")
+    def handle(item):
+        handled.add(1)
+
+    # max_wait only sends the tail, every other batch is full
+    @batched_task(max_size=batch_size, max_wait=0.05, name="bench.handle_batch")
+    def handle_batch(items):
+        handled.add(len(items))
+
+    return handle, handle_batch
+
+
+def timed_run(task, items: int, timeout: float):
+    """``(seconds until all items are handled, seconds spent in .delay())``."""
+    handled.reset(items)
+    start = time.perf_counter()
+    for item in range(items):
+        task.delay({"id": item})
+    enqueued = time.perf_counter() - start
+    if not handled.done.wait(timeout):
+        raise SystemExit(f"{task.name}: {handled.count}/{items} handled in {timeout}s")
+    return time.perf_counter() - start, enqueued
+
+
+def main(argv=None):
+    args = parser(__doc__.splitlines()[0])
+    args.add_argument("--items", type=int, default=5000)
+    args.add_argument("--batch-size", type=int, default=100)
+    args.add_argument("--timeout", type=float, default=120)
+    args = args.parse_args(argv)
+
+    from celery.contrib.testing.worker import start_worker
+    from {{cookiecutter.app_name}}.extensions import celery_app
+
+    make_app(args.database_uri, CELERY_CONFIG=BenchCeleryConfig, LAZY_INIT=False)
+    handle, handle_batch = define_tasks(args.batch_size)
+    app = celery_app.__wrapped__
+    app.finalize()
+    with start_worker(app, pool="solo", perform_ping_check=False, loglevel="WARNING"):
+        timed_run(handle, 10, args.timeout)
+        seconds, enqueued = timed_run(handle, args.items, args.timeout)
+        report(
+            "per item",
+            args.items,
+            seconds,
+            messages=args.items,
+            delay=f"{enqueued:.3f}s",
+        )
+        seconds, enqueued = timed_run(handle_batch, args.items, args.timeout)
+        report(
+            f"batched x{args.batch_size}",
+            args.items,
+            seconds,
+            messages=handle_batch.batches,
+            delay=f"{enqueued:.3f}s",
+        )
+
+
+if __name__ == "__main__":
+    main()
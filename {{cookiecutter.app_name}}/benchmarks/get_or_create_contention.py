@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Throughput of ``get_or_create`` under concurrent writers.
+
+``--writers`` threads call ``Role.get_or_create`` on a small shared key space,
+so most calls race on the same rows. Each call runs in its own app context and
+session, like a request. Reports ops/s and how many calls created a row, and
+checks that no call failed and every key ended up with exactly one row::
+
+    python -m benchmarks.get_or_create_contention --writers 8 --keys 20 --ops 200
+"""
+import random
+import threading
+import time
+
+import sqlalchemy as sa
+
+from ._common import make_app, parser, report
+
+PREFIX = "bench-"
+
+
+def run(app, writers: int, keys: int, ops: int):
+    from {{cookiecutter.app_name}}.apps.models import Role
+    from {{cookiecutter.app_name}}.database import db
+
+    created, errors = [], []
+    start_line = threading.Barrier(writers)
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        start_line.wait()
+        for _ in range(ops):
+            with app.app_context():
+                try:
+                    _, is_created = Role.get_or_create(
+                        name=f"{PREFIX}{rnd.randrange(keys)}"
+                    )
+                    created.append(is_created)
+                except Exception as ex:  # noqa: B902
+                    errors.append(ex)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    with app.app_context():
+        rows = db.session.execute(
+            sa.select(Role.name, sa.func.count())
+            .where(Role.name.like(f"{PREFIX}%"))
+            .group_by(Role.name)
+        ).all()
+    return seconds, sum(created), errors, rows
+
+
+def main(argv=None):
+    args = parser(__doc__.splitlines()[0])
+    args.add_argument("--writers", type=int, default=8)
+    args.add_argument("--keys", type=int, default=20)
+    args.add_argument("--ops", type=int, default=200, help="calls per writer")
+    args = args.parse_args(argv)
+
+    app = make_app(args.database_uri)
+    from {{cookiecutter.app_name}}.apps.models import Role
+    from {{cookiecutter.app_name}}.database import db
+
+    with app.app_context():
+        Role.__table__.create(db.engine, checkfirst=True)
+        db.session.execute(sa.delete(Role).where(Role.name.like(f"{PREFIX}%")))
+        db.session.commit()
+    try:
+        seconds, created, errors, rows = run(app, args.writers, args.keys, args.ops)
+    finally:
+        with app.app_context():
+            db.session.execute(sa.delete(Role).where(Role.name.like(f"{PREFIX}%")))
+            db.session.commit()
+
+    report(
+        f"get_or_create x{args.writers}",
+        args.writers * args.ops,
+        seconds,
+        created=created,
+        errors=len(errors),
+        duplicates=sum(count - 1 for _, count in rows),
+    )
+    if errors:
+        raise SystemExit(f"{len(errors)} calls failed, first: {errors[0]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Latency and throughput of the ``/api`` routes, served in process.
+
+Every route of ``initialization.urls.API_URLS`` with a scenario below gets
+``--requests`` requests from ``--concurrency`` threads, each with its own
+test client calling the WSGI app; nothing goes through a socket, so the
+numbers are the cost of the app itself. A route without a scenario is
+reported, add one when adding a route. Runs against a fresh SQLite file::
+
+    python -m benchmarks.load --requests 500 --concurrency 4
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from ._common import make_app, parser, summarize
+
+USERNAME = "bench"
+PASSWORD = "myprecious"
+# registrations must not collide with the ones of earlier runs
+RUN_ID = uuid.uuid4().hex[:8]
+_COUNTER = itertools.count()
+
+# the password hash is a fixed cost picked by the deployment, keep it cheap
+# here so the rest of the request shows
+OVERRIDES = {"BCRYPT_LOG_ROUNDS": 4, "METRICS_ENABLED": False}
+
+
+def _access_token(app) -> str:
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        return create_access_token(identity=USERNAME)
+
+
+def _register(app, state: dict, count: int) -> dict:
+    username = f"{USERNAME}-{RUN_ID}-{count}"
+    return {
+        "json": {
+            "username": username,
+            "password": PASSWORD,
+            "confirm": PASSWORD,
+            "email": f"{username}@example.com",
+        }
+    }
+
+
+# (endpoint, method): make_kwargs(app, state, count) -> test client kwargs,
+# built before the request is timed; state is the one of setup()
+SCENARIOS = {
+    ("index", "GET"): lambda app, state, count: {},
+    ("user_login", "POST"): lambda app, state, count: {
+        "json": {"username": USERNAME, "password": PASSWORD}
+    },
+    ("user_login", "GET"): lambda app, state, count: {
+        "headers": {"Authorization": f"Bearer {state['token']}"}
+    },
+    ("user_register", "POST"): _register,
+    # logout revokes the token, every request needs its own
+    ("user_logout", "POST"): lambda app, state, count: {
+        "headers": {"Authorization": f"Bearer {_access_token(app)}"}
+    },
+}
+
+
+def routes(app) -> list:
+    """``[(endpoint, method, url)]`` of the ``/api`` routes."""
+    from {{cookiecutter.app_name}}.initialization.urls import API_URLS
+
+    urls = {rule.endpoint: rule.rule for rule in app.url_map.iter_rules()}
+    return [
+        (endpoint, method, urls[f"api.{endpoint}"])
+        for _, _, endpoint, methods in API_URLS
+        for method in methods
+    ]
+
+
+def setup(app) -> dict:
+    """Tables and the user the scenarios log in as, ``{"token"}`` of it."""
+    from {{cookiecutter.app_name}}.apps import models
+    from {{cookiecutter.app_name}}.database import db
+
+    with app.app_context():
+        db.create_all()
+        if models.User.get(username=USERNAME) is None:
+            models.User.create(username=USERNAME, password=PASSWORD, active=True)
+    return {"token": _access_token(app)}
+
+
+def _ok(response) -> bool:
+    from {{cookiecutter.app_name}}.initialization.exception import CODE
+
+    if response.status_code != 200:
+        return False
+    body = response.get_json(silent=True) or {}
+    return body.get("code") == CODE.OK.code
+
+
+def hammer(
+    app, state, endpoint, method, url, requests: int, concurrency: int, warmup=20
+):
+    """Latencies of ``requests`` requests, the wall time they took and the errors."""
+    make_kwargs = SCENARIOS[(endpoint, method)]
+    latencies, errors = [], []
+    start_line = threading.Barrier(concurrency + 1)
+
+    def client(count: int, timed: bool):
+        http = app.test_client()
+        if timed:
+            start_line.wait()
+        for _ in range(count):
+            kwargs = make_kwargs(app, state, next(_COUNTER))
+            start = time.perf_counter()
+            response = http.open(url, method=method, **kwargs)
+            elapsed = time.perf_counter() - start
+            if not timed:
+                continue
+            latencies.append(elapsed)
+            if not _ok(response):
+                errors.append(response.status_code)
+
+    client(warmup, False)
+    per_client = max(1, requests // concurrency)
+    threads = [
+        threading.Thread(target=client, args=(per_client, True))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    start_line.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start, errors
+
+
+def run(app, requests: int, concurrency: int) -> dict:
+    """``{"load.<METHOD> <url>": {"p50", "p99", "ops", "errors"}}``."""
+    state = setup(app)
+    results = {}
+    for endpoint, method, url in routes(app):
+        name = f"load.{method} {url}"
+        if (endpoint, method) not in SCENARIOS:
+            print(f"{name}: no scenario in benchmarks.load.SCENARIOS, skipped")
+            continue
+        latencies, seconds, errors = hammer(
+            app, state, endpoint, method, url, requests, concurrency
+        )
+        results[name] = dict(summarize(latencies, seconds), errors=len(errors))
+    return results
+
+
+def temporary_app(database_uri=None):
+    """``(app, cleanup)`` on ``database_uri`` or a fresh SQLite file."""
+    directory = None
+    if database_uri is None:
+        directory = tempfile.mkdtemp(prefix="bench-")
+        database_uri = "sqlite:///" + os.path.join(directory, "load.db")
+    app = make_app(database_uri, **OVERRIDES)
+
+    def cleanup():
+        from {{cookiecutter.app_name}}.database import db
+
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return app, cleanup
+
+
+def main(argv=None):
+    args = parser(__doc__.splitlines()[0])
+    args.add_argument("--requests", type=int, default=500, help="requests per route")
+    args.add_argument("--concurrency", type=int, default=1)
+    args = args.parse_args(argv)
+    app, cleanup = temporary_app(args.database_uri)
+    try:
+        results = run(app, args.requests, args.concurrency)
+    finally:
+        cleanup()
+    for name, result in results.items():
+        print(
+            f"{name:<40} p50 {result['p50'] * 1000:>8.2f}ms"
+            f" p99 {result['p99'] * 1000:>8.2f}ms {result['ops']:>9.1f} req/s"
+            f" errors={result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks of the per-request work: parsing, serialization and JSON.
+
+Like pytest-benchmark, every case is warmed up and calibrated: a round calls
+it as many times as fit in ``--min-time`` seconds, so the timer resolution
+and a single hiccup of the host do not show. The p50/p99 are over the mean
+call time of each of the ``--rounds`` rounds::
+
+    python -m benchmarks.micro --rounds 30 --min-time 0.01
+"""
+import datetime
+import decimal
+import time
+import uuid
+
+from ._common import make_app, parser, summarize
+
+LOGIN = {"username": " bench ", "password": " myprecious "}
+REGISTER = dict(LOGIN, confirm=" myprecious ", email=" bench@example.com ")
+
+
+def calibrate(func, min_time: float) -> int:
+    """Calls of ``func`` taking at least ``min_time`` seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            return number
+        number *= 2
+
+
+def measure(func, rounds: int, min_time: float) -> list:
+    """Mean seconds per call of each round."""
+    number = calibrate(func, min_time)
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def make_users(count: int) -> list:
+    """Transient users with roles, the shape ``LoginView`` dumps."""
+    from {{cookiecutter.app_name}}.apps.models import Role, User
+
+    now = datetime.datetime(2026, 1, 1, 12, 30)
+    roles = [Role("admin", id=1, created_at=now), Role("develop", id=2, created_at=now)]
+    return [
+        User(
+            id=index,
+            username=f"bench-{index}",
+            email=f"bench-{index}@example.com",
+            first_name="Bench",
+            last_name="Mark",
+            active=True,
+            created_at=now,
+            updated_at=now,
+            roles=roles,
+        )
+        for index in range(count)
+    ]
+
+
+def cases(app) -> dict:
+    """``{name: callable}`` of every micro-benchmark."""
+    from {{cookiecutter.app_name}}.apps.user.schemas import user_schema
+    from {{cookiecutter.app_name}}.apps.user.views import login_parser, register_parser
+    from {{cookiecutter.app_name}}.utils.http import FastJsonProvider, JsonEncoder
+
+    users = make_users(50)
+    user = users[0]
+    payload = {
+        "data": [
+            {
+                "id": uuid.UUID(int=index),
+                "at": datetime.datetime(2026, 1, 1, 12, 30),
+                "day": datetime.date(2026, 1, 1),
+                "price": decimal.Decimal("9.99"),
+                "tags": ("a", "b"),
+            }
+            for index in range(50)
+        ],
+        "code": 200,
+        "error": None,
+    }
+    encoder = JsonEncoder(app)
+    fast_encoder = FastJsonProvider(app)
+    login_body = fast_encoder.dumps(LOGIN)
+
+    return {
+        "parser.login": lambda: login_parser.parse(LOGIN),
+        "parser.login_json": lambda: login_parser.parse(login_body),
+        "parser.register": lambda: register_parser.parse(REGISTER),
+        # response() is what jsonify / json_response run
+        "json.encoder": lambda: encoder.response(payload),
+        "json.fast_encoder": lambda: fast_encoder.response(payload),
+        "json.fast_encoder_models": lambda: fast_encoder.response(users),
+        "model.to_dict": user.to_dict,
+        "schema.user_dump": lambda: user_schema.dump(user),
+        "schema.user_dump_many": lambda: user_schema.dump(users, many=True),
+    }
+
+
+def run(app, rounds: int, min_time: float) -> dict:
+    """``{"micro.<case>": {"p50", "p99", "ops"}}``."""
+    with app.app_context():
+        return {
+            f"micro.{name}": summarize(measure(func, rounds, min_time))
+            for name, func in cases(app).items()
+        }
+
+
+def main(argv=None):
+    args = parser(__doc__.splitlines()[0])
+    args.add_argument("--rounds", type=int, default=30)
+    args.add_argument("--min-time", type=float, default=0.01, help="seconds per round")
+    args = args.parse_args(argv)
+    app = make_app(args.database_uri)
+    for name, result in run(app, args.rounds, args.min_time).items():
+        print(
+            f"{name:<40} p50 {result['p50'] * 1e6:>9.1f}us"
+            f" p99 {result['p99'] * 1e6:>9.1f}us {result['ops']:>10.1f} ops/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
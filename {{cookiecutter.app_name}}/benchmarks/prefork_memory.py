@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Memory of forked workers, with and without building the app before fork.
+
+Like gunicorn, a master forks ``--workers`` children that each serve a few
+requests, then the private memory (``Private_Clean + Private_Dirty`` of
+``/proc/<pid>/smaps_rollup``, the memory no other process shares) and PSS of
+every worker are read while they are all alive:
+
+* ``load``: each worker builds the app after fork (gunicorn's default);
+* ``preload``: the master builds the app and runs ``before_fork``, each
+  worker runs ``after_fork`` (``GUNICORN_PRELOAD=true``).
+
+Linux only::
+
+    python -m benchmarks.prefork_memory --workers 4 --requests 50
+"""
+import os
+import signal
+import statistics
+import time
+import traceback
+
+from ._common import default_database_uri, make_app, parser
+
+
+def read_memory(pid: int) -> dict:
+    """``{"rss", "pss", "private"}`` in KiB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def create_tables(database_uri: str) -> None:
+    """Create the tables from a child, the master of "load" stays app free."""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            from {{cookiecutter.app_name}}.apps import models  # noqa: F401
+            from {{cookiecutter.app_name}}.database import db
+
+            app = make_app(database_uri)
+            with app.app_context():
+                db.create_all()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    if status:
+        raise SystemExit("could not create the tables")
+
+
+def serve(app, requests: int) -> None:
+    client = app.test_client()
+    for _ in range(requests):
+        client.get("/api/")
+        client.post("/api/user/login", json={"username": "nobody", "password": "x"})
+
+
+def fork_workers(workers: int, requests: int, database_uri: str, app=None) -> list:
+    children = []
+    for _ in range(workers):
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                if app is None:
+                    worker_app = make_app(database_uri)
+                else:
+                    from {{cookiecutter.app_name}}.initialization.prefork import after_fork
+
+                    worker_app = app
+                    after_fork(worker_app)
+                serve(worker_app, requests)
+                os.write(ready_w, b"1")
+                # alive until measured, the master kills it
+                while True:
+                    time.sleep(60)
+            except BaseException:  # noqa: B902
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(ready_w)
+        children.append((pid, ready_r))
+
+    usage = []
+    try:
+        for pid, ready_r in children:
+            if os.read(ready_r, 1) != b"1":
+                raise SystemExit(f"worker {pid} failed")
+            usage.append(read_memory(pid))
+    finally:
+        for pid, ready_r in children:
+            os.close(ready_r)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+    return usage
+
+
+def summary(name: str, usage: list) -> dict:
+    mean = {key: statistics.mean(u[key] for u in usage) for key in usage[0]}
+    print(
+        f"{name:<10} workers={len(usage)} private={mean['private'] / 1024:.1f}MiB"
+        f" pss={mean['pss'] / 1024:.1f}MiB rss={mean['rss'] / 1024:.1f}MiB (per worker)"
+    )
+    return mean
+
+
+def main(argv=None):
+    args = parser(__doc__.splitlines()[0])
+    args.add_argument("--workers", type=int, default=4)
+    args.add_argument("--requests", type=int, default=50, help="requests per worker")
+    args = args.parse_args(argv)
+    database_uri = args.database_uri or default_database_uri()
+
+    # the master of the "load" mode never imports the app
+    create_tables(database_uri)
+    load = summary("load", fork_workers(args.workers, args.requests, database_uri))
+
+    from {{cookiecutter.app_name}}.initialization.prefork import before_fork
+
+    app = make_app(database_uri)
+    before_fork(app)
+    preload = summary(
+        "preload", fork_workers(args.workers, args.requests, database_uri, app)
+    )
+    saved = load["private"] - preload["private"]
+    print(f"private memory saved per worker: {saved / 1024:.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
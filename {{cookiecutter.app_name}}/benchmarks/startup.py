@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Cold start time of ``create_app()`` and ``flask --help``, lazy and eager.
+
+Every run is a fresh interpreter, so nothing is cached in ``sys.modules``.
+``create_app`` is timed inside the child; ``flask --help`` is timed from the
+outside, interpreter start included. With ``--imports`` the slowest top-level
+imports of one ``create_app`` run are listed from ``python -X importtime``::
+
+    python -m benchmarks.startup --runs 5 --imports 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CREATE_APP = """
+import time
+start = time.perf_counter()
+from {{cookiecutter.app_name}}.app import create_app
+create_app()
+print(time.perf_counter() - start)
+"""
+
+
+def child_env(lazy: bool) -> dict:
+    env = dict(os.environ)
+    env.update(
+        LAZY_INIT="true" if lazy else "false",
+        FLASK_APP="autoapp.py",
+        METRICS_ENABLED="false",
+    )
+    return env
+
+
+def time_create_app(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", CREATE_APP],
+        cwd=PROJECT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_flask_help(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--help"],
+        cwd=PROJECT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+def slowest_imports(env: dict, count: int) -> list:
+    """``[(cumulative seconds, module)]`` of the top-level imports."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CREATE_APP],
+        cwd=PROJECT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        # top level imports only, the nested ones are part of them
+        if not name.startswith("  "):
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def summary(name: str, samples: list) -> None:
+    print(
+        f"{name:<32} min {min(samples) * 1000:>8.1f}ms"
+        f" median {statistics.median(samples) * 1000:>8.1f}ms"
+        f" max {max(samples) * 1000:>8.1f}ms"
+    )
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--runs", type=int, default=5)
+    args.add_argument(
+        "--imports", type=int, default=0, help="list the N slowest imports"
+    )
+    args = args.parse_args(argv)
+    for lazy in (True, False):
+        mode = "lazy" if lazy else "eager"
+        env = child_env(lazy)
+        summary(
+            f"create_app ({mode})", [time_create_app(env) for _ in range(args.runs)]
+        )
+        summary(
+            f"flask --help ({mode})", [time_flask_help(env) for _ in range(args.runs)]
+        )
+        for seconds, module in slowest_imports(env, args.imports):
+            print(f"    {seconds * 1000:>8.1f}ms {module}")
+
+
+if __name__ == "__main__":
+    main()
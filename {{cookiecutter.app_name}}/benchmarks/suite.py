@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Micro and load benchmarks compared to the baseline of this machine.
+
+Runs ``benchmarks.micro`` and ``benchmarks.load`` and compares each result
+to ``baseline.json``: a p50 or p99 above, or a throughput below, the baseline
+by more than ``--threshold`` (0.25 is 25%, ``--p99-threshold`` for the
+noisier p99) is a regression and the exit status is 1, like a failing request
+in the load run. Everything runs ``--repeat`` times and the run with the best
+p50 is kept, a busy host slows a run down but never speeds one up.
+
+``--save`` stores the results as the baseline instead. The baseline is not
+shipped: numbers only compare on the machine that recorded them, so without
+a baseline, or with one recorded on another Python, architecture or CPU
+count, nothing is compared and only failed requests fail the run.
+``flask bench`` runs it::
+
+    python -m benchmarks.suite --save
+    python -m benchmarks.suite --threshold 0.25
+"""
+import json
+import os
+import platform
+import sys
+
+from . import load, micro
+from ._common import make_app, parser
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+
+def environment() -> dict:
+    """What a baseline is only comparable on: Python, architecture, CPUs."""
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float, p99_threshold=None
+) -> list:
+    """Regressions of ``results`` against ``baseline``, as messages."""
+    allowed = {
+        "p50": threshold,
+        "p99": threshold if p99_threshold is None else p99_threshold,
+    }
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in ("p50", "p99"):
+            if result[key] > base[key] * (1 + allowed[key]):
+                regressions.append(
+                    f"{name}: {key} {result[key] * 1000:.3f}ms"
+                    f" > {base[key] * 1000:.3f}ms baseline"
+                )
+        if result["ops"] < base["ops"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['ops']:.1f} ops/s < {base['ops']:.1f} ops/s baseline"
+            )
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    """``{"environment", "results"}`` stored by :func:`save_baseline`, empty if none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict) -> None:
+    """Store ``results`` with the :func:`environment` that recorded them."""
+    with open(path, "w") as f:
+        data = {"environment": environment(), "results": results}
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def incomparable(baseline: dict, path: str) -> str:
+    """Why ``baseline`` cannot gate the results of this machine, or ``""``."""
+    if not baseline:
+        return f"no baseline at {path}, record one on this machine with --save"
+    if baseline.get("environment") != environment():
+        return (
+            f"baseline recorded on {baseline.get('environment')}, this is"
+            f" {environment()}: not compared, record one here with --save"
+        )
+    return ""
+
+
+def best(results: dict, new: dict) -> dict:
+    """Per benchmark, the result of ``results`` or ``new`` with the lowest p50."""
+    for name, result in new.items():
+        if name not in results or result["p50"] < results[name]["p50"]:
+            results[name] = result
+    return results
+
+
+def run(
+    rounds, min_time, requests, concurrency, only=None, database_uri=None, repeat=1
+):
+    """Best results of ``repeat`` micro and load runs, ``only`` one of them if given."""
+    results = {}
+    if only in (None, "micro"):
+        app = make_app(database_uri)
+        for _ in range(repeat):
+            best(results, micro.run(app, rounds, min_time))
+    if only in (None, "load"):
+        app, cleanup = load.temporary_app(database_uri)
+        try:
+            for _ in range(repeat):
+                best(results, load.run(app, requests, concurrency))
+        finally:
+            cleanup()
+    return results
+
+
+def main(argv=None):
+    """Run the suite, then save the baseline or exit 1 on a regression."""
+    args = parser(__doc__.splitlines()[0])
+    args.add_argument("--baseline", default=BASELINE_PATH)
+    args.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown")
+    args.add_argument("--p99-threshold", type=float, default=1.0)
+    args.add_argument("--save", action="store_true", help="store as the new baseline")
+    args.add_argument("--only", choices=("micro", "load"), default=None)
+    args.add_argument(
+        "--repeat", type=int, default=3, help="runs, the best one is kept"
+    )
+    args.add_argument("--rounds", type=int, default=30, help="micro: rounds per case")
+    args.add_argument(
+        "--min-time", type=float, default=0.01, help="micro: seconds per round"
+    )
+    args.add_argument(
+        "--requests", type=int, default=200, help="load: requests per route"
+    )
+    args.add_argument("--concurrency", type=int, default=1, help="load: client threads")
+    args = args.parse_args(argv)
+
+    results = run(
+        args.rounds,
+        args.min_time,
+        args.requests,
+        args.concurrency,
+        args.only,
+        args.database_uri,
+        args.repeat,
+    )
+    baseline = load_baseline(args.baseline)
+    base_results = baseline.get("results", {})
+    for name, result in results.items():
+        base = base_results.get(name)
+        change = f" ({result['p50'] / base['p50'] - 1:+.0%} p50)" if base else ""
+        print(
+            f"{name:<40} p50 {result['p50'] * 1000:>9.3f}ms"
+            f" p99 {result['p99'] * 1000:>9.3f}ms {result['ops']:>10.1f} ops/s{change}"
+        )
+
+    failed = [
+        f"{name}: {result['errors']} failed requests"
+        for name, result in results.items()
+        if result.get("errors")
+    ]
+    if args.save:
+        if failed:
+            sys.exit(
+                "not saving a baseline with failed requests:\n" + "\n".join(failed)
+            )
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return
+    reason = incomparable(baseline, args.baseline)
+    if reason:
+        print(reason)
+    else:
+        failed.extend(
+            compare(results, base_results, args.threshold, args.p99_threshold)
+        )
+    if failed:
+        sys.exit("regressions:\n" + "\n".join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 """The gunicorn config module."""
 
 import os
+import sys
 
 LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.path.expanduser("~"), "logs", "{{cookiecutter.app_name}}"))
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -10,26 +11,67 @@ from dotenv import find_dotenv, load_dotenv  # !!! 解决 celery 无法加载环
 
 load_dotenv(find_dotenv())
 
+# with METRICS_ENABLED the metric values of every worker, summed by /metrics;
+# must be set before the app imports prometheus_client, see utils.metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+if METRICS_ENABLED:
+    PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(LOG_DIR, "prometheus")
+    )
+
+# the app package is not on sys.path when started by the gunicorn script
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from {{cookiecutter.app_name}}.utils import tuning  # noqa: E402
+
+# GUNICORN_PROFILE=io|cpu|mixed sized from the cpus of this host or container,
+# GUNICORN_WORKERS etc. override it, see utils.tuning
+TUNING = tuning.resolve()
+
+
+def _file_handler(backup_count: int) -> dict:
+    """Handler settings of a log file, rotated by size or by logrotate.
+
+    Every worker writes the same files and rotating them from a worker races
+    with the others: LOG_ROTATION=external leaves it to logrotate and the
+    handler reopens the moved file.
+    """
+    if os.getenv("LOG_ROTATION", "size") == "external":
+        return {"class": "logging.handlers.WatchedFileHandler"}
+    return {
+        "class": "logging.handlers.RotatingFileHandler",
+        "maxBytes": 1024 * 1024 * 100,  # 打日志的大小（此处限制100mb）
+        "backupCount": backup_count,
+    }
+
+
 class GunicornConfig(object):
-    workers = 2
-    threads = 2
-    workers = 2
+    """Gunicorn settings, sized by the tuning profile, see utils.tuning."""
+
+    # 并行工作进程数
+    workers = TUNING["workers"]
     # 指定每个工作者的线程数
-    threads = 2
+    threads = TUNING["threads"]
     # 监听内网端口5000
     bind = "0.0.0.0:{}".format(os.getenv("BIND_PORT", 5000))
     # 设置守护进程,将进程交给supervisor管理
-    daemon = "false"
-    # 工作模式协程
-    worker_class = "gevent"
+    daemon = False
+    # 工作模式
+    worker_class = TUNING["worker_class"]
     # 设置最大并发量
-    worker_connections = 2000
+    worker_connections = TUNING["worker_connections"]
+    # restart a worker after this many requests, caps the memory it grows
+    max_requests = TUNING["max_requests"]
+    max_requests_jitter = TUNING["max_requests_jitter"]
     # 设置进程文件目录
     pidfile = os.path.join(LOG_DIR, "gunicorn.pid")
-    loglevel = "DEBUG"
+    loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
 
     timeout = 30
     keepalive = 60
+    # build the app once in the master and fork workers sharing it
+    # copy-on-write, see initialization.prefork
+    preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
 
     debug = False
     logconfig_dict = {
@@ -42,14 +84,14 @@ class GunicornConfig(object):
         # },
         "loggers": {
             "gunicorn.error": {
-                "level": "DEBUG",  # 打日志的等级；
+                "level": loglevel.upper(),  # 打日志的等级；
                 "handlers": ["error_file", "console"],  # 对应handlers字典的键（key）；
                 # 是否将日志打印到控制台（console），若为True（或1），将打印在supervisor日志监控文件logfile上，对于测试非常好用；
                 "propagate": 0,
                 "qualname": "gunicorn_error",
             },
             "gunicorn.access": {
-                "level": "DEBUG",
+                "level": "INFO",
                 "handlers": ["access_file", "console"],
                 "propagate": 0,
                 "qualname": "access",
@@ -57,22 +99,18 @@ class GunicornConfig(object):
         },
         "handlers": {
             "error_file": {
-                "class": "logging.handlers.RotatingFileHandler",
-                "maxBytes": 1024 * 1024 * 100,  # 打日志的大小（此处限制100mb）
-                "backupCount": 10,  # 备份数量（若需限制日志大小，必须存在值，且为最小正整数）
+                # 备份数量（若需限制日志大小，必须存在值，且为最小正整数）
+                **_file_handler(10),
                 "formatter": "generic",  # 对应formatters字典的键（key）
                 "filename": f"{LOG_DIR}/gunicorn.log",  # 若对配置无特别需求，仅需修改此路径
             },
             "access_file": {
-                "class": "logging.handlers.RotatingFileHandler",
-                "maxBytes": 1024 * 1024 * 100,
-                "backupCount": 1,
+                **_file_handler(1),
                 "formatter": "access",
                 "filename": f"{LOG_DIR}/access.log",  # 若对配置无特别需求，仅需修改此路径
             },
             "console": {
                 "class": "logging.StreamHandler",
-                "level": "DEBUG",
                 "formatter": "generic",
             },
         },
@@ -93,29 +131,38 @@ class GunicornConfig(object):
 
 GUNICORN_CONFIG = GunicornConfig
 
+if GUNICORN_CONFIG.preload_app and GUNICORN_CONFIG.worker_class == "gevent":
+    # the master imports the app, patch before it does like a worker would
+    from gevent import monkey
+
+    monkey.patch_all()
+
 
 # # 并行工作进程数
-workers = GUNICORN_CONFIG.workers or 2
+workers = GUNICORN_CONFIG.workers
 # # 指定每个工作者的线程数
-threads = GUNICORN_CONFIG.threads or 2
+threads = GUNICORN_CONFIG.threads
 # # 监听内网端口5000
-bind = GUNICORN_CONFIG.bind or "0.0.0.0:8080"
+bind = GUNICORN_CONFIG.bind
 # # 设置守护进程,将进程交给supervisor管理
-daemon = GUNICORN_CONFIG.daemon or False
-# # 工作模式协程
-worker_class = GUNICORN_CONFIG.worker_class or "gevent"
+daemon = GUNICORN_CONFIG.daemon
+# # 工作模式
+worker_class = GUNICORN_CONFIG.worker_class
 # # 设置最大并发量
-worker_connections = GUNICORN_CONFIG.worker_connections or 2000
+worker_connections = GUNICORN_CONFIG.worker_connections
+max_requests = GUNICORN_CONFIG.max_requests
+max_requests_jitter = GUNICORN_CONFIG.max_requests_jitter
 # # 设置进程文件目录
-pidfile = GUNICORN_CONFIG.pidfile or "/tmp/gunicorn.pid"
+pidfile = GUNICORN_CONFIG.pidfile
 
 # # 设置日志记录水平
-loglevel = GUNICORN_CONFIG.loglevel or "DEBUG"
+loglevel = GUNICORN_CONFIG.loglevel
 
-timeout = GUNICORN_CONFIG.timeout or 30
-keepalive = GUNICORN_CONFIG.keepalive or 60
+timeout = GUNICORN_CONFIG.timeout
+keepalive = GUNICORN_CONFIG.keepalive
+preload_app = GUNICORN_CONFIG.preload_app
 
-debug = GUNICORN_CONFIG.debug or True
+debug = GUNICORN_CONFIG.debug
 
 if GUNICORN_CONFIG.logconfig_dict:
     logconfig_dict = GUNICORN_CONFIG.logconfig_dict
@@ -123,3 +170,50 @@ else:
     # 设置访问日志和错误信息日志路径
     accesslog = "/tmp/access.log"
     errorlog = "/tmp/gunicorn_error.log"
+
+
+def on_starting(server):
+    """Empty the multiprocess metrics directory before the master starts."""
+    if not METRICS_ENABLED:
+        return
+    # values left by a previous master would be added to the new ones
+    import shutil
+
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of an exited worker."""
+    from {{cookiecutter.app_name}}.utils.metrics import Metrics
+
+    Metrics.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    """Log the effective settings and prepare a preloaded app for forking."""
+    server.log.info(
+        "effective settings: %s",
+        tuning.report(server.cfg, TUNING["profile"], TUNING["cpus"]),
+    )
+    if server.cfg.preload_app:
+        from {{cookiecutter.app_name}}.initialization.prefork import before_fork
+
+        before_fork(server.app.wsgi())
+
+
+def pre_fork(server, worker):
+    """Freeze the master's objects so the GC does not touch shared pages."""
+    if server.cfg.preload_app:
+        # objects created in the master since when_ready, e.g. by a reload
+        import gc
+
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Reset the per-process state of a preloaded app in the new worker."""
+    if server.cfg.preload_app:
+        from {{cookiecutter.app_name}}.initialization.prefork import after_fork
+
+        after_fork(server.app.wsgi())
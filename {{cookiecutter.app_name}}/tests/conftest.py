@@ -5,16 +5,28 @@ import logging
 
 import pytest
 from webtest import TestApp
-from {{cookiecutter.app_name}}.app import create_app
+from {{cookiecutter.app_name}}.app import create_app, make_settings
 from {{cookiecutter.app_name}}.database import db as _db
 
+from . import settings
 from .factories import UserFactory
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "settings(**config): override the test settings of the app"
+    )
+
+
 @pytest.fixture
-def app():
-    """Create application for the tests."""
-    _app = create_app("tests.settings")
+def app(request):
+    """Create application for the tests.
+
+    Opt-in modes are switched on per test with ``@pytest.mark.settings``.
+    """
+    marker = request.node.get_closest_marker("settings")
+    config = make_settings(settings, **marker.kwargs) if marker else "tests.settings"
+    _app = create_app(config)
     _app.logger.setLevel(logging.CRITICAL)
     ctx = _app.test_request_context()
     ctx.push()
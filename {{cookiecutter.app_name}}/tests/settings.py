@@ -9,8 +9,9 @@ BCRYPT_LOG_ROUNDS = (
     4  # For faster tests; needs at least 4 to avoid "ValueError: Invalid rounds"
 )
 DEBUG_TB_ENABLED = False
-CACHE_TYPE = "simple"  # Can be "memcached", "redis", etc.
+CACHE_TYPE = "SimpleCache"  # Can be "MemcachedCache", "RedisCache", etc.
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+JWT_BLOCKLIST_BACKEND = "memory"
 WTF_CSRF_ENABLED = False  # Allows form testing
 ENABLE_CORS = True
 CORS_OPTIONS = dict()
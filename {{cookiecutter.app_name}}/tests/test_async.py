@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Asyncio CRUD and view tests."""
+import asyncio
+
+import pytest
+from {{cookiecutter.app_name}}.apps.models import Role
+from {{cookiecutter.app_name}}.async_database import async_url
+from {{cookiecutter.app_name}}.extensions import async_db
+from {{cookiecutter.app_name}}.utils.http import AsyncMethodView, json_response
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("asgiref")
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_db.remove()
+
+    return asyncio.run(main())
+
+
+def test_async_url():
+    """Sync drivers map to their async counterpart."""
+    assert str(async_url("mysql+pymysql://u:p@h/db")).startswith("mysql+aiomysql://")
+    assert str(async_url("sqlite:////tmp/x.db")) == "sqlite+aiosqlite:////tmp/x.db"
+
+
+@pytest.mark.usefixtures("db")
+class TestAsyncCRUD:
+    """Model.aio tests."""
+
+    def test_create_get(self):
+        """Rows created through aio are read back."""
+
+        async def scenario():
+            role = await Role.aio.create(name="admin")
+            found = await Role.aio.get(name="admin")
+            by_id = await Role.aio.get_by_id(str(role.id))
+            return role, found, by_id
+
+        role, found, by_id = run(scenario())
+        assert found.id == role.id == by_id.id
+
+    def test_get_or_create(self):
+        """get_or_create creates once."""
+
+        async def scenario():
+            first = await Role.aio.get_or_create(name="staff")
+            second = await Role.aio.get_or_create(name="staff")
+            return first, second
+
+        (role, created), (again, created_again) = run(scenario())
+        assert created and not created_again
+        assert role.id == again.id
+
+    def test_update_or_create_and_delete(self):
+        """update_or_create updates existing rows, delete removes them."""
+
+        async def scenario():
+            role, created = await Role.aio.update_or_create(name="dev")
+            await role.aio.update(name="develop")
+            same, created_again = await Role.aio.update_or_create(
+                id=role.id, defaults={"name": "developer"}
+            )
+            await same.aio.delete()
+            return created, created_again, same.name, await Role.aio.get(id=role.id)
+
+        assert run(scenario()) == (True, False, "developer", None)
+
+    def test_update_or_create_commit(self):
+        """update_or_create only commits with commit=True."""
+
+        async def scenario():
+            await Role.aio.update_or_create(name="dev")
+            await Role.aio.session.rollback()
+            missing = await Role.aio.get(name="dev")
+            await Role.aio.update_or_create(name="dev", commit=True)
+            await Role.aio.session.rollback()
+            return missing, await Role.aio.get(name="dev")
+
+        missing, role = run(scenario())
+        assert missing is None
+        assert role is not None
+
+
+class RoleView(AsyncMethodView):
+    async def get(self, name):
+        role = await Role.aio.get(name=name)
+        return json_response(data={"name": role.name if role else None})
+
+
+def test_async_view(app, db, testapp):
+    """The handlers of an AsyncMethodView are awaited."""
+    app.add_url_rule("/roles/<name>", view_func=RoleView.as_view("role"))
+    Role.create(name="admin")
+    assert testapp.get("/roles/admin").json["data"] == {"name": "admin"}
+    assert testapp.get("/roles/nobody").json["data"] == {"name": None}
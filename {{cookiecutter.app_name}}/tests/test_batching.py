@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Celery batching tests."""
+import time
+
+import pytest
+from {{cookiecutter.app_name}}.extensions import celery_app
+from {{cookiecutter.app_name}}.tasks.batching import (
+    MAX_CHUNK_SIZE,
+    batched_task,
+    chunk_size,
+    chunked,
+    chunked_group,
+)
+
+received = []
+
+
+@batched_task(max_size=3, max_wait=0.05, name="tests.collect")
+def collect(items):
+    """Record one batch."""
+    received.append(items)
+    return len(items)
+
+
+@pytest.fixture
+def eager(app):
+    """Tasks run in the calling process."""
+    celery_app.conf.task_always_eager = True
+    received.clear()
+    try:
+        yield
+        collect.flush()
+    finally:
+        celery_app.conf.task_always_eager = False
+
+
+@pytest.mark.usefixtures("eager")
+class TestBatchedTask:
+    """@batched_task."""
+
+    def test_full_batch(self):
+        """The call filling the batch sends it."""
+        assert collect.delay(1) is None
+        assert collect.delay(2) is None
+        assert collect.delay(3).get() == 3
+        assert received == [[1, 2, 3]]
+        assert collect.pending == 0
+
+    def test_max_wait(self):
+        """A partial batch is sent after max_wait."""
+        batches = collect.batches
+        collect.delay({"id": 1})
+        deadline = time.monotonic() + 5
+        # until the timer thread is done with the eager run, which flips a
+        # process wide flag of Celery the next test would see
+        while collect.batches == batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert received == [[{"id": 1}]]
+
+    def test_flush(self):
+        """A flush sends what is buffered, once."""
+        collect.delay(1)
+        assert collect.flush().get() == 1
+        assert collect.flush() is None
+        assert received == [[1]]
+
+    def test_call(self):
+        """Calling it runs the batch function here."""
+        assert collect([1, 2]) == 2
+        assert collect.__doc__ == "Record one batch."
+
+
+class TestChunks:
+    """chunked / chunked_group."""
+
+    def test_chunked(self):
+        """Any iterable, the last chunk is short."""
+        assert list(chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+        assert list(chunked([], 2)) == []
+
+    def test_chunk_size(self):
+        """Several chunks per process, capped."""
+        assert chunk_size(80, processes=2) == 10
+        assert chunk_size(3, processes=2) == 1
+        assert chunk_size(10**7, processes=1) == MAX_CHUNK_SIZE
+
+    def test_chunked_group(self, app):
+        """One signature per chunk of the batch task."""
+        fan_out = chunked_group(collect, range(80), processes=2)
+        assert len(fan_out.tasks) == 8
+        assert fan_out.tasks[0].args == (list(range(10)),)
+        assert fan_out.tasks[0].task == "tests.collect"
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite tests."""
+from benchmarks import load, micro, suite
+from benchmarks._common import percentile, summarize
+
+BASE = {"load.GET /api/": {"p50": 0.001, "p99": 0.002, "ops": 1000.0}}
+
+
+class TestCompare:
+    """Regressions against the baseline."""
+
+    def test_within_threshold(self):
+        """Noise below the threshold passes."""
+        results = {"load.GET /api/": {"p50": 0.0011, "p99": 0.0025, "ops": 900.0}}
+        assert suite.compare(results, BASE, 0.25, 0.5) == []
+
+    def test_regressions(self):
+        """Slower p50 / p99 and lower throughput are reported."""
+        results = {"load.GET /api/": {"p50": 0.002, "p99": 0.004, "ops": 500.0}}
+        regressions = suite.compare(results, BASE, 0.25, 0.5)
+        assert len(regressions) == 3
+        assert regressions[0].startswith("load.GET /api/: p50")
+
+    def test_new_benchmark(self):
+        """A benchmark missing from the baseline is not a regression."""
+        results = {"micro.new": {"p50": 1, "p99": 1, "ops": 1}}
+        assert suite.compare(results, BASE, 0.25) == []
+
+    def test_baseline_round_trip(self, tmp_path):
+        """Saved results load back."""
+        path = str(tmp_path / "baseline.json")
+        assert suite.load_baseline(path) == {}
+        suite.save_baseline(path, BASE)
+        assert suite.load_baseline(path)["results"] == BASE
+
+    def test_incomparable(self):
+        """Only a baseline of this environment gates the run."""
+        assert "--save" in suite.incomparable({}, "baseline.json")
+        other = {"environment": {"python": "2.7"}, "results": BASE}
+        assert "not compared" in suite.incomparable(other, "baseline.json")
+        here = {"environment": suite.environment(), "results": BASE}
+        assert suite.incomparable(here, "baseline.json") == ""
+
+    def test_best(self):
+        """Repeated runs keep the lowest p50."""
+        slow = {"a": {"p50": 2, "p99": 2, "ops": 1}}
+        fast = {"a": {"p50": 1, "p99": 3, "ops": 2}}
+        assert suite.best(dict(slow), fast) == fast
+
+
+def test_summarize():
+    """p50, nearest-rank p99 and throughput."""
+    assert percentile(range(1, 101), 99) == 99
+    result = summarize([0.001] * 99 + [0.1], seconds=1.0)
+    assert result["p50"] == 0.001
+    assert result["p99"] == 0.001
+    assert result["ops"] == 100
+
+
+def test_micro(app):
+    """Every case runs."""
+    results = micro.run(app, rounds=1, min_time=0)
+    assert "micro.schema.user_dump" in results
+
+
+def test_load():
+    """Every /api route has a scenario and no request fails."""
+    # its own app: the one of the fixture shares ``g`` across requests
+    app, cleanup = load.temporary_app()
+    try:
+        results = load.run(app, requests=2, concurrency=2)
+    finally:
+        cleanup()
+    assert len(results) == len(load.routes(app))
+    assert all(result["errors"] == 0 for result in results.values())
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Token blocklist and auth decorator tests."""
+import time
+
+from flask_jwt_extended import create_access_token
+from {{cookiecutter.app_name}}.apps.decorarors import auth
+from {{cookiecutter.app_name}}.utils.blocklist import (
+    MemoryBlocklistBackend,
+    TokenBlocklist,
+)
+
+
+class TestTokenBlocklist:
+    """TokenBlocklist tests."""
+
+    def test_revoke(self, app):
+        """Revoked ids are found locally until their token expires."""
+        blocklist = TokenBlocklist()
+        blocklist.init_app(app, backend=MemoryBlocklistBackend())
+        blocklist.revoke("a", time.time() + 60)
+        blocklist.revoke("b", time.time() - 1)
+        assert blocklist.is_revoked("a")
+        assert not blocklist.is_revoked("b")
+        assert not blocklist.is_revoked("c")
+
+    def test_sync_interval(self, app):
+        """Revocations of other processes show up on the next sync."""
+        backend = MemoryBlocklistBackend()
+        blocklist = TokenBlocklist()
+        blocklist.init_app(app, backend=backend)
+        assert not blocklist.is_revoked("a")
+        backend.add("a", time.time() + 60)
+        assert not blocklist.is_revoked("a")
+        blocklist.sync()
+        assert blocklist.is_revoked("a")
+        assert blocklist.stats()["syncs"] == 2
+
+    def test_failed_sync_keeps_set(self, app):
+        """A backend error keeps the last known revocations."""
+        backend = MemoryBlocklistBackend()
+        blocklist = TokenBlocklist()
+        blocklist.init_app(app, backend=backend)
+        blocklist.revoke("a", time.time() + 60)
+
+        def fail(now):
+            raise ConnectionError
+
+        backend.members = fail
+        blocklist.sync()
+        assert blocklist.is_revoked("a")
+        assert not blocklist.is_revoked("b")
+        assert blocklist.stats()["sync_errors"] == 1
+
+    def test_failed_revoke_is_local(self, app):
+        """A backend error on revoke still revokes in this process."""
+        backend = MemoryBlocklistBackend()
+        blocklist = TokenBlocklist()
+        blocklist.init_app(app, backend=backend)
+
+        def fail(jti, expires_at):
+            raise ConnectionError
+
+        add, backend.add = backend.add, fail
+        blocklist.revoke("a", time.time() + 60)
+        assert blocklist.is_revoked("a")
+        blocklist.sync()
+        assert blocklist.is_revoked("a")
+        assert blocklist.stats()["unsaved"] == 1
+
+        backend.add = add
+        blocklist.sync()
+        assert blocklist.stats()["unsaved"] == 0
+        assert "a" in backend.members(time.time())
+        assert blocklist.is_revoked("a")
+
+    def test_fail_closed(self, app, monkeypatch):
+        """With JWT_BLOCKLIST_FAIL_CLOSED a failed sync rejects every token."""
+        monkeypatch.setitem(app.config, "JWT_BLOCKLIST_FAIL_CLOSED", True)
+        backend = MemoryBlocklistBackend()
+        blocklist = TokenBlocklist()
+        blocklist.init_app(app, backend=backend)
+        members = backend.members
+
+        def fail(now):
+            raise ConnectionError
+
+        backend.members = fail
+        blocklist.sync()
+        assert blocklist.is_revoked("b")
+        backend.members = members
+        blocklist.sync()
+        assert not blocklist.is_revoked("b")
+
+
+class TestAuth:
+    """auth decorator tests."""
+
+    def test_roles(self, app, user):
+        """Any matching role claim grants access."""
+        view = auth(["admin", "develop"])(lambda: "ok")
+        for claims, allowed in (({"develop": True}, True), ({"staff": True}, False)):
+            token = create_access_token(
+                identity=user.username, additional_claims=claims
+            )
+            headers = {"Authorization": f"Bearer {token}"}
+            with app.test_request_context(headers=headers):
+                rv = view()
+            assert (rv == "ok") is allowed
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 """Database unit tests."""
 import pytest
+import sqlalchemy as sa
 from sqlalchemy import text
-from sqlalchemy.orm.exc import ObjectDeletedError
-from {{cookiecutter.app_name}}.apps.models import User
-from {{cookiecutter.app_name}}.database import Column, PkModel, db
+from sqlalchemy.orm.exc import NoResultFound, ObjectDeletedError
+from {{cookiecutter.app_name}}.apps.models import Role, User
+from {{cookiecutter.app_name}}.database import Column, PkModel, db, lookup_cache_stats
+from {{cookiecutter.app_name}}.extensions import model_cache
 
 ExampleUserModel = User
 
+
 @pytest.mark.usefixtures("db")
 class TestCRUDMixin:
     """CRUDMixin tests."""
@@ -54,3 +57,337 @@ class TestPkModel:
     def test_get_by_id_wrong_type(self):
         """Test get_by_id returns None for non-numeric argument."""
         assert ExampleUserModel.get_by_id("xyz") is None
+
+
+@pytest.mark.usefixtures("db")
+class TestBulkOperations:
+    """Bulk create and upsert tests."""
+
+    def test_bulk_create(self):
+        """Rows are inserted in batches without loading instances."""
+        rows = [
+            {"username": f"bulk{i}", "email": f"bulk{i}@bar.com"} for i in range(25)
+        ]
+        created = ExampleUserModel.bulk_create(rows, batch_size=10)
+        assert created == 25
+        assert db.session.query(ExampleUserModel).count() == 25
+
+    def test_bulk_create_mixed_keys(self):
+        """Rows with different key sets are inserted together."""
+        rows = [{"username": "a"}, {"username": "b", "email": "b@bar.com"}]
+        assert ExampleUserModel.bulk_create(rows) == 2
+        assert ExampleUserModel.get(username="b").email == "b@bar.com"
+
+    def test_bulk_create_return_objects(self):
+        """Instances are returned when asked for."""
+        users = ExampleUserModel.bulk_create(
+            [{"username": "foo"}, {"username": "bar"}], return_objects=True
+        )
+        assert [user.username for user in users] == ["foo", "bar"]
+        assert all(user.id for user in users)
+
+    def test_bulk_upsert(self):
+        """Existing rows are updated, new rows are created."""
+        ExampleUserModel.bulk_create([{"username": "foo", "email": "old@bar.com"}])
+        rows = [
+            {"username": "foo", "email": "new@bar.com"},
+            {"username": "bar", "email": "bar@bar.com"},
+        ]
+        created, updated = ExampleUserModel.bulk_upsert(
+            rows, conflict_cols=["username"], batch_size=1
+        )
+        assert (created, updated) == (1, 1)
+        db.session.expire_all()
+        assert ExampleUserModel.get(username="foo").email == "new@bar.com"
+        assert ExampleUserModel.get(username="bar").email == "bar@bar.com"
+
+    def test_bulk_upsert_without_update(self):
+        """An empty update_cols leaves existing rows untouched."""
+        ExampleUserModel.bulk_create([{"username": "foo", "email": "old@bar.com"}])
+        created, updated = ExampleUserModel.bulk_upsert(
+            [{"username": "foo", "email": "new@bar.com"}],
+            conflict_cols=["username"],
+            update_cols=[],
+        )
+        assert (created, updated) == (0, 0)
+        db.session.expire_all()
+        assert ExampleUserModel.get(username="foo").email == "old@bar.com"
+
+    def test_bulk_upsert_duplicate_keys(self):
+        """The last of the rows sharing a key in a batch wins."""
+        created, updated = ExampleUserModel.bulk_upsert(
+            [
+                {"username": "foo", "email": "first@bar.com"},
+                {"username": "foo", "email": "last@bar.com"},
+            ],
+            conflict_cols=["username"],
+        )
+        assert (created, updated) == (1, 0)
+        db.session.expire_all()
+        assert ExampleUserModel.get(username="foo").email == "last@bar.com"
+
+    def test_bulk_upsert_missing_update_cols(self):
+        """Rows without the explicit update columns are rejected."""
+        with pytest.raises(ValueError):
+            ExampleUserModel.bulk_upsert(
+                [{"username": "foo"}],
+                conflict_cols=["username"],
+                update_cols=["email"],
+            )
+
+
+@pytest.fixture(params=["returning", "flush"])
+def insert_path(request, db):
+    """Both insert paths of _insert_or_get, ``flush`` is the one of MySQL."""
+    if request.param == "flush":
+        # what MySQL reports, the instance is flushed in the SAVEPOINT
+        request.getfixturevalue("monkeypatch").setattr(
+            db.engine.dialect, "insert_returning", False
+        )
+    return request.param
+
+
+@pytest.mark.usefixtures("db")
+class TestGetOrCreate:
+    """Race-free get_or_create / update_or_create tests."""
+
+    @pytest.mark.usefixtures("insert_path")
+    def test_lost_race_reads_winner(self):
+        """A row inserted by another writer after the lookup is returned."""
+        with db.engine.begin() as connection:
+            connection.execute(text("INSERT INTO role (name) VALUES ('admin')"))
+        role, created = Role._insert_or_get(
+            db.session, {"name": "admin"}, {"name": "admin"}
+        )
+        assert created is False
+        assert role.name == "admin"
+
+    @pytest.mark.usefixtures("insert_path")
+    def test_conflict_keeps_transaction(self):
+        """A conflicting insert does not roll back the caller's work."""
+        Role.create(name="admin")
+        db.session.add(Role(name="pending"))
+        role, created = Role.get_or_create(name="admin", commit=False)
+        Role._insert_or_get(db.session, {"name": "admin"}, {"name": "admin"})
+        db.session.commit()
+        assert created is False
+        assert Role.get(name="pending") is not None
+
+    @pytest.mark.usefixtures("insert_path")
+    def test_conflict_on_other_key(self):
+        """A conflict the lookup cannot see raises NoResultFound."""
+        Role.create(name="admin")
+        with pytest.raises(NoResultFound):
+            Role._insert_or_get(db.session, {"id": 99}, {"name": "admin"})
+        assert Role.get(name="admin") is not None
+
+    def test_relationships_are_saved(self):
+        """Params beyond the columns go through the flush path."""
+        user, created = User.get_or_create(
+            username="foo", defaults={"roles": [Role(name="admin")]}
+        )
+        assert created is True
+        db.session.expire_all()
+        assert [role.name for role in User.get(username="foo").roles] == ["admin"]
+
+    def test_update_or_create(self):
+        """The second call updates the row created by the first one."""
+        user, created = User.update_or_create(
+            username="foo", defaults={"email": "a@bar.com"}, commit=False
+        )
+        assert created is True
+        again, created = User.update_or_create(
+            username="foo", defaults={"email": "b@bar.com"}
+        )
+        assert created is False
+        assert again is user
+        assert user.email == "b@bar.com"
+
+    def test_update_or_create_does_not_commit(self):
+        """By default the update stays in the caller's transaction."""
+        User.create(username="foo", email="a@bar.com")
+        User.update_or_create(username="foo", defaults={"email": "b@bar.com"})
+        db.session.rollback()
+        assert User.get(username="foo").email == "a@bar.com"
+
+
+@pytest.mark.usefixtures("db")
+class TestLookupCache:
+    """Session lookup cache tests."""
+
+    def test_repeated_get_is_cached(self):
+        """The second lookup of the same key does not hit the database."""
+        ExampleUserModel.create(username="foo", email="foo@bar.com")
+        before = lookup_cache_stats()
+        first = ExampleUserModel.get(username="foo")
+        second = ExampleUserModel.get(username="foo")
+        after = lookup_cache_stats()
+        assert first is second
+        assert after["hits"] - before["hits"] == 1
+        assert after["misses"] - before["misses"] == 1
+
+    def test_commit_clears(self):
+        """Expired instances are not served after a commit."""
+        ExampleUserModel.create(username="foo", email="foo@bar.com")
+        ExampleUserModel.get(username="foo")
+        db.session.commit()
+        assert lookup_cache_stats()["size"] == 0
+
+    def test_save_invalidates(self):
+        """Saving a record drops the cached lookups of its model."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        ExampleUserModel.get(username="foo")
+        user.update(username="bar")
+        assert ExampleUserModel.get(username="foo") is None
+        assert ExampleUserModel.get(username="bar") is user
+
+    def test_deleted_entry_is_ignored(self):
+        """A deleted instance is never served from the cache."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        assert ExampleUserModel.get(username="foo") is user
+        user.delete()
+        assert ExampleUserModel.get(username="foo") is None
+
+
+@pytest.fixture
+def cached(app):
+    """Enable the second-level model cache."""
+    app.config["MODEL_CACHE_ENABLED"] = True
+    model_cache.local.clear()
+    yield model_cache
+    app.config["MODEL_CACHE_ENABLED"] = False
+
+
+@pytest.mark.usefixtures("db")
+class TestModelCache:
+    """Second-level model cache tests."""
+
+    def test_get_by_id_read_through(self, cached):
+        """A cached row is rebuilt without querying the database."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        assert ExampleUserModel.get_by_id(user_id).username == "foo"
+        db.session.expunge_all()
+        misses = cached.misses
+
+        retrieved = ExampleUserModel.get_by_id(user_id)
+        assert cached.misses == misses
+        assert retrieved.username == "foo"
+        assert retrieved in db.session
+
+    def test_get_by_id_string(self, cached):
+        """A string id reads the row cached under the integer one."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        ExampleUserModel.get_by_id(user_id)
+        db.session.expunge_all()
+        hits = cached.local_hits
+        assert ExampleUserModel.get_by_id(str(user_id)).id == user_id
+        assert cached.local_hits == hits + 1
+        assert ExampleUserModel.get_by_id(user_id + 0.5) is None
+
+    def test_unique_key_lookup(self, cached):
+        """Lookups on a declared cache key share the cached row."""
+        ExampleUserModel.create(username="foo", email="foo@bar.com")
+        db.session.expunge_all()
+        ExampleUserModel.get(username="foo")
+        db.session.expunge_all()
+        hits = cached.local_hits
+        assert ExampleUserModel.get(username="foo").email == "foo@bar.com"
+        assert cached.local_hits == hits + 1
+
+    def test_write_invalidates(self, cached):
+        """A committed update bumps the table version."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        ExampleUserModel.get_by_id(user_id).update(email="new@bar.com")
+        db.session.expunge_all()
+        assert ExampleUserModel.get_by_id(user_id).email == "new@bar.com"
+
+    def test_bulk_write_invalidates(self, cached):
+        """Bulk upserts bump the table version too."""
+        ExampleUserModel.create(username="foo", email="foo@bar.com")
+        db.session.expunge_all()
+        ExampleUserModel.get(username="foo")
+        ExampleUserModel.bulk_upsert(
+            [{"username": "foo", "email": "new@bar.com"}], conflict_cols=["username"]
+        )
+        db.session.expunge_all()
+        assert ExampleUserModel.get(username="foo").email == "new@bar.com"
+
+    def test_sensitive_columns_not_stored(self, cached, user):
+        """The password hash is left out and loads from the database."""
+        assert "_password" not in cached._columns(sa.inspect(User))
+        user_id = user.id
+        db.session.expunge_all()
+        User.get_by_id(user_id)
+        db.session.expunge_all()
+        hits = cached.local_hits
+        retrieved = User.get_by_id(user_id)
+        assert cached.local_hits == hits + 1
+        assert "_password" in sa.inspect(retrieved).unloaded
+        assert retrieved.check_password("myprecious")
+
+    def test_bump_failure_after_commit(self, cached, monkeypatch):
+        """A cache outage after the commit is logged, not raised."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        ExampleUserModel.get_by_id(user_id)
+
+        def unreachable(key, delta=1):
+            raise ConnectionError("cache down")
+
+        monkeypatch.setattr(cached.cache.cache, "inc", unreachable)
+        ExampleUserModel.get_by_id(user_id).update(email="new@bar.com")
+        assert not any(key.startswith("model:") for key in cached.local._data)
+
+    def test_uncommitted_write_not_cached(self, cached):
+        """Rows loaded after an uncommitted write never reach the cache."""
+        user = ExampleUserModel.create(username="foo", email="a@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        ExampleUserModel.bulk_upsert(
+            [{"username": "foo", "email": "uncommitted@bar.com"}],
+            conflict_cols=["username"],
+            commit=False,
+        )
+        assert ExampleUserModel.get_by_id(user_id).email == "uncommitted@bar.com"
+        db.session.rollback()
+        db.session.expunge_all()
+        assert ExampleUserModel.get_by_id(user_id).email == "a@bar.com"
+        db.session.expunge_all()
+        assert ExampleUserModel.get(username="foo").email == "a@bar.com"
+
+    def test_cached_row_not_read_after_write(self, cached):
+        """The writing transaction reads its own write, not the cached row."""
+        user = ExampleUserModel.create(username="foo", email="a@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        ExampleUserModel.get_by_id(user_id)
+        db.session.expunge_all()
+        ExampleUserModel.bulk_upsert(
+            [{"username": "foo", "email": "b@bar.com"}],
+            conflict_cols=["username"],
+            commit=False,
+        )
+        assert ExampleUserModel.get_by_id(user_id).email == "b@bar.com"
+        db.session.rollback()
+
+    def test_cache_outage_loads_from_database(self, cached, monkeypatch):
+        """Lookups fall back to the database while the cache is down."""
+        user = ExampleUserModel.create(username="foo", email="foo@bar.com")
+        user_id = user.id
+        db.session.expunge_all()
+        cached.local.clear()
+
+        def unreachable(*args, **kwargs):
+            raise ConnectionError("cache down")
+
+        monkeypatch.setattr(cached.cache, "get", unreachable)
+        monkeypatch.setattr(cached.cache, "set_many", unreachable)
+        assert ExampleUserModel.get_by_id(user_id).username == "foo"
+        assert ExampleUserModel.get(username="foo").id == user_id
@@ -36,6 +36,28 @@ class TestLoggingIn:
         assert res.json.get("code") == CODE.OK.code
         assert res.json.get("error") is None
 
+    def test_get_current_user(self, user, testapp):
+        """The access token resolves the current user."""
+        content_type = "application/json"
+        data = {
+            "username": "foobar",
+            "email": "foo@bar.com",
+            "password": "secret",
+            "confirm": "secret",
+        }
+        testapp.post(
+            "/api/user/register", params=json.dumps(data), content_type=content_type
+        )
+        res = testapp.post(
+            "/api/user/login", params=json.dumps(data), content_type=content_type
+        )
+        token = res.json["data"]["access_token"]
+        res = testapp.get(
+            "/api/user/login", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert res.json.get("code") == CODE.OK.code
+        assert res.json["data"]["username"] == "foobar"
+
     # def test_sees_alert_on_log_out(self, user, testapp):
     #     """Show alert on logout."""
 
@@ -80,6 +102,27 @@ class TestLoggingIn:
         assert res.json.get("code") == CODE.INVALID_USERNAME_PASSWORD.code
         assert "username or password invalid" in res.json.get("error")
 
+    def test_logout_revokes_token(self, user, testapp):
+        """A token is rejected once its owner logged out."""
+        content_type = "application/json"
+        data = {
+            "username": "foobar",
+            "email": "foo@bar.com",
+            "password": "secret",
+            "confirm": "secret",
+        }
+        testapp.post(
+            "/api/user/register", params=json.dumps(data), content_type=content_type
+        )
+        res = testapp.post(
+            "/api/user/login", params=json.dumps(data), content_type=content_type
+        )
+        headers = {"Authorization": f"Bearer {res.json['data']['access_token']}"}
+        res = testapp.post("/api/user/logout", headers=headers)
+        assert res.json.get("code") == CODE.OK.code
+        res = testapp.get("/api/user/login", headers=headers, expect_errors=True)
+        assert res.status_code == 401
+
 
 class TestRegistering:
     """Register a user."""
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""HTTP helpers unit tests."""
+import datetime as dt
+import decimal
+import json
+import uuid
+
+import pytest
+from sqlalchemy import select
+from {{cookiecutter.app_name}}.apps.models import User
+from {{cookiecutter.app_name}}.apps.user.schemas import UserSchema
+from {{cookiecutter.app_name}}.initialization.exception import CODE
+from {{cookiecutter.app_name}}.utils import http
+from {{cookiecutter.app_name}}.utils.http import (
+    FastJsonProvider,
+    JsonEncoder,
+    stream_json_response,
+)
+
+
+class Vector:
+    """numpy-ish object."""
+
+    def tolist(self):
+        return [1, 2]
+
+
+PAYLOAD = {
+    "when": dt.datetime(2023, 1, 2, 3, 4, 5),
+    "day": dt.date(2023, 1, 2),
+    "price": decimal.Decimal("1.5"),
+    "id": uuid.UUID("12345678123456781234567812345678"),
+    "raw": b"bytes",
+    "vector": Vector(),
+    "items": {"b": 1, "a": [1, 2]},
+}
+FAST_JSON_PROVIDER = "{{cookiecutter.app_name}}.utils.http.FastJsonProvider"
+
+
+class TestFastJsonProvider:
+    """Fast JSON provider tests."""
+
+    @pytest.mark.parametrize("use_orjson", [False, True])
+    def test_matches_json_encoder(self, app, monkeypatch, use_orjson):
+        """The fast provider produces the same documents as JsonEncoder."""
+        if use_orjson and http.orjson is None:
+            pytest.skip("orjson is not installed")
+        if not use_orjson:
+            monkeypatch.setattr(http, "orjson", None)
+        fast = FastJsonProvider(app).dumps(PAYLOAD)
+        assert json.loads(fast) == json.loads(JsonEncoder(app).dumps(PAYLOAD))
+        assert json.loads(fast)["when"] == "2023-01-02 03:04:05"
+
+    def test_model_row(self, app, db):
+        """Models are dumped with their columns."""
+        user = User.create(username="foo", email="foo@bar.com")
+        data = json.loads(FastJsonProvider(app).dumps({"user": user}))
+        assert data["user"]["username"] == "foo"
+
+    def test_row(self, app, db):
+        """Rows are dumped as column dicts by both providers."""
+        User.create(username="foo", email="foo@bar.com")
+        row = db.session.execute(select(User.username, User.email)).one()
+        fast = json.loads(FastJsonProvider(app).dumps({"row": row}))
+        assert fast == json.loads(JsonEncoder(app).dumps({"row": row}))
+        assert fast["row"] == {"username": "foo", "email": "foo@bar.com"}
+
+    def test_big_int(self, app):
+        """Integers orjson cannot encode go to the stdlib encoder."""
+        assert FastJsonProvider(app).dumps([2**64]) == "[%d]" % 2**64
+
+    def test_unknown_type(self, app):
+        """Objects without a converter still raise TypeError."""
+        with pytest.raises(TypeError):
+            FastJsonProvider(app).dumps({"obj": object()})
+
+    def test_json_response_uses_orjson(self, app, monkeypatch):
+        """The jsonify arguments map to orjson options, compact and indented."""
+        if http.orjson is None:
+            pytest.skip("orjson is not installed")
+        calls = []
+        orjson_dumps = http.orjson.dumps
+
+        def dumps(obj, **kwargs):
+            calls.append(kwargs["option"])
+            return orjson_dumps(obj, **kwargs)
+
+        monkeypatch.setattr(http.orjson, "dumps", dumps)
+        app.json = FastJsonProvider(app)
+        assert (
+            json.loads(http.json_response(PAYLOAD).get_data())["code"] == CODE.OK.code
+        )
+        app.json.compact = False
+        indented = http.json_response(PAYLOAD).get_data(as_text=True)
+        assert len(calls) == 2
+        assert calls[1] & http.orjson.OPT_INDENT_2
+        assert indented.startswith('{\n  "code"')
+
+    def test_fallback_kwargs(self, app):
+        """Arguments orjson cannot express go to the stdlib encoder."""
+        assert FastJsonProvider(app).dumps([1], indent=4) == "[\n    1\n]"
+
+    @pytest.mark.settings(JSON_PROVIDER_CLASS=FAST_JSON_PROVIDER)
+    def test_selected_by_config(self, app):
+        """The app uses the provider named in the settings."""
+        assert isinstance(app.json, FastJsonProvider)
+
+    def test_default_provider(self, app):
+        """Without JSON_PROVIDER_CLASS the app keeps JsonEncoder."""
+        assert type(app.json) is JsonEncoder
+
+
+@pytest.mark.usefixtures("db")
+class TestStreamJsonResponse:
+    """Streaming JSON response tests."""
+
+    def test_stream_select(self):
+        """A select is streamed in batches inside the usual envelope."""
+        User.bulk_create([{"username": f"user{i}"} for i in range(7)])
+        response = stream_json_response(select(User), schema=UserSchema, yield_per=2)
+        assert response.is_streamed
+        chunks = list(response.response)
+        assert len(chunks) > 1
+        body = json.loads("".join(chunks))
+        assert body["code"] == CODE.OK.code
+        assert body["error"] is None
+        assert [item["username"] for item in body["data"]] == [
+            f"user{i}" for i in range(7)
+        ]
+
+    def test_stream_columns(self):
+        """A select of columns streams every column of each row."""
+        User.bulk_create([{"username": "foo", "email": "foo@bar.com"}])
+        response = stream_json_response(select(User.username, User.email))
+        body = json.loads("".join(response.response))
+        assert body["data"] == [{"username": "foo", "email": "foo@bar.com"}]
+
+    def test_stream_empty_iterable(self):
+        """An empty iterable gives an empty data list."""
+        response = stream_json_response(iter(()))
+        assert json.loads("".join(response.response))["data"] == []
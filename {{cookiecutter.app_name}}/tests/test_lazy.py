@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Lazy initialisation tests."""
+import pytest
+from werkzeug.utils import import_string
+from {{cookiecutter.app_name}}.initialization.urls import API_URLS
+from {{cookiecutter.app_name}}.utils.lazy import LazyObject, LazyView, load_views
+
+
+class TestLazyObject:
+    """LazyObject tests."""
+
+    def test_built_on_first_use(self):
+        """The object is built on first access and callbacks run then."""
+        seen = []
+        obj = LazyObject("collections:OrderedDict", a=1)
+        obj.when_loaded(seen.append, key="first")
+        obj.when_loaded(lambda o: seen.append("replaced"), key="first")
+        assert not obj.loaded
+        assert seen == []
+        assert list(obj.keys()) == ["a"]
+        assert obj.loaded
+        assert seen == ["replaced"]
+        obj.when_loaded(lambda o: seen.append("now"))
+        assert seen == ["replaced", "now"]
+
+    def test_setattr_forwards(self):
+        """Attributes are set on the real object."""
+        obj = LazyObject("types:SimpleNamespace")
+        obj.value = 1
+        assert obj.__wrapped__.value == 1
+
+
+@pytest.mark.settings(LAZY_INIT=True)
+class TestLazyViews:
+    """Views registered without importing them."""
+
+    def test_views_are_lazy(self, app):
+        """Rules exist before the views are imported."""
+        view = app.view_functions["api.user_login"]
+        assert isinstance(view, LazyView)
+        assert "view" not in view.__dict__
+        load_views(app)
+        assert "view" in view.__dict__
+
+    @pytest.mark.parametrize("url, view, endpoint, methods", API_URLS)
+    def test_methods_match(self, url, view, endpoint, methods):
+        """The methods of the URL table are the ones the views implement."""
+        assert set(methods) == set(import_string(view).methods)
+
+    def test_lazy_view_serves(self, testapp):
+        """A lazy view answers like the view itself."""
+        res = testapp.get("/api/")
+        assert res.json["data"] == {"hello": "world"}
+
+
+def test_eager_mode(app):
+    """Without LAZY_INIT everything is set up in create_app."""
+    assert not isinstance(app.view_functions["api.user_login"], LazyView)
+    assert "migrate" in app.extensions
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Logging pipeline tests."""
+import json
+import logging
+import queue
+
+import pytest
+from {{cookiecutter.app_name}}.utils.log import LogPipeline
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = LogPipeline()
+    pipeline.format = "json"
+    yield pipeline
+    pipeline.stop()
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestLogPipeline:
+    """Queue based logging."""
+
+    def test_json_lines(self, pipeline, tmp_path):
+        """Records are written by the listener as JSON lines."""
+        logger = logging.getLogger("tests.log.json")
+        pipeline.attach(logger, (tmp_path / "app.log").as_posix())
+        logger.info("hello %s", "world")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+        pipeline.flush()
+        lines = read_lines(tmp_path / "app.log")
+        assert [line["message"] for line in lines] == ["hello world", "failed"]
+        assert lines[0]["logger"] == "tests.log.json"
+        assert "ValueError: boom" in lines[1]["exc"]
+
+    def test_text_by_default(self, tmp_path):
+        """Without LOG_FORMAT the lines keep the previous text format."""
+        pipeline = LogPipeline()
+        logger = logging.getLogger("tests.log.text")
+        try:
+            pipeline.attach(logger, (tmp_path / "app.log").as_posix())
+            logger.info("hello")
+            pipeline.flush()
+        finally:
+            pipeline.stop()
+        line = (tmp_path / "app.log").read_text()
+        assert " | INFO | test_log.py:test_text_by_default:[line:" in line
+        assert line.endswith("] - hello\n")
+
+    def test_loggers_keep_their_files(self, pipeline, tmp_path):
+        """Each logger is written to the files it was attached to."""
+        first = logging.getLogger("tests.log.first")
+        second = logging.getLogger("tests.log.second")
+        pipeline.attach(first, (tmp_path / "first.log").as_posix())
+        pipeline.attach(second, (tmp_path / "second.log").as_posix())
+        pipeline.attach(second, (tmp_path / "second.log").as_posix())
+        first.info("one")
+        second.info("two")
+        pipeline.flush()
+        assert [line["message"] for line in read_lines(tmp_path / "first.log")] == [
+            "one"
+        ]
+        assert [line["message"] for line in read_lines(tmp_path / "second.log")] == [
+            "two"
+        ]
+
+    def test_sampling(self, pipeline, tmp_path, app):
+        """Sampled loggers keep their warnings."""
+        app.config.update(LOG_FORMAT="json", LOG_SAMPLING={"tests.log.hot": 0})
+        pipeline.init_app(app)
+        logger = logging.getLogger("tests.log.hot.engine")
+        pipeline.attach(logger, (tmp_path / "hot.log").as_posix())
+        for _ in range(10):
+            logger.info("noise")
+        logger.warning("kept")
+        pipeline.flush()
+        assert [line["message"] for line in read_lines(tmp_path / "hot.log")] == [
+            "kept"
+        ]
+
+    def test_full_queue_drops(self, pipeline, tmp_path):
+        """A full queue drops records instead of blocking."""
+        logger = logging.getLogger("tests.log.full")
+        pipeline.attach(logger, (tmp_path / "full.log").as_posix())
+        pipeline.stop()
+        pipeline.queue = queue.Queue(1)
+        for handler in logger.handlers:
+            handler.queue = pipeline.queue
+        logger.info("first")
+        logger.info("second")
+        assert pipeline.dropped == 1
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Metrics tests."""
+import time
+
+import pytest
+from {{cookiecutter.app_name}}.extensions import celery_app
+from {{cookiecutter.app_name}}.utils.lazy import load
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+
+def sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.settings(METRICS_ENABLED=True)
+class TestMetrics:
+    """Prometheus metrics."""
+
+    def test_request_latency(self, db, testapp):
+        """Requests are timed by URL rule and exported."""
+        before = sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            rule="/api/",
+            status="200",
+        )
+        testapp.get("/api/")
+        res = testapp.get("/metrics")
+        assert res.content_type.startswith("text/plain")
+        assert "http_request_duration_seconds_bucket" in res.text
+        assert 'db_pool_checkouts{bind="default"}' in res.text
+        after = sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            rule="/api/",
+            status="200",
+        )
+        assert after == before + 1
+        assert sample("http_requests_in_progress", method="GET", rule="/api/") == 0
+
+    def test_unmatched_rule(self, testapp):
+        """Unknown paths share one label value."""
+        testapp.get("/no/such/page", status=404)
+        assert sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            rule="<unmatched>",
+            status="404",
+        )
+
+    def test_celery_task(self, app):
+        """Tasks sent with apply_async are timed by the worker running them."""
+        from celery import Celery
+        from celery.contrib.testing.worker import start_worker
+
+        # configuring the Celery app of the Flask app connects the signals
+        load(celery_app)
+        # its own app on the in-memory broker, the signals are global
+        celery = Celery("tests.metrics", broker="memory://", set_as_current=False)
+        celery.conf.update(
+            broker_transport_options={"polling_interval": 0.01},
+            task_ignore_result=True,
+        )
+
+        @celery.task(name="tests.metrics.add")
+        def add(x, y):
+            return x + y
+
+        labels = {"task": "tests.metrics.add"}
+        before = sample("celery_task_queue_wait_seconds_count", **labels)
+        with start_worker(celery, pool="solo", perform_ping_check=False):
+            add.apply_async((1, 2))
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline and not sample(
+                "celery_task_runtime_seconds_count", state="SUCCESS", **labels
+            ):
+                time.sleep(0.01)
+        assert sample("celery_task_runtime_seconds_count", state="SUCCESS", **labels)
+        assert sample("celery_task_queue_wait_seconds_count", **labels) == before + 1
+
+
+def test_metrics_off_by_default(app, testapp):
+    """Without METRICS_ENABLED there is no endpoint."""
+    assert "metrics" not in app.extensions
+    testapp.get("/metrics", status=404)
@@ -4,6 +4,7 @@ import datetime as dt
 
 import pytest
 from {{cookiecutter.app_name}}.apps.models import Role, User
+from {{cookiecutter.app_name}}.extensions import bcrypt, password_hasher
 
 from .factories import UserFactory
 
@@ -49,6 +50,21 @@ class TestUser:
         assert user.check_password("foobarbaz123") is True
         assert user.check_password("barfoobaz") is False
 
+    def test_password_uses_configured_rounds(self):
+        """The cost comes from BCRYPT_LOG_ROUNDS, not from the password."""
+        user = User(username="foo", password="a-rather-long-password")
+        assert user.password.split("$")[2] == "04"
+        assert password_hasher.stats()["completed"] >= 1
+
+    def test_check_password_rehashes(self):
+        """A hash stored with another cost is upgraded on a successful check."""
+        user = User(username="foo")
+        user._password = bcrypt.generate_password_hash("secret", 5).decode()
+        assert password_hasher.needs_rehash(user.password)
+        assert user.check_password("secret") is True
+        assert not password_hasher.needs_rehash(user.password)
+        assert user.check_password("secret") is True
+
     def test_full_name(self):
         """User full name."""
         user = UserFactory(first_name="Foo", last_name="Bar")
@@ -99,3 +115,29 @@ class TestUser:
         assert is_created is False
         assert user.first_name == "L"
         assert new_user == user
+
+
+@pytest.mark.usefixtures("db")
+class TestSerializer:
+    """Compiled model serializer tests."""
+
+    def test_to_dict(self):
+        """to_dict maps column names to raw values."""
+        user = User.create(username="foo", email="foo@bar.com", password="foobarbaz123")
+        data = user.to_dict()
+        assert data["username"] == "foo"
+        assert data["password"] == user.password
+        assert isinstance(data["created_at"], dt.datetime)
+        assert set(data) == {c.name for c in User.__table__.columns}
+
+    def test_dump(self):
+        """Values are formatted for JSON once per column type."""
+        user = User.create(username="foo", email="foo@bar.com")
+        data = User.serializer().dump(user)
+        assert data["created_at"] == user.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        assert User.serializer().dump_many([user]) == [data]
+
+    def test_compiled_once(self):
+        """The serializer is built at mapper configuration and reused."""
+        assert "__serializer__" in User.__dict__
+        assert User.serializer() is User.serializer()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Load profile and lazy load detection tests."""
+import pytest
+from sqlalchemy import select
+from {{cookiecutter.app_name}}.apps.models import Role, User
+from {{cookiecutter.app_name}}.apps.user.schemas import UserSchema
+from {{cookiecutter.app_name}}.extensions import lazy_load_monitor
+from {{cookiecutter.app_name}}.utils._pagination import KeysetPagination, SelectPagination
+from {{cookiecutter.app_name}}.utils.nplusone import NPlusOneError
+
+
+@pytest.fixture
+def users(db):
+    """Create 15 users sharing one role."""
+    role = Role(name="staff")
+    for i in range(15):
+        role.users.append(User(username=f"user{i:02d}", email=f"user{i}@bar.com"))
+    db.session.add(role)
+    db.session.commit()
+    db.session.expire_all()
+
+
+class TestLoadProfile:
+    """Named loader options."""
+
+    def test_load_profile(self):
+        """Profiles are built once per model."""
+        options = User.load_profile("with_roles")
+        assert len(options) == 1
+        assert User.load_profile("with_roles") is options
+
+    def test_unknown_profile(self):
+        """An undeclared profile is an error."""
+        with pytest.raises(ValueError):
+            User.load_profile("with_everything")
+
+    @pytest.mark.usefixtures("users")
+    def test_get_with_profile(self, db):
+        """``get`` eager loads the relationships of the profile."""
+        user = User.get(username="user01", load_profile="with_roles")
+        assert "roles" in user.__dict__
+        assert [role.name for role in user.roles] == ["staff"]
+
+
+@pytest.mark.settings(NPLUSONE_ENABLED=True, NPLUSONE_RAISE=True)
+@pytest.mark.usefixtures("users")
+class TestLazyLoadMonitor:
+    """N+1 detection."""
+
+    def test_lazy_loads_raise(self, db):
+        """Lazy loading the same relationship past the threshold raises."""
+        users = db.session.execute(select(User).order_by(User.id)).scalars().all()
+        with pytest.raises(NPlusOneError):
+            for user in users:
+                user.roles
+        assert lazy_load_monitor.counts()["User.Role"] == 11
+
+    @pytest.mark.parametrize("pagination", [SelectPagination, KeysetPagination])
+    def test_schema_profile(self, db, pagination):
+        """Pagination applies the load profile of the schema."""
+        page = pagination(per_page=20).make_page(select(User), db.session, UserSchema)
+        assert len(page["items"]) == 15
+        assert [role["name"] for role in page["items"][0]["roles"]] == ["staff"]
+        assert not lazy_load_monitor.counts()
+
+
+@pytest.mark.usefixtures("users")
+def test_monitor_off_by_default(app, db):
+    """Without NPLUSONE_ENABLED lazy loads are not counted."""
+    assert "nplusone" not in app.extensions
+    users = db.session.execute(select(User).order_by(User.id)).scalars().all()
+    for user in users:
+        user.roles
+    assert not lazy_load_monitor.counts()
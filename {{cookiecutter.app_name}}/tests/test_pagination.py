@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Pagination unit tests."""
+import pytest
+from sqlalchemy import select
+from {{cookiecutter.app_name}}.apps.models import User
+from {{cookiecutter.app_name}}.apps.user.schemas import UserSchema
+from {{cookiecutter.app_name}}.extensions import cache
+from {{cookiecutter.app_name}}.utils._pagination import (
+    KeysetPagination,
+    SelectPagination,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+@pytest.fixture
+def users(db):
+    """Create 25 users."""
+    User.bulk_create(
+        [
+            {"username": f"user{i:02d}", "email": f"user{i}@bar.com", "active": True}
+            for i in range(25)
+        ]
+    )
+
+
+@pytest.mark.usefixtures("users")
+class TestKeysetPagination:
+    """Keyset pagination tests."""
+
+    def test_walk_forward_and_back(self, db):
+        """Cursors walk every row once in both directions."""
+        stmt = select(User)
+        seen = []
+        cursor = None
+        while True:
+            page = KeysetPagination(cursor=cursor, per_page=10).make_page(
+                stmt, db.session, None
+            )
+            seen.extend(user.username for user in page["items"])
+            assert page["total"] is None
+            if not page["has_next"]:
+                break
+            cursor = page["next_cursor"]
+        assert seen == [f"user{i:02d}" for i in range(25)]
+
+        page = KeysetPagination(cursor=page["prev_cursor"], per_page=10).make_page(
+            stmt, db.session, None
+        )
+        assert [user.username for user in page["items"]] == [
+            f"user{i:02d}" for i in range(10, 20)
+        ]
+        assert page["has_prev"] is True
+        assert page["has_next"] is True
+
+    def test_descending_composite_order(self, db):
+        """Pages follow a multi-column descending ordering."""
+        page = KeysetPagination(
+            per_page=5, order_by=(User.active, User.id), desc=True, count="exact"
+        ).make_page(select(User), db.session, UserSchema)
+        assert page["total"] == 25
+        assert page["items"][0]["username"] == "user24"
+        direction, values = decode_cursor(page["next_cursor"])
+        assert direction == "next"
+        assert len(values) == 2
+
+        page = KeysetPagination(
+            cursor=page["next_cursor"],
+            per_page=5,
+            order_by=(User.active, User.id),
+            desc=True,
+        ).make_page(select(User), db.session, UserSchema)
+        assert [item["username"] for item in page["items"]] == [
+            f"user{i:02d}" for i in range(19, 14, -1)
+        ]
+
+    def test_invalid_cursor(self, db):
+        """A malformed cursor is rejected."""
+        with pytest.raises(ValueError):
+            KeysetPagination(cursor="garbage").make_page(select(User), db.session, None)
+
+    def test_tampered_cursor(self, db):
+        """Cursor values of the wrong type are rejected before the query."""
+        for value in ("1 OR 1=1", True, {"dt": "2023-01-02T00:00:00"}):
+            cursor = encode_cursor("next", [value])
+            with pytest.raises(ValueError):
+                KeysetPagination(cursor=cursor).make_page(
+                    select(User), db.session, None
+                )
+
+    def test_empty_prev_page(self, db):
+        """An empty page before the first row still has a next page."""
+        first = db.session.execute(select(User.id).order_by(User.id)).scalar()
+        page = KeysetPagination(cursor=encode_cursor("prev", [first])).make_page(
+            select(User), db.session, None
+        )
+        assert page["items"] == []
+        assert page["has_next"] is True
+        assert page["has_prev"] is False
+
+
+@pytest.mark.usefixtures("users")
+class TestSelectPagination:
+    """Offset pagination tests."""
+
+    def test_cached_count(self, db):
+        """The cached count is served without querying again."""
+        stmt = select(User)
+        page = SelectPagination(page=2, per_page=10, count="cached").make_page(
+            stmt, db.session, None
+        )
+        assert page["total"] == 25
+        assert page["pages"] == 3
+        User.bulk_create([{"username": "late"}])
+        page = SelectPagination(page=1, per_page=10, count="cached").make_page(
+            stmt, db.session, None
+        )
+        assert page["total"] == 25
+
+    def test_cached_count_outage(self, db, monkeypatch):
+        """The rows are counted when the cache is down."""
+
+        def unreachable(*args, **kwargs):
+            raise ConnectionError("cache down")
+
+        monkeypatch.setattr(cache, "get", unreachable)
+        page = SelectPagination(page=1, per_page=10, count="cached").make_page(
+            select(User), db.session, None
+        )
+        assert page["total"] == 25
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Request parser unit tests."""
+import pytest
+from {{cookiecutter.app_name}}.utils.wtf.errors import ParseError
+from {{cookiecutter.app_name}}.utils.wtf.parser import Argument, JsonParser
+from {{cookiecutter.app_name}}.utils.wtf.validators import (
+    URL,
+    UUID,
+    AnyOf,
+    ChoiceFiled,
+    DataRequired,
+    DateTime,
+    Email,
+    IPAddress,
+    Length,
+    MacAddress,
+    NoneOf,
+    NumberRange,
+    Regexp,
+)
+
+parser = JsonParser(
+    Argument("name", handler=str.strip, validators=[Length(min=2)]),
+    Argument("age", type=int, required=False),
+    Argument("tags", type=list, required=False, default=[]),
+    Argument("admin", type=bool, required=False),
+)
+
+
+class TestJsonParser:
+    """JsonParser tests."""
+
+    def test_parse(self):
+        """Values are coerced, validated and handled."""
+        form, error = parser.parse(
+            {"name": " foo ", "age": "42", "tags": '["a"]', "admin": "True"}
+        )
+        assert error is None
+        assert form == {"name": "foo", "age": 42, "tags": ["a"], "admin": True}
+
+    def test_parse_json_string(self):
+        """Raw JSON bodies are decoded."""
+        form, error = parser.parse('{"name": "foo"}')
+        assert error is None
+        assert form.name == "foo"
+        assert form.tags == []
+
+    def test_first_error(self):
+        """By default the first invalid field is reported."""
+        form, error = parser.parse({"age": "x"})
+        assert form is None
+        assert error == "Required Error: name is required"
+
+    def test_all_errors(self):
+        """With all_errors every invalid field is reported in one pass."""
+        form, error = parser.parse(
+            {"name": "f", "age": "x", "admin": "yes"}, all_errors=True
+        )
+        assert form is None
+        assert set(error) == {"name", "age", "admin"}
+        assert error["age"] == "Type Error: age type must be <class 'int'>"
+
+    def test_invalid_payload(self):
+        """Unparseable payloads are rejected."""
+        assert parser.parse("{not json") == (None, "Invalid data type for parse")
+
+    def test_reentrant(self):
+        """A shared parser keeps no state between calls."""
+        first, _ = parser.parse({"name": "foo"})
+        second, _ = parser.parse({"name": "bar"})
+        assert (first.name, second.name) == ("foo", "bar")
+
+    def test_argument_parse(self):
+        """A single Argument still parses on its own."""
+        argument = Argument("age", type=int)
+        assert argument.parse(True, "3") == 3
+        with pytest.raises(ParseError):
+            argument.parse(False, None)
+
+    def test_parse_many(self):
+        """Rows are parsed column-wise with a per row error map."""
+        rows, errors = parser.parse_many(
+            [{"name": " foo "}, {"name": "f", "age": "x"}, "{bad", {"name": "bar"}]
+        )
+        assert rows[0] == {"name": "foo", "age": None, "tags": [], "admin": None}
+        assert rows[1] is None and rows[2] is None
+        assert rows[3].name == "bar"
+        assert set(errors) == {1, 2}
+        assert set(errors[1]) == {"name", "age"}
+        assert errors[2] == {"__all__": "Invalid data type for parse"}
+
+    def test_parse_many_matches_parse(self):
+        """The messages of parse_many are the ones of parse."""
+        payloads = [{"name": "x"}, {"name": "ok", "admin": "maybe"}, {}]
+        rows, errors = parser.parse_many(payloads)
+        for index, payload in enumerate(payloads):
+            _, error = parser.parse(payload, all_errors=True)
+            assert errors[index] == error
+
+
+class TestValidateMany:
+    """Batch validator tests."""
+
+    def test_length(self):
+        """Length reports the index and message of each failure."""
+        assert Length(min=2, max=3).validate_many(["ab", "a", "abcd", None]) == {
+            1: "Field must be between 2 and 3 characters long.",
+            2: "Field must be between 2 and 3 characters long.",
+            3: "Field must be between 2 and 3 characters long.",
+        }
+
+    def test_number_range(self):
+        """The NumberRange validator fails None, NaN and out of range values."""
+        failed = NumberRange(min=0, max=10).validate_many([1, -1, 11, float("nan"), 5])
+        assert set(failed) == {1, 2, 3}
+
+    def test_regexp(self):
+        """Regexp matches with its compiled pattern."""
+        assert Regexp(r"^\d+$").validate_many(["12", "a", None]) == {
+            1: "Invalid input.",
+            2: "Invalid input.",
+        }
+
+    def test_any_of_unhashable(self):
+        """The AnyOf validator falls back to the sequence for unhashable values."""
+        validator = AnyOf(["a", "b"])
+        assert validator.validate_many(["a", "c", ["a"]]) == {
+            1: "Invalid value, must be one of: a, b.",
+            2: "Invalid value, must be one of: a, b.",
+        }
+
+    def test_generator_values(self):
+        """Values given as a generator still show in the message."""
+        validator = NoneOf(value for value in ("a", "b"))
+        assert validator.validate_many(["a", "c"]) == {
+            0: "Invalid value, can't be any of: a, b."
+        }
+        assert AnyOf(value for value in ("a", "b")).validate_many(["c"]) == {
+            0: "Invalid value, must be one of: a, b."
+        }
+
+    def test_matches_call(self):
+        """The validate_many result agrees with validating each value."""
+        values = ["", "a", "abc", "abcdef"]
+        for validator in (Length(max=3), Regexp("^a"), AnyOf(["a", "abc"])):
+            expected = {}
+            for index, value in enumerate(values):
+                try:
+                    validator(value)
+                except ParseError as err:
+                    expected[index] = err.message
+            assert validator.validate_many(values) == expected
+
+    @pytest.mark.parametrize(
+        "validator, kind, values",
+        [
+            (Length(min=2, max=3), str, ["ab", "a", "abcd"]),
+            (NumberRange(min=0, max=10), int, [1, -1, 11]),
+            (DataRequired(), str, ["a", " "]),
+            (Regexp(r"^\d+$"), str, ["12", "a"]),
+            (Email(), str, ["foo@example.com", "foo"]),
+            (IPAddress(), str, ["127.0.0.1", "::1", "foo"]),
+            (MacAddress(), str, ["00:1a:2b:3c:4d:5e", "00:1a"]),
+            (URL(), str, ["http://example.com/a", "http://foo", "foo"]),
+            (UUID(), str, ["12345678123456781234567812345678", "foo"]),
+            (AnyOf(["a", "b"]), str, ["a", "c"]),
+            (NoneOf(["a"]), str, ["a", "c"]),
+            (DateTime(), str, ["2026-01-02 03:04:05", "2026-01-02"]),
+            (ChoiceFiled(choice_list=["a"]), str, ["a", "c"]),
+        ],
+    )
+    def test_parse_many_matches_parse(self, validator, kind, values):
+        """Every validator fails the same rows with the same messages in both."""
+        single = JsonParser(Argument("value", type=kind, validators=[validator]))
+        payloads = [{"value": value} for value in values]
+        _, errors = single.parse_many(payloads)
+        for index, payload in enumerate(payloads):
+            _, error = single.parse(payload, all_errors=True)
+            assert errors.get(index) == error
+        assert errors
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Preload and fork tests."""
+import gc
+import os
+
+import pytest
+import sqlalchemy as sa
+from {{cookiecutter.app_name}}.database import db
+from {{cookiecutter.app_name}}.initialization.prefork import after_fork, before_fork
+
+
+@pytest.fixture
+def frozen(app):
+    before_fork(app)
+    yield
+    gc.unfreeze()
+
+
+@pytest.mark.usefixtures("frozen")
+class TestPrefork:
+    """before_fork / after_fork tests."""
+
+    @pytest.mark.settings(LAZY_INIT=True)
+    def test_before_fork(self, app):
+        """Lazy views are loaded and the heap is frozen."""
+        assert "view" in app.view_functions["api.user_login"].__dict__
+        assert gc.get_freeze_count() > 0
+
+    def test_after_fork_replaces_pools(self, app):
+        """A worker gets fresh pools."""
+        pool = db.engine.pool
+        after_fork(app)
+        assert db.engine.pool is not pool
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+    def test_forked_worker_queries(self, app, db):
+        """A forked worker opens its own connection and works."""
+        db.session.execute(sa.text("SELECT 1"))
+        db.session.remove()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                after_fork(app)
+                with app.app_context():
+                    code = (
+                        0
+                        if db.session.execute(sa.text("SELECT 1")).scalar() == 1
+                        else 1
+                    )
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Query instrumentation tests."""
+import json
+import logging
+
+import pytest
+import sqlalchemy as sa
+from {{cookiecutter.app_name}}.initialization.query_stats import (
+    SLOW_QUERY_LOGGER,
+    normalize_statement,
+    query_stats,
+)
+
+
+class TestNormalizeStatement:
+    """Statement normalization."""
+
+    @pytest.mark.parametrize(
+        "statement, expected",
+        [
+            ("SELECT *\n  FROM user WHERE id = 5", "SELECT * FROM user WHERE id = ?"),
+            (
+                "SELECT 1 FROM t WHERE name = 'o''neil'",
+                "SELECT ? FROM t WHERE name = ?",
+            ),
+            (
+                "SELECT a FROM t WHERE id IN (?, ?, ?)",
+                "SELECT a FROM t WHERE id IN (...)",
+            ),
+            ("UPDATE t SET a=%(a)s WHERE id = %s", "UPDATE t SET a=? WHERE id = ?"),
+            ("SELECT anon_1.id FROM t AS anon_1", "SELECT anon_1.id FROM t AS anon_1"),
+        ],
+    )
+    def test_normalize(self, statement, expected):
+        """Literals and parameters never reach the report."""
+        assert normalize_statement(statement) == expected
+
+
+class TestQueryStats:
+    """Per request statement timing."""
+
+    def test_request_headers(self, user, testapp):
+        """Requests report their SQL in the response headers."""
+        res = testapp.post_json(
+            "/api/user/login", {"username": user.username, "password": "myprecious"}
+        )
+        assert int(res.headers["X-DB-Query-Count"]) >= 1
+        assert res.headers["Server-Timing"].startswith("db;dur=")
+        assert query_stats.stats()["api.user_login"]["requests"] >= 1
+
+    def test_slowest(self, db):
+        """The slowest statements of the request are kept."""
+        for _ in range(3):
+            db.session.execute(sa.text("SELECT 1"))
+        queries = query_stats.current()
+        assert queries.count >= 3
+        assert all(sql for _, sql in queries.slowest())
+        assert len(queries.slowest()) <= query_stats.top_n
+
+    def test_slow_query_log(self, db):
+        """Statements over the threshold are logged as JSON, redacted."""
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        slow_logger = logging.getLogger(SLOW_QUERY_LOGGER)
+        slow_logger.addHandler(handler)
+        slow_seconds = query_stats.slow_seconds
+        query_stats.slow_seconds = 0
+        try:
+            db.session.execute(sa.text("SELECT 'secret'"))
+        finally:
+            query_stats.slow_seconds = slow_seconds
+            slow_logger.removeHandler(handler)
+        record = json.loads(records[-1].getMessage())
+        assert record["event"] == "slow_query"
+        assert record["statement"] == "SELECT ?"
+        assert "secret" not in records[-1].getMessage()
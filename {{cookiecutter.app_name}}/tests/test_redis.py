@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Redis extension tests, no server needed."""
+import redis
+from {{cookiecutter.app_name}}.extensions import redis_client
+
+
+class TestFlaskRedis:
+    """FlaskRedis tests."""
+
+    def test_init_app(self, app):
+        """app.redis is the shared client on a blocking pool."""
+        assert app.redis is redis_client
+        assert isinstance(redis_client.pool, redis.BlockingConnectionPool)
+        assert redis_client.connection_pool is redis_client.pool
+        assert redis_client.pool.max_connections == app.config["REDIS_MAX_CONNECTIONS"]
+
+    def test_reset(self, app):
+        """Resetting after a fork drops the inherited connections."""
+        redis_client.pool.make_connection()
+        assert redis_client.pool._connections
+        redis_client.reset()
+        assert redis_client.pool._connections == []
+
+    def test_empty_batches(self, app):
+        """Empty batches never reach the server."""
+        assert redis_client.get_many([]) == []
+        assert redis_client.set_many({}) is None
+        assert redis_client.delete_many([]) == 0
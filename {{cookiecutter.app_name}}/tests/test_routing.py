@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Read replica routing tests, SQLite files stand in for the servers."""
+import pytest
+import sqlalchemy as sa
+from {{cookiecutter.app_name}}.app import create_app, make_settings
+from {{cookiecutter.app_name}}.apps.models import User
+from {{cookiecutter.app_name}}.database import db
+from {{cookiecutter.app_name}}.extensions import model_cache
+
+from . import settings
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """App with a primary and one replica database."""
+    config = make_settings(
+        settings,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path}/primary.db",
+        SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{tmp_path}/replica.db"],
+    )
+    app = create_app(config)
+    with app.app_context():
+        for engine in [db.engine, *db.replicas]:
+            db.metadata.create_all(engine)
+        with db.engines[None].begin() as connection:
+            connection.execute(sa.insert(User).values(username="primary"))
+        yield app
+        db.session.remove()
+
+
+def usernames():
+    stmt = sa.select(User.username).order_by(User.id)
+    return db.session.execute(stmt).scalars().all()
+
+
+@pytest.mark.usefixtures("replica_app")
+class TestRouting:
+    """RoutingSession tests."""
+
+    def test_reads_use_replica(self):
+        """Plain SELECTs go to the replica."""
+        assert usernames() == []
+
+    def test_use_primary(self):
+        """use_primary sends reads to the primary."""
+        with db.use_primary():
+            assert usernames() == ["primary"]
+        assert usernames() == []
+
+    def test_read_your_writes(self):
+        """After a write the session keeps reading from the primary."""
+        User.create(username="foo")
+        assert usernames() == ["primary", "foo"]
+
+    def test_locking_reads_use_primary(self):
+        """SELECT ... FOR UPDATE is never sent to a replica."""
+        stmt = sa.select(User.username).with_for_update()
+        assert db.session.execute(stmt).scalars().all() == ["primary"]
+
+    def test_text_is_a_write(self):
+        """Raw SQL may write, the session sticks to the primary after it."""
+        db.session.execute(sa.text("UPDATE user SET active = active WHERE 1 = 0"))
+        assert usernames() == ["primary"]
+
+    def test_cache_fill_reads_primary(self, replica_app):
+        """Model cache misses are loaded from the primary."""
+        replica_app.config["MODEL_CACHE_ENABLED"] = True
+        model_cache.local.clear()
+        try:
+            assert User.get_by_id(1).username == "primary"
+            assert User.get(username="primary") is not None
+        finally:
+            replica_app.config["MODEL_CACHE_ENABLED"] = False
+        assert usernames() == []
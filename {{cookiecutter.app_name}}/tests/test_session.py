@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Session lifecycle tests."""
+import sqlite3
+
+import sqlalchemy as sa
+from {{cookiecutter.app_name}}.database import db
+from {{cookiecutter.app_name}}.initialization import session
+from {{cookiecutter.app_name}}.initialization.session import session_lifecycle
+
+
+class TestSessionLifecycle:
+    """SessionLifecycle tests."""
+
+    def test_teardown_removes_session(self, app):
+        """The session is removed when the app context ends."""
+        with app.app_context():
+            db.session().info["marker"] = True
+        with app.app_context():
+            assert "marker" not in db.session().info
+
+    def test_checkout_stats(self, db):
+        """Checkouts and new connections are counted and the pool is reported."""
+        db.engine.dispose()
+        before = session_lifecycle.stats()[None]["checkouts"]
+        db.session.execute(sa.text("SELECT 1"))
+        db.session.remove()
+        stats = session_lifecycle.stats()[None]
+        assert stats["checkouts"] == before + 1
+        assert stats["connects"] >= 1
+        assert stats["connect_seconds"] > 0
+        assert "checkedout" in stats
+
+    def test_idle_ping(self, db):
+        """Connections idle past the threshold are pinged on checkout."""
+        ping_idle = session_lifecycle.ping_idle
+        session_lifecycle.ping_idle = 0
+        try:
+            for _ in range(2):
+                db.session.execute(sa.text("SELECT 1"))
+                db.session.remove()
+        finally:
+            session_lifecycle.ping_idle = ping_idle
+        stats = session_lifecycle.stats()[None]
+        assert stats["pings"] >= 1
+        assert stats["ping_failures"] == 0
+
+    def test_failed_ping_reconnects(self, db, monkeypatch):
+        """A DBAPI error on the ping replaces the connection."""
+        db.session.execute(sa.text("SELECT 1"))
+        db.session.remove()
+        failures = session_lifecycle.stats()[None]["ping_failures"]
+        execute = session._execute
+
+        def fail_once(dbapi_connection, statement):
+            monkeypatch.setattr(session, "_execute", execute)
+            raise sqlite3.OperationalError("gone")
+
+        monkeypatch.setattr(session, "_execute", fail_once)
+        monkeypatch.setattr(session_lifecycle, "ping_idle", 0)
+        assert db.session.execute(sa.text("SELECT 1")).scalar() == 1
+        db.session.remove()
+        assert session_lifecycle.stats()[None]["ping_failures"] == failures + 1
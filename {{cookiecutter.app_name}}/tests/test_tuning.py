@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Gunicorn tuning tests."""
+import types
+
+import pytest
+from {{cookiecutter.app_name}}.utils import tuning
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+class TestCgroup:
+    """CPU quota of the cgroup."""
+
+    def test_v2_quota(self, tmp_path):
+        """``cpu.max`` of cgroup v2."""
+        write(tmp_path / "cpu.max", "150000 100000\n")
+        assert tuning.cgroup_cpu_limit(str(tmp_path)) == 1.5
+
+    def test_v2_unlimited(self, tmp_path):
+        """``max`` is no quota."""
+        write(tmp_path / "cpu.max", "max 100000\n")
+        assert tuning.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_v1_quota(self, tmp_path):
+        """``cpu.cfs_quota_us`` of cgroup v1, -1 is no quota."""
+        write(tmp_path / "cpu" / "cpu.cfs_quota_us", "200000")
+        write(tmp_path / "cpu" / "cpu.cfs_period_us", "100000")
+        assert tuning.cgroup_cpu_limit(str(tmp_path)) == 2
+        write(tmp_path / "cpu" / "cpu.cfs_quota_us", "-1")
+        assert tuning.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_cpu_count_rounds_quota_up(self, tmp_path):
+        """Half a cpu is still one worker."""
+        write(tmp_path / "cpu.max", "50000 100000")
+        assert tuning.cpu_count(str(tmp_path)) == 1
+        assert tuning.cpu_count(str(tmp_path / "missing")) >= 1
+
+
+class TestResolve:
+    """Profiles and overrides."""
+
+    @pytest.mark.parametrize(
+        "profile, worker_class, workers, threads",
+        [("io", "gevent", 4, 1), ("cpu", "sync", 5, 1), ("mixed", "gthread", 4, 4)],
+    )
+    def test_profiles(self, profile, worker_class, workers, threads):
+        """Each profile is sized from the cpus."""
+        settings = tuning.resolve({"GUNICORN_PROFILE": profile}, cpus=4)
+        assert settings["worker_class"] == worker_class
+        assert settings["workers"] == workers
+        assert settings["threads"] == threads
+        assert settings["max_requests_jitter"] == settings["max_requests"] // 10
+
+    def test_default_profile(self):
+        """The io profile is used unless told otherwise."""
+        assert tuning.resolve({}, cpus=2)["profile"] == "io"
+
+    def test_overrides(self):
+        """The environment wins over the profile."""
+        settings = tuning.resolve(
+            {
+                "GUNICORN_PROFILE": "cpu",
+                "GUNICORN_WORKERS": "3",
+                "GUNICORN_MAX_REQUESTS": "0",
+            },
+            cpus=8,
+        )
+        assert settings["workers"] == 3
+        assert settings["max_requests"] == 0
+        assert settings["max_requests_jitter"] == 0
+
+    def test_invalid(self):
+        """Unknown profiles and numbers are refused."""
+        with pytest.raises(ValueError, match="GUNICORN_PROFILE"):
+            tuning.resolve({"GUNICORN_PROFILE": "fast"}, cpus=1)
+        with pytest.raises(ValueError, match="GUNICORN_WORKERS"):
+            tuning.resolve({"GUNICORN_WORKERS": "many"}, cpus=1)
+
+
+def test_report():
+    """The startup line lists the effective settings."""
+    cfg = types.SimpleNamespace(workers=3, worker_class="sync", max_requests=1000)
+    line = tuning.report(cfg, "cpu", 2)
+    assert line.startswith("profile=cpu cpus=2 ")
+    assert "workers=3" in line and "max_requests=1000" in line
@@ -3,8 +3,10 @@
 
 import logging
 import os
+from types import SimpleNamespace
 
 from flask import Flask
+from werkzeug.utils import import_string
 from {{cookiecutter.app_name}}.initialization import FlaskAppInitializer
 
 logger = logging.getLogger(__name__)
@@ -18,6 +20,7 @@ def create_app(config_object=None) -> Flask:
 
             config_object = os.getenv("FLASK_SETTING", "{{cookiecutter.app_name}}.settings")
         app.config.from_object(config_object)
+        app.configure_json_provider()
 
         app_initializer = app.config.get("APP_INITIALIZER", FlaskAppInitializer)(app)
         app_initializer.init_app()
@@ -29,10 +32,29 @@ def create_app(config_object=None) -> Flask:
         raise ex
 
 
+def make_settings(module="{{cookiecutter.app_name}}.settings", **overrides):
+    """The settings of ``module`` with ``overrides``, for a ``create_app`` call."""
+    if isinstance(module, str):
+        module = import_string(module)
+    config = {key: getattr(module, key) for key in dir(module) if key.isupper()}
+    config.update(overrides)
+    return SimpleNamespace(**config)
+
+
 class FlaskApp(Flask):
     from {{cookiecutter.app_name}}.utils.http import JsonEncoder
     json_provider_class = JsonEncoder
 
+    def configure_json_provider(self) -> None:
+        """Swap the JSON provider for the one named by ``JSON_PROVIDER_CLASS``."""
+        provider_class = self.config.get("JSON_PROVIDER_CLASS")
+        if not provider_class:
+            return
+        if isinstance(provider_class, str):
+            provider_class = import_string(provider_class)
+        self.json_provider_class = provider_class
+        self.json = provider_class(self)
+
 
 # celery  -A alarm.tasks.celery_app:app worker -Ofair -l INFO
 # celery  -A alarm.tasks.celery_app:app beat -l INFO --pidfile /tmp/alarm-celery-beat.pid -s /tmp/celery-beat-schedule
@@ -1,18 +1,35 @@
+import threading
+import time
 from functools import wraps
 
 from flask_jwt_extended import get_jwt, verify_jwt_in_request
 from {{cookiecutter.app_name}}.initialization.exception import CODE
 from {{cookiecutter.app_name}}.utils.http import json_response
 
+# decode + verify (signature, expiry, blocklist) time of ``auth`` protected calls
+verify_stats = {"calls": 0, "seconds": 0.0, "denied": 0}
+_verify_lock = threading.Lock()
+
 
 def auth(roles: list):
+    # a claim named after any of the roles grants access
+    roles = frozenset(roles)
+
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            if any([True for role in roles if role in claims.keys()]):
+            start = time.perf_counter()
+            try:
+                verify_jwt_in_request()
+            finally:
+                elapsed = time.perf_counter() - start
+                with _verify_lock:
+                    verify_stats["calls"] += 1
+                    verify_stats["seconds"] += elapsed
+            if not roles.isdisjoint(get_jwt()):
                 return fn(*args, **kwargs)
+            with _verify_lock:
+                verify_stats["denied"] += 1
             return (
                 json_response(
                     data="",
@@ -8,7 +8,7 @@ from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column
 
 from {{cookiecutter.app_name}}.database import Column, PkModel, db, relationship
-from {{cookiecutter.app_name}}.extensions import bcrypt
+from {{cookiecutter.app_name}}.extensions import password_hasher
 
 third_role_users = db.Table(
     "third_role_users",
@@ -21,6 +21,8 @@ class Role(PkModel):
     """A role for a user."""
 
     __tablename__ = "role"
+    __cache_keys__ = ("name",)
+    __load_profiles__ = {"with_users": ("users",)}
     name = Column(
         sa.String(
             64,
@@ -49,6 +51,10 @@ class User(PkModel):
     """A user of the app."""
 
     __tablename__ = "user"
+    __cache_keys__ = ("username",)
+    # the password hash stays out of the shared cache
+    __cache_exclude__ = ("_password",)
+    __load_profiles__ = {"with_roles": ("roles",)}
     username: Mapped[str] = mapped_column(sa.String(80), unique=True, nullable=False)
     email: Mapped[str] = mapped_column(sa.String(80), nullable=True)
     # _password = Column("password", db.LargeBinary(128), nullable=True)
@@ -70,14 +76,19 @@ class User(PkModel):
 
     @password.setter  # type: ignore
     def password(self, value):
-        """Set password."""
-        self._password = bcrypt.generate_password_hash(
-            value, rounds=len(value)
-        ).decode()
+        """Set password, hashed with the configured ``BCRYPT_LOG_ROUNDS``."""
+        self._password = password_hasher.hash(value)
 
     def check_password(self, value):
-        """Check password."""
-        return bcrypt.check_password_hash(self._password, value)
+        """Check password, rehash it when it was stored with another cost.
+
+        A rehash only changes the instance, the caller commits it.
+        """
+        if not password_hasher.check(self._password, value):
+            return False
+        if password_hasher.needs_rehash(self._password):
+            self.password = value
+        return True
 
     @property
     def full_name(self):
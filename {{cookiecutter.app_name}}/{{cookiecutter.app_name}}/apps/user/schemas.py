@@ -22,6 +22,9 @@ class RoleSchema(SQLAlchemyAutoSchema):
 
 
 class UserSchema(SQLAlchemyAutoSchema):
+    # load profile paginated queries use, dumping ``roles`` needs them loaded
+    __load_profile__ = "with_roles"
+
     roles = fields.Nested(RoleSchema, many=True, read_only=True)
     created_at = DateTime(format="%Y-%m-%d %H:%M:%S")
     updated_at = DateTime(format="%Y-%m-%d %H:%M:%S")
@@ -32,3 +35,8 @@ class UserSchema(SQLAlchemyAutoSchema):
         load_instance = True
         include_fk = True
         exclude = ["_password", "created_at", "id", "updated_at"]
+
+
+# schemas are stateless once built, share one instance per process
+role_schema = RoleSchema()
+user_schema = UserSchema()
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """User views."""
 
-from flask import request, current_app
+from flask import request
 from flask.views import MethodView
 from flask_jwt_extended import (
     create_access_token,
@@ -11,45 +11,62 @@ from flask_jwt_extended import (
     get_jwt_identity,
     jwt_required,
 )
-from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import selectinload
 from {{cookiecutter.app_name}}.apps import models
 from {{cookiecutter.app_name}}.apps.user import schemas
-from {{cookiecutter.app_name}}.extensions import db
+from {{cookiecutter.app_name}}.extensions import db, token_blocklist
 from {{cookiecutter.app_name}}.initialization.exception import CODE
 from {{cookiecutter.app_name}}.utils.http import json_response
 from {{cookiecutter.app_name}}.utils.wtf.parser import Argument, JsonParser
 
 
+# parsers are compiled once at import and shared by every request
+register_parser = JsonParser(
+    Argument(
+        "username",
+        required=True,
+        type=str,
+        handler=str.strip,
+    ),
+    Argument(
+        "password",
+        required=True,
+        type=str,
+        handler=str.strip,
+    ),
+    Argument(
+        "confirm",
+        required=True,
+        type=str,
+        handler=str.strip,
+    ),
+    Argument(
+        "email",
+        required=True,
+        type=str,
+        handler=str.strip,
+    ),
+)
+
+login_parser = JsonParser(
+    Argument(
+        "username",
+        required=True,
+        type=str,
+        handler=str.strip,
+    ),
+    Argument(
+        "password",
+        required=True,
+        type=str,
+        handler=str.strip,
+    ),
+)
+
+
 class RegisterView(MethodView):
     def post(self):
-        form, error = JsonParser(
-            Argument(
-                "username",
-                required=True,
-                type=str,
-                handler=str.strip,
-            ),
-            Argument(
-                "password",
-                required=True,
-                type=str,
-                handler=str.strip,
-            ),
-            Argument(
-                "confirm",
-                required=True,
-                type=str,
-                handler=str.strip,
-            ),
-            Argument(
-                "email",
-                required=True,
-                type=str,
-                handler=str.strip,
-            ),
-        ).parse(request.json)
+        form, error = register_parser.parse(request.json)
 
         if error:
             return json_response(error=error, code=CODE.REQUEST_INCORRECT_DATA.code)
@@ -70,47 +87,25 @@ class RegisterView(MethodView):
                 code=CODE.DUPLICATE_USERNAME.code,
                 error=CODE.DUPLICATE_USERNAME.message,
             )
-        ma = schemas.UserSchema()
-        ma_data = ma.dump(user, many=False)
+        ma_data = schemas.user_schema.dump(user)
 
         return json_response(data=ma_data)
 
 
 class LoginView(MethodView):
-    # @login_required
+    @jwt_required()
     def get(self):
-        ma = schemas.UserSchema()
         current_user = get_current_user()
-        ma_data = ma.dump(current_user, many=False)
+        ma_data = schemas.user_schema.dump(current_user)
         return json_response(data=ma_data)
 
     def post(self):
-        form, error = JsonParser(
-            Argument(
-                "username",
-                required=True,
-                type=str,
-                handler=str.strip,
-            ),
-            Argument(
-                "password",
-                required=True,
-                type=str,
-                handler=str.strip,
-            ),
-        ).parse(request.json)
+        form, error = login_parser.parse(request.json)
 
         if error:
             return json_response(error=error, code=CODE.REQUEST_INCORRECT_DATA.code)
 
-        stmt = (
-            select(models.User)
-            .where(models.User.username == form.username)
-            .options(selectinload(models.User.roles))
-        )
-        result = db.session.execute(stmt)
-
-        user = result.scalar_one_or_none()
+        user = models.User.get(username=form.username, load_profile="with_roles")
 
         if not user:
             return json_response(
@@ -122,6 +117,9 @@ class LoginView(MethodView):
                 error="username or password invalid.",
                 code=CODE.INVALID_USERNAME_PASSWORD.code,
             )
+        if db.session.is_modified(user):
+            # check_password upgraded the hash to the configured cost
+            db.session.commit()
         role = [i.name for i in user.roles]
         claims = {}
         if "admin" in role:
@@ -129,8 +127,7 @@ class LoginView(MethodView):
         elif "develop" in role:
             claims.setdefault("develop", True)
 
-        ma = schemas.UserSchema()
-        ma_data = ma.dump(user, many=False)
+        ma_data = schemas.user_schema.dump(user)
         access_token = create_access_token(
             identity=form.username, additional_claims=claims
         )
@@ -146,10 +143,8 @@ class LogoutView(MethodView):
     @jwt_required()
     def post(self):
         # 当前令牌登入黑名单
-        rds = current_app.redis
-        ACCESS_EXPIRES = current_app.config["ACCESS_EXPIRES"]
-        jti = get_jwt()["jti"]
-        rds.set(jti, "", ex=ACCESS_EXPIRES)
+        claims = get_jwt()
+        token_blocklist.revoke(claims["jti"], claims["exp"])
         return json_response({})
 
 
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Asyncio variant of the database layer.
+
+The models are shared with :mod:`database`; ``Model.aio`` / ``obj.aio`` gives
+the CRUD helpers over an ``AsyncSession``, e.g. ``await User.aio.get(id=1)``
+or ``await user.aio.save()``. Needs an async driver (aiomysql, aiosqlite,
+asyncpg) for ``SQLALCHEMY_ASYNC_DATABASE_URI``.
+"""
+import asyncio
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_scoped_session,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.pool import NullPool
+
+# sync driver -> async driver of the same database
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url):
+    """The async driver URL of a sync SQLAlchemy URL, unchanged if unknown."""
+    url = sa.engine.make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername)
+
+
+class AsyncDatabase(object):
+    """Async engine and task scoped ``AsyncSession`` of each app.
+
+    ``SQLALCHEMY_ASYNC_DATABASE_URI`` defaults to ``SQLALCHEMY_DATABASE_URI``
+    with its async driver. The engine is created on first use, so apps that
+    never go async do not need the driver installed.
+
+    Flask runs every async view in its own event loop and async connections
+    belong to the loop that opened them, so ``SQLALCHEMY_ASYNC_ENGINE_OPTIONS``
+    defaults to a ``NullPool``. Under a server owning one long-lived loop a
+    regular pool can be configured there.
+    """
+
+    def __init__(self):
+        self._states = WeakKeyDictionary()
+
+    def init_app(self, app):
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI")
+        if uri is not None:
+            app.config.setdefault("SQLALCHEMY_ASYNC_DATABASE_URI", async_url(uri))
+        app.config.setdefault(
+            "SQLALCHEMY_ASYNC_ENGINE_OPTIONS", {"poolclass": NullPool}
+        )
+        self._states[app] = {}
+        app.extensions["async_db"] = self
+
+    def _state(self) -> dict:
+        return self._states[current_app._get_current_object()]
+
+    @property
+    def engine(self):
+        state = self._state()
+        if "engine" not in state:
+            config = current_app.config
+            state["engine"] = create_async_engine(
+                config["SQLALCHEMY_ASYNC_DATABASE_URI"],
+                **config["SQLALCHEMY_ASYNC_ENGINE_OPTIONS"],
+            )
+        return state["engine"]
+
+    @property
+    def session(self) -> async_scoped_session:
+        """``AsyncSession`` of the running asyncio task."""
+        state = self._state()
+        if "session" not in state:
+            factory = async_sessionmaker(
+                self.engine, class_=AsyncSession, expire_on_commit=False
+            )
+            state["session"] = async_scoped_session(
+                factory, scopefunc=asyncio.current_task
+            )
+        return state["session"]
+
+    async def remove(self) -> None:
+        """Close the session of the running task, see ``AsyncMethodView``."""
+        state = self._state()
+        if "session" in state:
+            await state["session"].remove()
+
+
+class AsyncCRUD(object):
+    """Async counterpart of ``CRUDMixin``, bound to a model or one of its rows.
+
+    Reached through ``Model.aio`` and ``obj.aio``; the class level methods
+    work on ``model``, the instance ones on ``instance``. The request scoped
+    lookup cache and the second-level cache are sync only, writes still mark
+    the second-level cache dirty through the session events.
+    """
+
+    __slots__ = ("model", "instance")
+
+    def __init__(self, model, instance=None):
+        self.model = model
+        self.instance = instance
+
+    @property
+    def session(self) -> async_scoped_session:
+        return current_app.extensions["async_db"].session
+
+    def _select(self, kwargs: dict):
+        model = self.model
+        return sa.select(model).where(
+            *[getattr(model, k) == v for k, v in kwargs.items()]
+        )
+
+    async def get(self, **kwargs):
+        result = await self.session.execute(self._select(kwargs))
+        return result.scalar_one_or_none()
+
+    async def get_by_id(self, record_id):
+        try:
+            record_id = int(record_id)
+        except (TypeError, ValueError):
+            return None
+        return await self.session.get(self.model, record_id)
+
+    async def create(self, commit: bool = True, **kwargs):
+        """Create a new record and save it the database."""
+        return await AsyncCRUD(self.model, self.model(**kwargs)).save(commit)
+
+    async def save(self, commit: bool = True):
+        """Save the record."""
+        self.session.add(self.instance)
+        if commit:
+            await self.session.commit()
+        return self.instance
+
+    async def update(self, commit: bool = True, **kwargs):
+        """Update specific fields of a record."""
+        for attr, value in kwargs.items():
+            setattr(self.instance, attr, value)
+        return await self.save(commit)
+
+    async def delete(self, commit: bool = True) -> None:
+        """Remove the record from the database."""
+        await self.session.delete(self.instance)
+        if commit:
+            await self.session.commit()
+
+    async def get_or_create(
+        self, defaults: Optional[dict] = None, commit: bool = True, **kwargs
+    ):
+        """Return ``(obj, created)``, see ``ExtendMixin.get_or_create``."""
+        obj = await self.get(**kwargs)
+        if obj is not None:
+            return obj, False
+        params = dict(kwargs, **(defaults or {}))
+        return await self._create_object_from_params(kwargs, params, commit)
+
+    async def update_or_create(
+        self, defaults: Optional[dict] = None, commit: bool = False, **kwargs
+    ):
+        """Return ``(obj, created)``, see ``ExtendMixin.update_or_create``."""
+        defaults = defaults or {}
+        session = self.session
+        obj = await self.get(**kwargs)
+        created = False
+        if obj is None:
+            params = dict(kwargs, **defaults)
+            obj, created = await self._create_object_from_params(
+                kwargs, params, commit=False
+            )
+        if not created:
+            for k, v in defaults.items():
+                setattr(obj, k, v)
+            await session.flush()
+        if commit:
+            await session.commit()
+        return obj, created
+
+    async def _create_object_from_params(
+        self, lookup: dict, params: dict, commit: bool = True
+    ):
+        """Insert in a SAVEPOINT, a lost race reads the winning row."""
+        session = self.session
+        obj = self.model(**params)
+        try:
+            async with session.begin_nested():
+                session.add(obj)
+                await session.flush()
+        except IntegrityError:
+            obj = await self.get(**lookup)
+            if obj is None:
+                raise NoResultFound()
+            return obj, False
+        if commit:
+            await session.commit()
+        return obj, True
+
+
+class _AsyncAccessor(object):
+    def __get__(self, instance, owner):
+        return AsyncCRUD(owner, instance)
+
+
+class AsyncCRUDMixin(object):
+    """Adds ``aio``, the :class:`AsyncCRUD` of the model or row."""
+
+    aio = _AsyncAccessor()
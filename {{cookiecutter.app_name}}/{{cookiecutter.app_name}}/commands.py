@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Click commands."""
 import os
+import sys
 from glob import glob
 from subprocess import call
 
@@ -73,3 +74,25 @@ def lint(fix_imports, check):
         execute_tool("Fixing import order", "isort", *isort_args)
     execute_tool("Formatting style", "black", *black_args)
     execute_tool("Checking code style", "flake8")
+
+
+@click.command()
+@click.option("--threshold", default=0.25, help="Allowed slowdown, 0.25 is 25%")
+@click.option("--p99-threshold", default=1.0, help="Allowed slowdown of the p99")
+@click.option(
+    "--save", default=False, is_flag=True, help="Store the results as the baseline"
+)
+@click.option("--only", type=click.Choice(["micro", "load"]), default=None)
+@click.option("--requests", default=200, help="Requests per route of the load run")
+@click.option("--concurrency", default=1, help="Client threads of the load run")
+def bench(threshold, p99_threshold, save, only, requests, concurrency):
+    """Run the benchmarks, fail on a regression from the baseline."""
+    # a fresh interpreter on SQLite, whatever app the CLI loaded
+    args = [sys.executable, "-m", "benchmarks.suite", f"--threshold={threshold}"]
+    args.append(f"--p99-threshold={p99_threshold}")
+    args += [f"--requests={requests}", f"--concurrency={concurrency}"]
+    if save:
+        args.append("--save")
+    if only:
+        args.append(f"--only={only}")
+    exit(call(args, cwd=PROJECT_ROOT))
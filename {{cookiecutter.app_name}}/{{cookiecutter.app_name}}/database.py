@@ -1,16 +1,19 @@
 # -*- coding: utf-8 -*-
 """Database module, including the SQLAlchemy database object and DB-related utilities."""
-from typing import Optional, Type, TypeVar, Any
+from itertools import islice
+from typing import Any, Iterable, Optional, Type, TypeVar
 
 import sqlalchemy as sa
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, mapped_column
-from sqlalchemy.orm.properties import MappedColumn
+from sqlalchemy.orm import Session, mapped_column, object_session, scoped_session
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.orm.properties import MappedColumn
 
-from {{cookiecutter.app_name}}.extensions import db
+from {{cookiecutter.app_name}}.extensions import db, model_cache
 
+from .async_database import AsyncCRUDMixin
 from .compat import basestring
+from .utils.serializer import ModelSerializer
 
 T = TypeVar("T", bound="PkModel")
 TModel = TypeVar("TModel", bound="Model")
@@ -20,7 +23,234 @@ Column = db.Column
 relationship = db.relationship
 
 
+class LookupCache(object):
+    """Per-session cache of ``get`` lookups, keyed by model and filter kwargs.
+
+    It lives in ``Session.info``, so it shares the lifetime of the request
+    scoped session and is dropped by ``db.session.remove()``. It is emptied on
+    commit and rollback, which expire its instances. Only found rows are
+    cached; an entry is ignored once its instance left the session or was
+    deleted.
+    """
+
+    info_key = "lookup_cache"
+
+    def __init__(self) -> None:
+        self.entries: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_session(cls, session) -> "LookupCache":
+        if isinstance(session, scoped_session):
+            session = session()
+        cache = session.info.get(cls.info_key)
+        if cache is None:
+            cache = session.info[cls.info_key] = cls()
+        return cache
+
+    @staticmethod
+    def make_key(model, kwargs: dict):
+        """Return a hashable key for the lookup, or None when values are unhashable."""
+        key = (model, frozenset(kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key, session):
+        obj = self.entries.get(key)
+        if obj is not None:
+            state = sa.inspect(obj)
+            if object_session(obj) is session and not (
+                state.deleted or state.was_deleted
+            ):
+                self.hits += 1
+                return obj
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, obj) -> None:
+        if obj is not None:
+            self.entries[key] = obj
+
+    def clear(self) -> None:
+        self.entries = {}
+
+    def invalidate(self, model) -> None:
+        """Drop the entries of ``model`` and of the models it inherits from or to."""
+        self.entries = {
+            key: obj
+            for key, obj in self.entries.items()
+            if not (issubclass(key[0], model) or issubclass(model, key[0]))
+        }
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+def lookup_cache_stats(session: Optional[Session] = None) -> dict:
+    """Hit/miss counts of the lookup cache of the current session."""
+    return LookupCache.for_session(session or db.session).stats()
+
+
+def _chunked(iterable: Iterable, size: int):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    if size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _group_by_keys(rows):
+    """Group row dicts by their key set so every group renders one multi-row VALUES."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return groups.values()
+
+
+def _dialect_insert(session, table):
+    """Return the dialect specific ``insert`` construct supporting upserts.
+
+    ``table`` is a ``Table`` or a mapped class, for an ORM enabled insert.
+    """
+    name = session.get_bind().dialect.name
+    if name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"upsert is not supported for dialect {name!r}")
+    return name, insert(table)
+
+
+def _count_existing(session, table, conflict_cols: list, keys: set) -> int:
+    """Number of rows of ``table`` whose ``conflict_cols`` are one of ``keys``."""
+    key_cols = [table.c[name] for name in conflict_cols]
+    if len(key_cols) == 1:
+        cond = key_cols[0].in_([key[0] for key in keys])
+    else:
+        cond = sa.tuple_(*key_cols).in_(list(keys))
+    return session.execute(
+        sa.select(sa.func.count()).select_from(table).where(cond)
+    ).scalar_one()
+
+
+def _dedupe(rows: list, conflict_cols: list) -> list:
+    """Keep the last of the rows sharing a conflict key.
+
+    PostgreSQL refuses an ``ON CONFLICT DO UPDATE`` affecting a row twice.
+    """
+    by_key = {tuple(row[name] for name in conflict_cols): row for row in rows}
+    return list(by_key.values())
+
+
+def _upsert_statement(session, table, group: list, conflict_cols: list, update_cols):
+    """Multi-row upsert of ``group``, rows sharing one key set, see ``bulk_upsert``."""
+    if update_cols is None:
+        update_cols = [name for name in group[0] if name not in conflict_cols]
+    else:
+        missing = [name for name in update_cols if name not in group[0]]
+        if missing:
+            raise ValueError(f"rows are missing the update columns {missing}")
+    dialect, stmt = _dialect_insert(session, table)
+    stmt = stmt.values(group)
+    new = stmt.inserted if dialect == "mysql" else stmt.excluded
+    values = {name: new[name] for name in update_cols}
+    if values and "updated_at" in table.c and "updated_at" not in values:
+        values["updated_at"] = sa.func.now()
+    if dialect == "mysql":
+        # ON DUPLICATE KEY needs an assignment, a no-op one keeps the row
+        return stmt.on_duplicate_key_update(
+            values or {conflict_cols[0]: table.c[conflict_cols[0]]}
+        )
+    key_cols = [table.c[name] for name in conflict_cols]
+    if values:
+        return stmt.on_conflict_do_update(index_elements=key_cols, set_=values)
+    return stmt.on_conflict_do_nothing(index_elements=key_cols)
+
+
 class ExtendMixin(object):
+    # named eager loading of relationships, ``{name: (relationship key or
+    # loader option, ...)}``; keys are loaded with ``selectinload``
+    __load_profiles__: dict = {}
+
+    @classmethod
+    def load_profile(cls, name: str) -> tuple:
+        """Loader options of the profile ``name``.
+
+        E.g. ``User.load_profile("with_roles")``.
+        """
+        profiles = cls.__dict__.get("_load_profile_options")
+        if profiles is None:
+            profiles = {}
+            cls._load_profile_options = profiles
+        options = profiles.get(name)
+        if options is None:
+            try:
+                spec = cls.__load_profiles__[name]
+            except KeyError:
+                raise ValueError(
+                    f"{cls.__name__} has no load profile {name!r}"
+                ) from None
+            options = tuple(
+                (
+                    sa.orm.selectinload(getattr(cls, item))
+                    if isinstance(item, str)
+                    else item
+                )
+                for item in spec
+            )
+            profiles[name] = options
+        return options
+
+    @classmethod
+    def _lookup(cls, session, kwargs: dict, profile: Optional[str] = None):
+        """Select one row matching ``kwargs``, through the session lookup cache.
+
+        With a load ``profile`` the row is always selected, with its eager loads.
+        """
+        if isinstance(session, scoped_session):
+            session = session()
+        cache = LookupCache.for_session(session)
+        key = cache.make_key(cls, kwargs)
+        if key is not None and profile is None:
+            obj = cache.get(key, session)
+            if obj is not None:
+                return obj
+        stmt = sa.select(cls).where(*[getattr(cls, k) == v for k, v in kwargs.items()])
+        cache_keys = getattr(cls, "__cache_keys__", None) or ()
+        if profile is not None:
+            stmt = stmt.options(*cls.load_profile(profile))
+            obj = session.execute(stmt).scalar_one_or_none()
+        elif len(kwargs) == 1 and next(iter(kwargs)) in cache_keys:
+            ((field, value),) = kwargs.items()
+            obj = model_cache.get(
+                cls,
+                session,
+                field,
+                value,
+                lambda: session.execute(stmt).scalar_one_or_none(),
+            )
+        else:
+            obj = session.execute(stmt).scalar_one_or_none()
+        if key is not None:
+            cache.set(key, obj)
+        return obj
+
+    @classmethod
+    def _invalidate_lookups(cls, session=None) -> None:
+        LookupCache.for_session(session or db.session).invalidate(cls)
+
     @staticmethod
     def _extract_model_params(defaults, **kwargs):
         defaults = defaults or {}
@@ -30,86 +260,161 @@ class ExtendMixin(object):
         return ret
 
     @classmethod
-    def _create_object_from_params(cls, session, lookup, params, lock=False):
-        session = session or db.session
+    def _insert_or_get(cls, session, lookup: dict, params: dict):
+        """Insert the row built from ``params`` unless it exists, ``(obj, created)``.
+
+        SQLite and PostgreSQL send one ``INSERT ... ON CONFLICT DO NOTHING
+        RETURNING``, other dialects (MySQL) and ``params`` setting more than
+        columns (relationships, hybrid setters) flush the new instance. Both
+        run in a SAVEPOINT, so a failed insert rolls back alone and the
+        caller's transaction survives; when a concurrent writer won, its row
+        is read.
+        """
         obj = cls(**params)
-        session.add(obj)
+        dialect = session.get_bind(mapper=cls).dialect
+        columns = sa.inspect(cls).column_attrs
+        returns = dialect.insert_returning and dialect.name in ("sqlite", "postgresql")
+        returning = returns and all(key in columns for key in params)
         try:
-            session.commit()
-            session.flush()
+            with session.begin_nested():
+                if returning:
+                    created = cls._insert_returning(session, obj)
+                else:
+                    session.add(obj)
+                    session.flush()
+                    created = obj
         except IntegrityError:
-            session.rollback()
-            query = session.query(cls).filter_by(**lookup)
-            if lock:
-                query = query.with_for_update()
-            try:
-                obj = query.one()
-            except NoResultFound:
-                raise
-            else:
-                return obj, False
-        else:
-            return obj, True
+            created = None
+        cls._invalidate_lookups(session)
+        if created is not None:
+            return created, True
+        obj = session.execute(sa.select(cls).filter_by(**lookup)).scalar_one_or_none()
+        if obj is None:
+            # the conflict was on another unique key than the lookup
+            raise NoResultFound()
+        return obj, False
+
+    @classmethod
+    def _insert_returning(cls, session, obj):
+        """``INSERT ... ON CONFLICT DO NOTHING RETURNING`` of ``obj``'s columns."""
+        state = sa.inspect(obj)
+        values = {
+            key: state.dict[key]
+            for key in state.mapper.column_attrs.keys()
+            if key in state.dict
+        }
+        _, stmt = _dialect_insert(session, cls)
+        stmt = stmt.values(**values).on_conflict_do_nothing().returning(cls)
+        created = session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one_or_none()
+        model_cache.mark_dirty(session, cls.__table__)
+        return created
 
     @classmethod
     def get(
         cls,
         session: Optional[Session] = None,
+        load_profile: Optional[str] = None,
         **kwargs,
     ):
         session = session or db.session  # type: ignore
-        stmt = sa.select(cls).where(*[getattr(cls, k) == v for k, v in kwargs.items()])
-        obj = session.execute(stmt).scalar_one_or_none()  # type: ignore
-        return obj
+        return cls._lookup(session, kwargs, load_profile)
 
     @classmethod
     def get_or_create(
-        cls, session: Optional[Session] = None, defaults: Optional[dict] = None, **kwargs
+        cls,
+        session: Optional[Session] = None,
+        defaults: Optional[dict] = None,
+        commit: bool = True,
+        **kwargs,
     ):
-        """
-        get_or_create _summary_
+        """Get the row matching ``kwargs``, or create it.
 
-        _extended_summary_
+        Safe under concurrent callers: the insert runs in a SAVEPOINT and a
+        lost race reads the winning row, see ``_insert_or_get``.
 
         Args:
             defaults: setattr if created. Defaults to None.
+            commit: commit the session once done.
             kwargs: select args
 
         Returns:
-            _description_
+            ``(obj, created)``
         """
         session = session or db.session
 
-        try:
-            stmt = sa.select(cls).where(
-                *[getattr(cls, k) == v for k, v in kwargs.items()]
-            )
-            obj = session.execute(stmt).scalar_one()
-            return obj, False
-
-        except NoResultFound:
+        obj = cls._lookup(session, kwargs)
+        created = False
+        if obj is None:
             params = cls._extract_model_params(defaults, **kwargs)
-            return cls._create_object_from_params(session, kwargs, params)
+            obj, created = cls._insert_or_get(session, kwargs, params)
+        if created and commit:
+            session.commit()
+        return obj, created
 
     @classmethod
-    def update_or_create(cls, session=None, defaults=None, **kwargs):
+    def _update_returning(cls, session, lookup: dict, values: dict):
+        """``UPDATE ... RETURNING`` of the row matching ``lookup``, None when there is none."""
+        stmt = sa.update(cls).filter_by(**lookup).values(**values).returning(cls)
+        obj = session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one_or_none()
+        if obj is not None:
+            model_cache.mark_dirty(session, cls.__table__)
+        return obj
+
+    @classmethod
+    def update_or_create(
+        cls,
+        session: Optional[Session] = None,
+        defaults: Optional[dict] = None,
+        commit: bool = False,
+        **kwargs,
+    ):
+        """Update the row matching ``kwargs`` with ``defaults``, or create it.
+
+        No row lock is taken and the last writer wins. On SQLite and
+        PostgreSQL an existing row is updated with one ``UPDATE ... RETURNING``;
+        MySQL and ``defaults`` setting more than columns select the row and
+        flush the changes. A missing row is created through ``_insert_or_get``.
+        ``kwargs`` must match one row at most.
+
+        Args:
+            defaults: set on the row, created or not.
+            commit: commit the session once done; by default the changes are
+                only flushed, in the caller's transaction.
+            kwargs: select args
+
+        Returns:
+            ``(obj, created)``
+        """
         session = session or db.session
         defaults = defaults or {}
-        with session.begin_nested():
-            try:
-                obj = session.query(cls).with_for_update().filter_by(**kwargs).one()
-            except NoResultFound:
-                params = cls._extract_model_params(defaults, **kwargs)
-                obj, created = cls._create_object_from_params(
-                    session, kwargs, params, lock=True
-                )
-                if created:
-                    return obj, created
+        dialect = session.get_bind(mapper=cls).dialect
+        columns = sa.inspect(cls).column_attrs
+        returns = dialect.update_returning and dialect.name in ("sqlite", "postgresql")
+        only_columns = all(key in columns for key in defaults)
+        returning = bool(defaults) and returns and only_columns
+        if returning:
+            obj = cls._update_returning(session, kwargs, defaults)
+        else:
+            obj = session.execute(
+                sa.select(cls).filter_by(**kwargs)
+            ).scalar_one_or_none()
+        updated = returning and obj is not None
+        created = False
+        if obj is None:
+            params = cls._extract_model_params(defaults, **kwargs)
+            obj, created = cls._insert_or_get(session, kwargs, params)
+        if not created and not updated:
             for k, v in defaults.items():
                 setattr(obj, k, v)
-            session.add(obj)
             session.flush()
-        return obj, False
+        cls._invalidate_lookups(session)
+        if commit:
+            session.commit()
+        return obj, created
 
 
 class CRUDMixin(ExtendMixin):
@@ -121,10 +426,115 @@ class CRUDMixin(ExtendMixin):
         instance = cls(**kwargs)
         return instance.save()
 
+    @classmethod
+    def bulk_create(
+        cls,
+        rows: Iterable[dict],
+        batch_size: int = 1000,
+        session: Optional[Session] = None,
+        commit: bool = True,
+        return_objects: bool = False,
+    ):
+        """Insert many records with one multi-row ``INSERT`` per batch.
+
+        Rows are dicts keyed by column name and go straight to the table, so
+        ORM-level logic (``__init__``, hybrid setters such as ``User.password``)
+        is not applied. With ``return_objects`` the rows are built as instances
+        and flushed through the unit of work instead.
+
+        Args:
+            rows: iterable of ``{column name: value}`` dicts.
+            batch_size: number of rows sent per statement.
+            session: session to use, defaults to ``db.session``.
+            commit: commit once all batches are sent.
+            return_objects: return the created instances instead of a count.
+
+        Returns:
+            number of inserted rows, or the list of created instances.
+        """
+        session = session or db.session
+        table = cls.__table__
+        created, objects = 0, []
+        for chunk in _chunked(rows, batch_size):
+            if return_objects:
+                instances = [cls(**row) for row in chunk]
+                session.add_all(instances)
+                session.flush()
+                objects.extend(instances)
+            else:
+                for group in _group_by_keys(chunk):
+                    session.execute(sa.insert(table).values(group))
+            created += len(chunk)
+        cls._invalidate_lookups(session)
+        model_cache.mark_dirty(session, table)
+        if commit:
+            session.commit()
+        return objects if return_objects else created
+
+    @classmethod
+    def bulk_upsert(
+        cls,
+        rows: Iterable[dict],
+        conflict_cols: Iterable[str],
+        update_cols: Optional[Iterable[str]] = None,
+        batch_size: int = 1000,
+        session: Optional[Session] = None,
+        commit: bool = True,
+    ):
+        """Insert or update many records with one multi-row upsert per batch.
+
+        MySQL renders ``INSERT ... ON DUPLICATE KEY UPDATE``, SQLite and
+        PostgreSQL render ``INSERT ... ON CONFLICT``. ``conflict_cols`` must be
+        covered by a unique index; of the rows of a batch sharing a key, the
+        last one is written. Rows already present are counted with one
+        ``SELECT COUNT(*)`` per batch, as MySQL affected-rows cannot tell an
+        update from an unchanged row.
+
+        Args:
+            rows: iterable of ``{column name: value}`` dicts.
+            conflict_cols: columns of the unique key identifying a row.
+            update_cols: columns overwritten on conflict, defaults to every
+                non-key column of the row. An empty list leaves existing rows as
+                is. Every row must have them, or ``ValueError`` is raised.
+            batch_size: number of rows sent per statement.
+            session: session to use, defaults to ``db.session``.
+            commit: commit once all batches are sent.
+
+        Returns:
+            ``(created, updated)`` counts.
+        """
+        session = session or db.session
+        table = cls.__table__
+        conflict_cols = list(conflict_cols)
+        if update_cols is not None:
+            update_cols = list(update_cols)
+        created = updated = 0
+        for chunk in _chunked(rows, batch_size):
+            chunk = _dedupe(chunk, conflict_cols)
+            keys = {tuple(row[name] for name in conflict_cols) for row in chunk}
+            existing = _count_existing(session, table, conflict_cols, keys)
+            # built first, a group missing update columns fails before any write
+            statements = [
+                _upsert_statement(session, table, group, conflict_cols, update_cols)
+                for group in _group_by_keys(chunk)
+            ]
+            for stmt in statements:
+                session.execute(stmt)
+
+            created += len(keys) - existing
+            if update_cols is None or update_cols:
+                updated += existing
+        cls._invalidate_lookups(session)
+        model_cache.mark_dirty(session, table)
+        if commit:
+            session.commit()
+        return created, updated
+
     def update(self, commit=True, **kwargs):
         """Update specific fields of a record."""
         for attr, value in kwargs.items():
             setattr(self, attr, value)
+        self._invalidate_lookups()
         if commit:
             return self.save()
         return self
@@ -132,6 +542,7 @@ class CRUDMixin(ExtendMixin):
     def save(self, commit=True):
         """Save the record."""
         db.session.add(self)
+        self._invalidate_lookups()
         if commit:
             db.session.commit()
         return self
@@ -139,31 +550,35 @@ class CRUDMixin(ExtendMixin):
     def delete(self, commit: bool = True) -> None:
         """Remove the record from the database."""
         db.session.delete(self)
+        self._invalidate_lookups()
         if commit:
             return db.session.commit()
         return
 
+    @classmethod
+    def serializer(cls) -> ModelSerializer:
+        """Compiled column plan of the model, built when its mapper is configured."""
+        serializer = cls.__dict__.get("__serializer__")
+        if serializer is None:
+            serializer = ModelSerializer(sa.inspect(cls))
+            cls.__serializer__ = serializer
+        return serializer
+
     def keys(self):
-        return [key for key in self.__table__.columns]
+        return list(self.serializer().columns)
 
     def to_dict(self):
-        d = {}
-        for c in self.__table__.c:
-            d[c.name] = getattr(self, c.name)
-        return d
+        return self.serializer().to_dict(self)
 
 
-class Model(CRUDMixin, db.Model):  # type: ignore
-    """Base model class that includes CRUD convenience methods."""
+class Model(CRUDMixin, AsyncCRUDMixin, db.Model):  # type: ignore
+    """Base model class that includes CRUD convenience methods, sync and ``aio``."""
 
     __abstract__ = True
 
     @classmethod
-    def get(cls, **kwds) -> TModel | None:
-        cond = [getattr(cls, k) == v for k, v in kwds.items()]
-        stmt = sa.select(cls).where(*cond)
-
-        return db.session.execute(stmt).scalar_one_or_none()
+    def get(cls, load_profile: Optional[str] = None, **kwds) -> TModel | None:
+        return cls._lookup(db.session, kwds, load_profile)
 
 
 class PkModel(Model):
@@ -185,21 +600,72 @@ class PkModel(Model):
 
     state = Column(sa.Boolean, server_default="1", comment="是否可用, True: 可用; False: 不可用")
 
+    # unique columns served by the second-level ``model_cache``, None disables it
+    __cache_keys__: Optional[tuple] = None
+
     @classmethod
-    def get_by_id(cls: Type[T], record_id) -> Optional[T]:
-        """Get record by ID."""
+    def get_by_id(
+        cls: Type[T], record_id, load_profile: Optional[str] = None
+    ) -> Optional[T]:
+        """Get record by ID, with the eager loads of ``load_profile`` if given."""
         if any(
             (
                 isinstance(record_id, basestring) and record_id.isdigit(),
                 isinstance(record_id, (int, float)),
             )
         ):
-            return db.session.get(cls, record_id)
+            if isinstance(record_id, float) and not record_id.is_integer():
+                return None
+            # "1", 1.0 and 1 share the identity and cache keys
+            record_id = int(record_id)
+            if load_profile is not None:
+                return db.session.get(
+                    cls, record_id, options=cls.load_profile(load_profile)
+                )
+
+            def loader():
+                return db.session.get(cls, record_id)
+
+            identity = sa.inspect(cls).identity_key_from_primary_key([record_id])
+            if identity in db.session.identity_map:
+                return loader()
+            return model_cache.get(cls, db.session, "id", record_id, loader)
 
             # return cls.query.get(int(record_id))
         return None
 
 
+@sa.event.listens_for(Model, "mapper_configured", propagate=True)
+def _compile_serializer(mapper, cls):
+    cls.__serializer__ = ModelSerializer(mapper)
+
+
+@sa.event.listens_for(Session, "after_flush")
+def _mark_cached_tables(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if model_cache.is_cached(type(obj)):
+            model_cache.mark_dirty(session, obj.__table__)
+
+
+@sa.event.listens_for(Session, "after_commit")
+def _bump_cached_tables(session):
+    model_cache.after_commit(session)
+
+
+@sa.event.listens_for(Session, "after_rollback")
+def _forget_cached_tables(session):
+    session.info.pop(model_cache.info_key, None)
+
+
+@sa.event.listens_for(Session, "after_commit")
+@sa.event.listens_for(Session, "after_rollback")
+def _clear_lookups(session):
+    # the instances are expired, a hit would SELECT them again anyway
+    cache = session.info.get(LookupCache.info_key)
+    if cache is not None:
+        cache.clear()
+
+
 def reference_col(
     tablename, nullable=False, pk_name="id", foreign_key_kwargs=None, column_kwargs=None)->MappedColumn[Any]:
     """Column that adds primary key foreign key reference.
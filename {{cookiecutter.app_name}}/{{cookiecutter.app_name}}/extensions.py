@@ -1,47 +1,44 @@
 # -*- coding: utf-8 -*-
 """Extensions module. Each extension is initialized in the app factory located in app.py."""
-import logging
 import os
-from logging.handlers import RotatingFileHandler
 
-import celery
 from flask_bcrypt import Bcrypt
 from flask_caching import Cache
-from flask_debugtoolbar import DebugToolbarExtension
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 
+from .async_database import AsyncDatabase
+from .utils.blocklist import TokenBlocklist
+from .utils.cache import ModelCache
+from .utils.lazy import LazyObject
+from .utils.log import LogPipeline
+from .utils.metrics import Metrics
+from .utils.nplusone import LazyLoadMonitor
+from .utils.password import PasswordHasher
+from .utils.redis_client import FlaskRedis
+from .utils.routing import RoutingSQLAlchemy
 
-def set_logger(logger, filename: str, stream: bool, formatted: bool):
-    file_handler = RotatingFileHandler(
-        filename,
-        maxBytes=50 * 1014 * 1014,
-        backupCount=10,
-    )
 
-    if stream:
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.DEBUG)
-    file_handler.setLevel(logging.DEBUG)
-    if formatted:
-        formatter = logging.Formatter(
-            fmt="%(asctime)s | %(levelname)s | %(filename)s:%(funcName)s:[line:%(lineno)d] - %(message)s",
-            # datefmt="%Y-%m-%d %H:%M:%S.%f %z",
-        )
-        file_handler.setFormatter(formatter)
-        if stream:
-            stream_handler.setFormatter(formatter)
-            logger.addHandler(stream_handler)
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.DEBUG)
+def set_logger(logger, filename: str, stream: bool, formatted: bool):
+    """Write ``logger`` to ``filename``, off the calling thread, see utils.log."""
+    log_pipeline.attach(logger, filename, stream=stream, formatted=formatted)
 
 
 APP_DIR = os.path.join(os.path.dirname(__file__), os.path.pardir)
-celery_app = celery.Celery()
-db = SQLAlchemy()
-migrate = Migrate()
+log_pipeline = LogPipeline()
+# celery, flask_migrate (alembic) and the debug toolbar are imported on first
+# use, see LAZY_INIT
+celery_app = LazyObject("celery:Celery")
+# reads go to SQLALCHEMY_REPLICA_URIS when set, see utils.routing
+db = RoutingSQLAlchemy()
+async_db = AsyncDatabase()
+lazy_load_monitor = LazyLoadMonitor()
+migrate = LazyObject("flask_migrate:Migrate")
+redis_client = FlaskRedis()
 cache = Cache()
+model_cache = ModelCache(cache)
 bcrypt = Bcrypt()
-debug_toolbar = DebugToolbarExtension()
+password_hasher = PasswordHasher(bcrypt)
+debug_toolbar = LazyObject("flask_debugtoolbar:DebugToolbarExtension")
 jwt_manager = JWTManager()
+token_blocklist = TokenBlocklist()
+metrics = Metrics()
@@ -9,27 +9,34 @@ import os
 import pathlib
 from typing import Any
 
+import click
 from flask.logging import default_handler
 from {{cookiecutter.app_name}} import commands
 from {{cookiecutter.app_name}}.extensions import (
     APP_DIR,
+    async_db,
     bcrypt,
     cache,
     celery_app,
     db,
     debug_toolbar,
     jwt_manager,
+    log_pipeline,
+    lazy_load_monitor,
+    metrics,
     migrate,
+    model_cache,
+    password_hasher,
+    redis_client,
     set_logger,
+    token_blocklist,
 )
 
+from .query_stats import SLOW_QUERY_LOGGER, query_stats
+from .session import session_lifecycle
 from .urls import make_urls
 
 
-def close_request_session(response):
-    # 解决mysql server gone away
-    db.session.remove()
-    return response
 class FlaskAppInitializer(object):  # pylint: disable=too-many-public-methods
     def __init__(self, app) -> None:
         super().__init__()
@@ -40,10 +47,13 @@ class FlaskAppInitializer(object):  # pylint: disable=too-many-public-methods
     def configure_logging(self):
         logger: logging.Logger = self.flask_app.logger
         logger.removeHandler(default_handler)
+        # queue based, the files are written by one thread per process
+        log_pipeline.init_app(self.flask_app)
         os.makedirs(self.config["LOG_DIR"], exist_ok=True)
         p = pathlib.Path(self.config["LOG_DIR"])
         flask_log = p / "flask.log"
         sa_log = p / "sqlalchemy.log"
+        slow_query_log = p / "slow_query.log"
         set_logger(logger, flask_log.as_posix(), stream=True, formatted=True)
         set_logger(
             logging.getLogger("sqlalchemy"),
@@ -51,6 +61,12 @@ class FlaskAppInitializer(object):  # pylint: disable=too-many-public-methods
             stream=False,
             formatted=False,
         )
+        set_logger(
+            logging.getLogger(SLOW_QUERY_LOGGER),
+            slow_query_log.as_posix(),
+            stream=False,
+            formatted=True,
+        )
         # set_logger(logger, "celery", stream=True, formatted=True)
 
     def pre_init(self) -> None:
@@ -64,7 +80,19 @@ class FlaskAppInitializer(object):  # pylint: disable=too-many-public-methods
         Called after any other init tasks
         """
 
+    @property
+    def lazy(self) -> bool:
+        """``LAZY_INIT``: import the optional extensions and views on first use."""
+        return bool(self.config.get("LAZY_INIT", False))
+
     def configure_celery(self) -> None:
+        if self.lazy:
+            # configured when a worker or a .delay() first touches celery_app
+            celery_app.when_loaded(self._configure_celery, key="flask")
+        else:
+            self._configure_celery(celery_app.__wrapped__)
+
+    def _configure_celery(self, celery_app) -> None:
         celery_app.config_from_object(self.config["CELERY_CONFIG"])
         celery_app.set_default()
         flask_app = self.flask_app
@@ -95,19 +123,55 @@ class FlaskAppInitializer(object):  # pylint: disable=too-many-public-methods
         """Register Click commands."""
         self.flask_app.cli.add_command(commands.test)
         self.flask_app.cli.add_command(commands.lint)
+        self.flask_app.cli.add_command(commands.bench)
 
     def register_extensions(self):
         # self.setup_db()
+        # Flask-SQLAlchemy removes the session on teardown_appcontext
         db.init_app(self.flask_app)
-        migrate.init_app(self.flask_app, db=db, directory=APP_DIR + "/migrations")
-
+        session_lifecycle.init_app(self.flask_app)
+        query_stats.init_app(self.flask_app)
+        async_db.init_app(self.flask_app)
+        lazy_load_monitor.init_app(self.flask_app)
+        if not self.lazy or click.get_current_context(silent=True) is not None:
+            # the flask CLI (flask db ...) or eager mode, migrations need
+            # every model in the metadata
+            from {{cookiecutter.app_name}}.apps import models  # noqa: F401
+
+            migrate.init_app(self.flask_app, db=db, directory=APP_DIR + "/migrations")
+
+        redis_client.init_app(self.flask_app)
+        if self.config.get("CACHE_TYPE") in ("redis", "RedisCache"):
+            # the cache borrows connections from the shared pool
+            self.config.setdefault("CACHE_OPTIONS", {})
+            self.config["CACHE_OPTIONS"].setdefault(
+                "connection_pool", redis_client.pool
+            )
         cache.init_app(self.flask_app)
-        debug_toolbar.init_app(self.flask_app)
+        model_cache.init_app(self.flask_app)
+        if not self.lazy or self.config.get("DEBUG_TB_ENABLED", self.flask_app.debug):
+            debug_toolbar.init_app(self.flask_app)
         bcrypt.init_app(self.flask_app)
+        password_hasher.init_app(self.flask_app)
         jwt_manager.init_app(self.flask_app)
+        token_blocklist.init_app(self.flask_app)
+        metrics.init_app(self.flask_app)
+        # the publish time of the tasks sent by web processes too
+        celery_app.when_loaded(lambda _: metrics.init_celery(), key="metrics")
+
+    def configure_jwt(self):
+        @jwt_manager.user_lookup_loader
+        def user_lookup_callback(_jwt_header, jwt_data):
+            # served from the session lookup cache after the first call
+            from {{cookiecutter.app_name}}.apps.models import User
+
+            return User.get(username=jwt_data["sub"])
+
+        @jwt_manager.token_in_blocklist_loader
+        def check_if_token_revoked(_jwt_header, jwt_payload):
+            return token_blocklist.is_revoked(jwt_payload["jti"])
 
     def configure_middleware(self):
-        self.flask_app.after_request(close_request_session)
         if self.config["ENABLE_CORS"]:
             from flask_cors import CORS
 
@@ -121,6 +185,7 @@ class FlaskAppInitializer(object):  # pylint: disable=too-many-public-methods
         self.pre_init()
         self.configure_celery()
         self.register_extensions()
+        self.configure_jwt()
         self.init_urls()
         self.shell_init()
         self.post_init()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Hooks building the app in the gunicorn master and resetting it in forked workers."""
+import gc
+import logging
+
+import sqlalchemy as sa
+from {{cookiecutter.app_name}}.extensions import celery_app, db, redis_client
+from {{cookiecutter.app_name}}.utils.lazy import load_views
+
+logger = logging.getLogger(__name__)
+
+
+def _engines(app) -> list:
+    with app.app_context():
+        engines = list(db.engines.values())
+        engines.extend(getattr(db, "replicas", []))
+    return engines
+
+
+def before_fork(app) -> None:
+    """Finish building ``app`` in the master, before any worker is forked.
+
+    Everything a worker would build on its first requests (lazy views and
+    their schemas, the mapper configuration) is built once here and shared
+    copy-on-write. Connections the master opened (database, redis, Celery
+    broker) are closed, a worker must never inherit one. Then the heap is
+    frozen: the collector of a worker
+    no longer walks, and so writes to, the pages of the master's objects.
+    """
+    load_views(app)
+    sa.orm.configure_mappers()
+    for engine in _engines(app):
+        engine.dispose()
+    redis_client.disconnect()
+    if celery_app.loaded:
+        celery_app.pool.force_close_all()
+    gc.collect()
+    gc.freeze()
+    logger.info("%d objects frozen before fork", gc.get_freeze_count())
+
+
+def after_fork(app) -> None:
+    """Reset the per-process state of a freshly forked worker.
+
+    The pools are replaced without closing what they hold, those sockets
+    still belong to the parent. The redis pool, the password hashing pool and
+    the log listener reset themselves at fork (``os.register_at_fork``); the
+    Celery broker pool was emptied by ``before_fork`` and Celery resets it in
+    its own pool processes.
+    """
+    for engine in _engines(app):
+        engine.dispose(close=False)
+    redis_client.reset()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Per-request SQL timing, Server-Timing headers and the slow query log."""
+import functools
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import g, has_request_context, request
+from {{cookiecutter.app_name}}.extensions import db
+
+SLOW_QUERY_LOGGER = "{{cookiecutter.app_name}}.slow_query"
+
+logger = logging.getLogger(SLOW_QUERY_LOGGER)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"%\(\w+\)s|%s")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """``statement`` on one line, literals replaced by ``?`` and IN lists folded.
+
+    Bound parameters are never part of the statement, so the result carries
+    no row data.
+    """
+    statement = _SPACES.sub(" ", statement).strip()
+    statement = _LITERALS.sub("?", statement)
+    statement = _PARAMS.sub("?", statement)
+    return _PLACEHOLDER_LISTS.sub("(...)", statement)
+
+
+class RequestQueries(object):
+    """SQL of one request: count, total time and the slowest statements."""
+
+    __slots__ = ("count", "seconds", "_slowest", "_top_n")
+
+    def __init__(self, top_n: int = 5):
+        self.count = 0
+        self.seconds = 0.0
+        self._slowest = []
+        self._top_n = top_n
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.seconds += elapsed
+        if len(self._slowest) < self._top_n:
+            heapq.heappush(self._slowest, (elapsed, statement))
+        elif elapsed > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (elapsed, statement))
+
+    def slowest(self) -> list:
+        """``[(seconds, normalized statement)]``, slowest first."""
+        return [
+            (elapsed, normalize_statement(statement))
+            for elapsed, statement in sorted(self._slowest, reverse=True)
+        ]
+
+
+class QueryStats(object):
+    """Timing of every statement run by the ``db`` engines.
+
+    Per request the statement count, the total database time and the
+    ``SQLALCHEMY_QUERY_STATS_TOP_N`` slowest statements are kept in ``g``;
+    with ``SQLALCHEMY_QUERY_STATS_HEADERS`` (default outside production) they
+    are sent back as ``Server-Timing`` and ``X-DB-*`` headers. Statements
+    slower than ``SQLALCHEMY_SLOW_QUERY_SECONDS`` are logged as one JSON line
+    to the ``slow_query`` logger, normalized and without their parameters,
+    and so are the slowest statements of a request spending that long in the
+    database in total. Totals per endpoint are kept for ``stats``.
+
+    The cost per statement is two clock reads and a heap push; statements
+    are only normalized when reported.
+    """
+
+    def __init__(self, db=db):
+        self.db = db
+        self.slow_seconds = 0.5
+        self.top_n = 5
+        self.headers = False
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("SQLALCHEMY_QUERY_STATS_TOP_N", 5)
+        app.config.setdefault("SQLALCHEMY_SLOW_QUERY_SECONDS", 0.5)
+        app.config.setdefault(
+            "SQLALCHEMY_QUERY_STATS_HEADERS", app.config.get("ENV") != "production"
+        )
+        self.top_n = int(app.config["SQLALCHEMY_QUERY_STATS_TOP_N"])
+        self.slow_seconds = float(app.config["SQLALCHEMY_SLOW_QUERY_SECONDS"])
+        self.headers = bool(app.config["SQLALCHEMY_QUERY_STATS_HEADERS"])
+        with app.app_context():
+            engines = dict(self.db.engines)
+            engines.update(getattr(self.db, "replica_engines", {}))
+        for engine in engines.values():
+            self._instrument(engine)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions["query_stats"] = self
+
+    def current(self):
+        """:class:`RequestQueries` of the current request, None outside one."""
+        if not has_request_context():
+            return None
+        queries = g.get("_queries")
+        if queries is None:
+            queries = g._queries = RequestQueries(self.top_n)
+        return queries
+
+    def stats(self) -> dict:
+        """``{endpoint: {"requests", "queries", "seconds"}}`` of this process."""
+        with self._lock:
+            return {
+                endpoint: dict(zip(("requests", "queries", "seconds"), totals))
+                for endpoint, totals in self._endpoints.items()
+            }
+
+    def _instrument(self, engine):
+        if sa.event.contains(engine, "before_cursor_execute", self._before):
+            return
+        sa.event.listen(engine, "before_cursor_execute", self._before)
+        sa.event.listen(engine, "after_cursor_execute", self._after)
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        queries = self.current()
+        if queries is not None:
+            queries.add(statement, elapsed)
+        if elapsed >= self.slow_seconds:
+            self._log_slow(statement, elapsed, conn.engine)
+
+    @staticmethod
+    def _log_slow(statement: str, elapsed: float, engine) -> None:
+        record = {
+            "event": "slow_query",
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": normalize_statement(statement),
+            "database": engine.url.render_as_string(hide_password=True),
+        }
+        if has_request_context():
+            record.update(
+                endpoint=request.endpoint, method=request.method, path=request.path
+            )
+        logger.warning(json.dumps(record))
+
+    @staticmethod
+    def _before_request():
+        g.pop("_queries", None)
+
+    def _after_request(self, response):
+        queries = g.get("_queries")
+        if queries is None:
+            return response
+        with self._lock:
+            totals = self._endpoints.setdefault(request.endpoint, [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += queries.count
+            totals[2] += queries.seconds
+        if queries.seconds >= self.slow_seconds:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_request_queries",
+                        "endpoint": request.endpoint,
+                        "method": request.method,
+                        "path": request.path,
+                        "queries": queries.count,
+                        "duration_ms": round(queries.seconds * 1000, 3),
+                        "slowest": [
+                            {"duration_ms": round(elapsed * 1000, 3), "statement": sql}
+                            for elapsed, sql in queries.slowest()
+                        ],
+                    }
+                )
+            )
+        if self.headers:
+            response.headers["X-DB-Query-Count"] = str(queries.count)
+            response.headers["X-DB-Time"] = "%.3f" % (queries.seconds * 1000)
+            response.headers.add(
+                "Server-Timing",
+                'db;dur=%.3f;desc="%d queries"'
+                % (queries.seconds * 1000, queries.count),
+            )
+        return response
+
+
+query_stats = QueryStats()
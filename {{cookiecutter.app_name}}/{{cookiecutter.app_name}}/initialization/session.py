@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Pool-aware lifecycle of the request scoped database session."""
+import logging
+import threading
+import time
+from functools import partial
+
+import sqlalchemy as sa
+from sqlalchemy.exc import DisconnectionError
+from {{cookiecutter.app_name}}.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats(object):
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.connects = 0
+        self.connect_seconds = 0.0
+        self.max_connect_seconds = 0.0
+        self.pings = 0
+        self.ping_failures = 0
+        self.recycled = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, overflow: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if overflow:
+                self.overflow_checkouts += 1
+
+    def record_connect(self, elapsed: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds += elapsed
+            self.max_connect_seconds = max(self.max_connect_seconds, elapsed)
+
+    def as_dict(self, pool) -> dict:
+        data = {
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "connects": self.connects,
+            "connect_seconds": self.connect_seconds,
+            "max_connect_seconds": self.max_connect_seconds,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+            "recycled": self.recycled,
+        }
+        # QueuePool only, other pools have no fixed size
+        for name in ("size", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if method is not None:
+                data[name] = method()
+        return data
+
+
+class SessionLifecycle(object):
+    """Connection lifecycle of the ``db`` engines.
+
+    The request session is removed by Flask-SQLAlchemy on
+    ``teardown_appcontext``, which also runs when the view raised. On top of
+    that, for every engine:
+
+    * a connection is pinged on checkout only when it sat idle in the pool for
+      more than ``SQLALCHEMY_PING_IDLE_SECONDS``, instead of ``pool_pre_ping``
+      pinging on every checkout;
+    * on MySQL the server ``wait_timeout`` is read from the first connection
+      and connections older than ``wait_timeout - SQLALCHEMY_RECYCLE_MARGIN``
+      are replaced on checkout, so the server never closes one under us;
+    * checkouts, overflow use and the time spent opening connections are
+      counted from the pool events, see ``stats``.
+    """
+
+    def __init__(self, db=db):
+        self.db = db
+        self.ping_idle = 30.0
+        self.margin = 30.0
+        self._stats = {}
+        self._recycle = {}
+
+    def init_app(self, app):
+        app.config.setdefault("SQLALCHEMY_PING_IDLE_SECONDS", 30)
+        app.config.setdefault("SQLALCHEMY_RECYCLE_MARGIN", 30)
+        self.ping_idle = float(app.config["SQLALCHEMY_PING_IDLE_SECONDS"])
+        self.margin = float(app.config["SQLALCHEMY_RECYCLE_MARGIN"])
+        with app.app_context():
+            engines = dict(self.db.engines)
+            engines.update(getattr(self.db, "replica_engines", {}))
+        for bind_key, engine in engines.items():
+            self._instrument(bind_key, engine)
+        app.extensions["session_lifecycle"] = self
+
+    def stats(self) -> dict:
+        """``{bind key: pool counters}`` of this process."""
+        return {
+            bind_key: stats.as_dict(engine.pool)
+            for bind_key, (engine, stats) in self._stats.items()
+        }
+
+    def _instrument(self, bind_key, engine):
+        stats = PoolStats()
+        self._stats[bind_key] = (engine, stats)
+        self._recycle[engine] = None
+        # pool events listened on the engine also apply to the pool built by
+        # dispose()
+        listen = sa.event.listen
+        listen(engine, "do_connect", self._on_do_connect)
+        listen(engine, "connect", partial(self._on_connect, engine, stats))
+        listen(engine, "checkin", self._on_checkin)
+        listen(engine, "checkout", partial(self._on_checkout, engine, stats))
+
+    @staticmethod
+    def _on_do_connect(dialect, record, cargs, cparams):
+        record.info["connect_started"] = time.perf_counter()
+
+    def _on_connect(self, engine, stats, dbapi_connection, record):
+        started = record.info.pop("connect_started", None)
+        if started is not None:
+            stats.record_connect(time.perf_counter() - started)
+        if engine.dialect.name == "mysql" and self._recycle[engine] is None:
+            self._recycle[engine] = self._measure_recycle(engine, dbapi_connection)
+
+    @staticmethod
+    def _on_checkin(dbapi_connection, record):
+        if record is not None:
+            record.info["checked_in_at"] = time.monotonic()
+
+    def _on_checkout(self, engine, stats, dbapi_connection, record, proxy):
+        size = getattr(engine.pool, "size", None)
+        stats.record_checkout(size is not None and engine.pool.checkedout() > size())
+        recycle = self._recycle[engine]
+        if recycle is not None and time.time() - record.starttime > recycle:
+            stats.recycled += 1
+            # the pool replaces the connection and checks out again
+            raise DisconnectionError("connection older than wait_timeout")
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < self.ping_idle:
+            return
+        stats.pings += 1
+        try:
+            _execute(dbapi_connection, "SELECT 1")
+        except _dbapi_errors(engine) as ex:
+            stats.ping_failures += 1
+            raise DisconnectionError("idle connection is gone") from ex
+
+    def _measure_recycle(self, engine, dbapi_connection):
+        try:
+            wait_timeout = float(_execute(dbapi_connection, "SELECT @@wait_timeout")[0])
+        except _dbapi_errors(engine) + (TypeError, ValueError):
+            logger.exception("Could not read wait_timeout")
+            return None
+        return max(wait_timeout - self.margin, wait_timeout / 2)
+
+
+def _dbapi_errors(engine) -> tuple:
+    """Errors of a statement run on a raw connection of ``engine``."""
+    return (engine.dialect.loaded_dbapi.Error, OSError)
+
+
+def _execute(dbapi_connection, statement):
+    """Run ``statement`` on a raw DBAPI connection, its first row."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(statement)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+session_lifecycle = SessionLifecycle()
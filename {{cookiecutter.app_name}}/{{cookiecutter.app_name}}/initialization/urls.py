@@ -2,18 +2,45 @@
 """ urls """
 
 from flask import Blueprint, Flask
-from {{cookiecutter.app_name}}.apps.user import views as user_views
-from {{cookiecutter.app_name}}.public import views as public_views
+from werkzeug.utils import import_string
+from {{cookiecutter.app_name}}.utils.lazy import LazyView
+
+# url, view, endpoint, methods of the view; with LAZY_INIT the views are
+# imported on their first request, the methods let Flask build the rules first
+API_URLS = (
+    ("/", "{{cookiecutter.app_name}}.public.views:IndexView", "index", ("GET",)),
+    (
+        "/user/login",
+        "{{cookiecutter.app_name}}.apps.user.views:LoginView",
+        "user_login",
+        ("GET", "POST"),
+    ),
+    (
+        "/user/register",
+        "{{cookiecutter.app_name}}.apps.user.views:RegisterView",
+        "user_register",
+        ("POST",),
+    ),
+    (
+        "/user/logout",
+        "{{cookiecutter.app_name}}.apps.user.views:LogoutView",
+        "user_logout",
+        ("POST",),
+    ),
+)
 
 
 def make_urls(flask_app: Flask):
-    def add_url(url:str, view, blue_print:Blueprint):
-        blue_print.add_url_rule(url, view_func=view)
+    lazy = flask_app.config.get("LAZY_INIT", False)
+
+    def add_url(url: str, view: str, endpoint: str, methods, blue_print: Blueprint):
+        if lazy:
+            view_func = LazyView(view, endpoint, methods)
+        else:
+            view_func = import_string(view).as_view(endpoint)
+        blue_print.add_url_rule(url, view_func=view_func)
 
     api_blue = Blueprint("api", __name__, url_prefix="/api")
-    add_url("/", public_views.IndexView.as_view("index"), blue_print=api_blue)
-    add_url("/user/login", user_views.LoginView.as_view("user_login"), blue_print=api_blue)
-    add_url("/user/register", user_views.RegisterView.as_view("user_register"), blue_print=api_blue)
-    add_url("/user/logout", user_views.LogoutView.as_view("user_logout"), blue_print=api_blue)
+    for url, view, endpoint, methods in API_URLS:
+        add_url(url, view, endpoint, methods, blue_print=api_blue)
     flask_app.register_blueprint(api_blue)
-    
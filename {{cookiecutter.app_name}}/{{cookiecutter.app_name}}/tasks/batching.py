@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Batched Celery task calls and chunked fan-out helpers."""
+import atexit
+import functools
+import itertools
+import logging
+import math
+import os
+import threading
+
+from celery import group, shared_task
+from {{cookiecutter.app_name}}.extensions import celery_app
+from {{cookiecutter.app_name}}.utils.lazy import load
+
+logger = logging.getLogger(__name__)
+
+# chunks are never larger, a message stays far below the broker limits
+MAX_CHUNK_SIZE = 1000
+# chunks per worker process of a fan-out, so a slow chunk does not leave
+# the other processes idle at the end
+CHUNKS_PER_PROCESS = 4
+
+
+class BatchedTask(object):
+    """Buffer of ``.delay(item)`` calls sent as one task per batch.
+
+    The items of this process are sent as ``task.delay(items)`` once
+    ``max_size`` of them are buffered, or ``max_wait`` seconds after the
+    first one, whichever comes first; the rest is sent at exit. A call
+    returns no result of its own, the batch ``AsyncResult`` is returned by
+    the call that fills the batch. Items must be JSON serializable, pack
+    several values in a dict.
+
+    Delivery is at most once: until its batch is sent an item only lives in
+    the memory of this process, and it is lost if the process dies without
+    running ``atexit`` (SIGKILL, the OOM killer, a gunicorn worker killed on
+    timeout). Only batch what can be lost, like metrics or audit trails
+    with a fallback; send the rest with ``.delay()`` of a plain task.
+    """
+
+    def __init__(self, task, max_size: int, max_wait: float):
+        self.task = task
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._items = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+        if hasattr(os, "register_at_fork"):
+            # the buffer of the parent is its to send
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.flush)
+
+    @property
+    def name(self) -> str:
+        return self.task.name
+
+    @property
+    def pending(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items, "pending": self.pending}
+
+    def __call__(self, items):
+        """Run the batch function in this process."""
+        return self.task(items)
+
+    def delay(self, item):
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) < self.max_size:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.max_wait, self._flush_later)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return None
+            items = self._take()
+        return self._send(items)
+
+    def flush(self):
+        """Send the buffered items now, the ``AsyncResult`` or ``None``."""
+        with self._lock:
+            items = self._take()
+        return self._send(items) if items else None
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        except Exception:  # noqa: B902
+            # nobody waits on the timer thread to raise to
+            logger.exception("could not send a batch of %s", self.name)
+
+    def _take(self) -> list:
+        items, self._items = self._items, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return items
+
+    def _send(self, items):
+        # the Celery app of a web process is configured on first use
+        load(celery_app)
+        result = self.task.delay(items)
+        with self._lock:
+            self.batches += 1
+            self.items += len(items)
+        return result
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._items = []
+        self._timer = None
+
+
+def batched_task(max_size: int = 100, max_wait: float = 1.0, **options):
+    """Declare ``func(items)`` as a task fed one item per ``.delay(item)``.
+
+    ``options`` are the ones of ``shared_task``::
+
+        @batched_task(max_size=500, max_wait=2, name="audit.write")
+        def write_audit(events):
+            AuditEvent.bulk_insert(events)
+
+        write_audit.delay({"user": user.id, "action": "login"})
+    """
+
+    def decorator(func):
+        batched = BatchedTask(shared_task(**options)(func), max_size, max_wait)
+        return functools.update_wrapper(batched, func)
+
+    return decorator
+
+
+def chunked(items, size: int):
+    """Lists of at most ``size`` items of the iterable ``items``."""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def chunk_size(total: int, processes: int = None) -> int:
+    """Size of ``CHUNKS_PER_PROCESS`` chunks per worker process for ``total`` items.
+
+    ``processes`` defaults to ``worker_concurrency``, the size is capped by
+    ``MAX_CHUNK_SIZE``.
+    """
+    if processes is None:
+        processes = celery_app.conf.worker_concurrency or os.cpu_count() or 1
+    size = math.ceil(total / (processes * CHUNKS_PER_PROCESS))
+    return max(1, min(size, MAX_CHUNK_SIZE))
+
+
+def chunked_group(task, items, size: int = None, processes: int = None):
+    """``group`` of ``task.s(chunk)`` over the chunks of ``items``.
+
+    ``task`` takes a list, a :class:`BatchedTask` or any task with the same
+    signature; without ``size`` the chunks are right-sized from the number
+    of items and the worker processes, see :func:`chunk_size`.
+    """
+    if isinstance(task, BatchedTask):
+        task = task.task
+    if size is None:
+        items = list(items)
+        size = chunk_size(len(items), processes)
+    return group(task.s(chunk) for chunk in chunked(items, size))
@@ -9,21 +9,47 @@ import logging
 import os
 from typing import Any
 
-from celery.signals import worker_process_init
-from {{cookiecutter.app_name}}.app import create_app
-from {{cookiecutter.app_name}}.extensions import celery_app, db, set_logger
-
-from . import task
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv())
+
+# with METRICS_ENABLED the pool processes share their metric values here,
+# served summed on METRICS_WORKER_PORT; must be set before the app imports
+# prometheus_client, see utils.metrics
+if os.getenv("METRICS_ENABLED", "false").lower() == "true":
+    LOG_DIR = os.getenv(
+        "LOG_DIR",
+        os.path.join(os.path.expanduser("~"), "logs", "{{cookiecutter.app_name}}"),
+    )
+    PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(LOG_DIR, "prometheus-celery")
+    )
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+from celery.signals import worker_process_init  # noqa: E402
+from {{cookiecutter.app_name}}.app import create_app  # noqa: E402
+from {{cookiecutter.app_name}}.extensions import (  # noqa: E402
+    celery_app,
+    metrics,
+    set_logger,
+)
+from {{cookiecutter.app_name}}.initialization.prefork import after_fork  # noqa: E402
+
+from . import task  # noqa: E402
 
 flask_app = create_app()
 
-app = celery_app
+# the Celery instance itself, celery_app is a lazy stand-in
+app = celery_app.__wrapped__
+# task run time and queue wait of the pool processes, see utils.metrics
+metrics.init_worker(flask_app.config["METRICS_WORKER_PORT"])
 
 
 @worker_process_init.connect
 def reset_db_connection_pool(**kwargs: Any) -> None:
+    # the connections of the parent stay open for it, see initialization.prefork
+    after_fork(flask_app)
     with flask_app.app_context():
-        db.engine.dispose()
         LOG_DIR = flask_app.config["LOG_DIR"]
         set_logger(
             logging.getLogger("celery"),
@@ -6,8 +6,15 @@ __author__ = "SamSa"
 
 
 from celery import shared_task
+from {{cookiecutter.app_name}}.tasks.batching import batched_task
 
 
 @shared_task(name="add_together")
 def add_together(a: int, b: int) -> int:
     return a + b
+
+
+@batched_task(max_size=100, max_wait=1.0, name="add_together_batch")
+def add_together_batch(pairs: list) -> list:
+    """``add_together`` of many ``[a, b]`` pairs, one message per batch."""
+    return [a + b for a, b in pairs]
@@ -2,10 +2,99 @@
 # -*- encoding: utf-8 -*-
 # 2023-05-17 11:20:55
 
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+import logging
 
+import sqlalchemy as sa
 from flask_sqlalchemy.pagination import SelectPagination as _SelectPagination
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from sqlalchemy.orm import Session
+from {{cookiecutter.app_name}}.extensions import cache
+from {{cookiecutter.app_name}}.utils.cache import CACHE_ERRORS
+from {{cookiecutter.app_name}}.utils.utils import cached_schema
+
+logger = logging.getLogger(__name__)
+
+# cursor values of these JSON types are accepted for a column of the key type
+_WIDENING = {float: (int,), decimal.Decimal: (int,)}
+
+
+def count_rows(stmt, session: Session, mode=True, timeout: int = 60):
+    """Count the rows of ``stmt``.
+
+    :param mode: ``True`` or ``"exact"`` runs ``COUNT(*)``, ``"cached"`` keeps
+        the exact count in ``extensions.cache`` for ``timeout`` seconds (an
+        exact count when the cache is down),
+        ``"estimate"`` reads the table statistics of MySQL/PostgreSQL (ignoring
+        any WHERE clause) and falls back to an exact count elsewhere. Anything
+        falsy skips counting and returns None.
+    """
+    if not mode:
+        return None
+    if mode == "estimate":
+        estimate = _estimate_rows(stmt, session)
+        if estimate is not None:
+            return estimate
+    count_stmt = sa.select(sa.func.count()).select_from(stmt.order_by(None).subquery())
+    if mode != "cached":
+        return session.execute(count_stmt).scalar()
+
+    compiled = count_stmt.compile(session.get_bind())
+    digest = hashlib.sha1(
+        f"{compiled}{sorted(compiled.params.items())!r}".encode()
+    ).hexdigest()
+    key = f"pagination:count:{digest}"
+    try:
+        total = cache.get(key)
+    except CACHE_ERRORS:
+        logger.exception("could not read a cached count")
+        return session.execute(count_stmt).scalar()
+    if total is None:
+        total = session.execute(count_stmt).scalar()
+        try:
+            cache.set(key, total, timeout=timeout)
+        except CACHE_ERRORS:
+            logger.exception("could not cache a count")
+    return total
+
+
+def _estimate_rows(stmt, session: Session):
+    froms = stmt.get_final_froms()
+    if len(froms) != 1 or not isinstance(froms[0], sa.Table):
+        return None
+    table = froms[0].name
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        query = sa.text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES"
+            " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        )
+    elif dialect == "postgresql":
+        query = sa.text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"
+        )
+    else:
+        return None
+    estimate = session.execute(query, {"table": table}).scalar()
+    return None if estimate is None or estimate < 0 else int(estimate)
+
+
+def with_load_profile(stmt, marsh=None, profile: str = None):
+    """Apply the load profile ``profile`` of the selected model to ``stmt``.
+
+    Without ``profile`` the ``__load_profile__`` of the schema ``marsh`` is
+    used, the relationships it dumps.
+    """
+    if profile is None:
+        profile = getattr(marsh, "__load_profile__", None)
+    if profile is None:
+        return stmt
+    entity = stmt.column_descriptions[0]["entity"]
+    return stmt.options(*entity.load_profile(profile))
 
 
 class SelectPagination(object):
@@ -14,22 +103,31 @@ class SelectPagination(object):
         page: int = 1,
         per_page: int = 100,
         max_per_page: int = 100,
+        count=True,
+        count_timeout: int = 60,
+        profile: str = None,
     ) -> None:
         self.page = page
         self.per_page = per_page
         self.max_per_page = max_per_page
+        self.count = count
+        self.count_timeout = count_timeout
+        self.profile = profile
 
     def make_page(self, stmt, session: Session, marsh: SQLAlchemyAutoSchema):
+        stmt = with_load_profile(stmt, marsh, self.profile)
         p = _SelectPagination(
             page=self.page,
             per_page=self.per_page,
             max_per_page=self.max_per_page,
             select=stmt,
             session=session,
+            count=self.count is True,
         )
+        if self.count not in (True, False, None):
+            p.total = count_rows(stmt, session, self.count, self.count_timeout)
         if marsh:
-            _m = marsh()  # type: ignore
-            d = _m.dump(p.items, many=True)
+            d = cached_schema(marsh, many=True).dump(p.items)
         else:
             d = p.items
         data = {
@@ -41,3 +139,161 @@ class SelectPagination(object):
         }
 
         return data
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"d": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return datetime.date.fromisoformat(value["d"])
+        if "dec" in value:
+            return decimal.Decimal(value["dec"])
+    return value
+
+
+def _coerce_value(column, value):
+    """``value`` of a decoded cursor as the Python type of ``column``.
+
+    Raise ValueError when it has another type, a tampered cursor must not
+    reach the database.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if value is None:
+        return value
+    if isinstance(value, bool) != (python_type is bool):
+        raise ValueError("Invalid cursor")
+    if isinstance(value, python_type):
+        return value
+    if isinstance(value, _WIDENING.get(python_type, ())):
+        return python_type(value)
+    raise ValueError("Invalid cursor")
+
+
+def encode_cursor(direction: str, values) -> str:
+    raw = json.dumps([direction, [_encode_value(v) for v in values]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return ``(direction, values)``, raise ValueError for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as ex:
+        raise ValueError("Invalid cursor") from ex
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return direction, [_decode_value(v) for v in values]
+
+
+class KeysetPagination(object):
+    """Cursor (keyset) pagination.
+
+    Pages are read with ``WHERE (ordering) > (last seen values) LIMIT n`` on
+    an indexed ordering instead of ``OFFSET``, so deep pages cost the same
+    as the first one. The ordering defaults to the primary key ``id`` of the
+    selected model; pass ``order_by=(Model.created_at, Model.id)`` to page on
+    another index, always ending with a unique column. No total is computed
+    unless ``count`` asks for one, see :func:`count_rows`. Relationships are
+    eager loaded by ``profile``, see :func:`with_load_profile`.
+
+    An empty ``prev`` page has a next page but no ``next_cursor``: no row
+    comes before the cursor, so the next page is the first one, read without
+    a cursor.
+    """
+
+    def __init__(
+        self,
+        cursor: str = None,
+        per_page: int = 100,
+        max_per_page: int = 100,
+        order_by=None,
+        desc: bool = False,
+        count=None,
+        count_timeout: int = 60,
+        profile: str = None,
+    ) -> None:
+        self.cursor = cursor
+        self.per_page = max(1, min(per_page, max_per_page))
+        self.order_by = order_by
+        self.desc = desc
+        self.count = count
+        self.count_timeout = count_timeout
+        self.profile = profile
+
+    def _columns(self, stmt):
+        if self.order_by is not None:
+            return list(self.order_by)
+        entity = stmt.column_descriptions[0]["entity"]
+        return [entity.id]
+
+    @staticmethod
+    def _after(columns, values, desc: bool):
+        values = [sa.literal(v, c.type) for c, v in zip(columns, values)]
+        clauses = []
+        for i, column in enumerate(columns):
+            equal = [c == v for c, v in zip(columns[:i], values[:i])]
+            compare = column < values[i] if desc else column > values[i]
+            clauses.append(sa.and_(*equal, compare))
+        return sa.or_(*clauses)
+
+    def make_page(self, stmt, session: Session, marsh: SQLAlchemyAutoSchema):
+        columns = self._columns(stmt)
+        direction, values = "next", None
+        if self.cursor:
+            direction, values = decode_cursor(self.cursor)
+            if len(values) != len(columns):
+                raise ValueError("Invalid cursor")
+            values = [_coerce_value(c, v) for c, v in zip(columns, values)]
+
+        # a "prev" page is read backwards from the cursor, then put back in order
+        desc = self.desc if direction == "next" else not self.desc
+        page_stmt = with_load_profile(stmt, marsh, self.profile)
+        if values is not None:
+            page_stmt = page_stmt.where(self._after(columns, values, desc))
+        order = [c.desc() if desc else c.asc() for c in columns]
+        page_stmt = page_stmt.order_by(None).order_by(*order).limit(self.per_page + 1)
+
+        items = list(session.execute(page_stmt).scalars())
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+        if direction == "next":
+            has_next, has_prev = has_more, values is not None
+        else:
+            items.reverse()
+            has_next, has_prev = True, has_more
+
+        def key(item):
+            return [getattr(item, c.key) for c in columns]
+
+        if marsh:
+            d = cached_schema(marsh, many=True).dump(items)
+        else:
+            d = items
+        return {
+            "items": d,
+            # the page a "prev" cursor came from follows it, even when empty
+            "has_next": has_next and (bool(items) or direction == "prev"),
+            "has_prev": has_prev and bool(items),
+            "next_cursor": (
+                encode_cursor("next", key(items[-1])) if has_next and items else None
+            ),
+            "prev_cursor": (
+                encode_cursor("prev", key(items[0])) if has_prev and items else None
+            ),
+            "total": count_rows(stmt, session, self.count, self.count_timeout),
+        }
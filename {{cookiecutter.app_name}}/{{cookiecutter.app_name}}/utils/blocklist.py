@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""Revoked JWT ids, synced from a shared backend into every process."""
+import logging
+import threading
+import time
+
+try:
+    from redis import RedisError
+except ImportError:  # pragma: no cover
+    RedisError = OSError  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# errors of a backend sync, redis-py wraps socket errors but not all of them
+SYNC_ERRORS = (RedisError, OSError)
+
+
+class MemoryBlocklistBackend(object):
+    """In-process stand-in of the Redis backend, for tests and single processes."""
+
+    def __init__(self):
+        self._data = {}
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._data[jti] = expires_at
+
+    def members(self, now: float) -> dict:
+        self._data = {k: v for k, v in self._data.items() if v > now}
+        return dict(self._data)
+
+
+class RedisBlocklistBackend(object):
+    """Revoked ids in one sorted set, scored by the expiry of their token."""
+
+    def __init__(self, client, key="jwt:blocklist"):
+        self.client = client
+        self.key = key
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self.client.zadd(self.key, {jti: expires_at})
+
+    def members(self, now: float) -> dict:
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(self.key, "-inf", now)
+        pipe.zrangebyscore(self.key, now, "+inf", withscores=True)
+        _, rows = pipe.execute()
+        return {
+            (jti.decode() if isinstance(jti, bytes) else jti): score
+            for jti, score in rows
+        }
+
+
+class TokenBlocklist(object):
+    """Revoked JWT ids, checked without a round-trip.
+
+    Revocations are written to the backend with the expiry of the token and
+    kept in a local ``{jti: expires_at}`` set. The local set is replaced from
+    the backend every ``JWT_BLOCKLIST_SYNC_INTERVAL`` seconds, so a check is a
+    dict lookup and revocations made by other processes apply after at most
+    one interval.
+
+    A revocation the backend could not store is kept apart, merged into
+    every synced set and written again on each sync until it is stored or
+    its token expired.
+
+    When a sync fails the last known set is kept and checks fail open:
+    tokens revoked by other processes since the last sync stay accepted
+    until the backend is back. With ``JWT_BLOCKLIST_FAIL_CLOSED`` every
+    token is rejected instead, until a sync succeeds.
+
+    ``JWT_BLOCKLIST_BACKEND`` is ``"redis"`` (default) or ``"memory"``,
+    which keeps revocations local to the process and is meant for tests.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.interval = 5.0
+        self.fail_closed = False
+        self._failed = False
+        self._revoked = {}
+        self._unsaved = {}
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.hits = 0
+        self.syncs = 0
+        self.sync_errors = 0
+
+    def init_app(self, app, backend=None):
+        app.config.setdefault("JWT_BLOCKLIST_BACKEND", "redis")
+        app.config.setdefault("JWT_BLOCKLIST_KEY", "jwt:blocklist")
+        app.config.setdefault("JWT_BLOCKLIST_SYNC_INTERVAL", 5)
+        app.config.setdefault("JWT_BLOCKLIST_FAIL_CLOSED", False)
+        self.interval = float(app.config["JWT_BLOCKLIST_SYNC_INTERVAL"])
+        self.fail_closed = bool(app.config["JWT_BLOCKLIST_FAIL_CLOSED"])
+        if backend is None:
+            backend = self._make_backend(app)
+        self.backend = backend
+        self._revoked = {}
+        self._unsaved = {}
+        self._failed = False
+        self._next_sync = 0.0
+        app.extensions["token_blocklist"] = self
+
+    @staticmethod
+    def _make_backend(app):
+        kind = app.config["JWT_BLOCKLIST_BACKEND"]
+        if kind == "memory":
+            return MemoryBlocklistBackend()
+        if kind == "redis":
+            # the shared client of utils.redis_client, registered before
+            client = app.extensions["redis"].client
+            return RedisBlocklistBackend(client, app.config["JWT_BLOCKLIST_KEY"])
+        raise ValueError("Unknown JWT_BLOCKLIST_BACKEND %r" % kind)
+
+    def stats(self) -> dict:
+        return {
+            "checks": self.checks,
+            "hits": self.hits,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "size": len(self._revoked),
+            "unsaved": len(self._unsaved),
+        }
+
+    def sync(self) -> None:
+        """Replace the local set with the backend's plus the unsaved revocations."""
+        now = time.time()
+        self._next_sync = time.monotonic() + self.interval
+        try:
+            revoked = self.backend.members(now)
+        except SYNC_ERRORS:
+            self.sync_errors += 1
+            self._failed = True
+            logger.exception("JWT blocklist sync failed, keeping the local set")
+            return
+        self.syncs += 1
+        self._failed = False
+        self._revoked = dict(revoked, **self._save_unsaved(now))
+
+    def _save_unsaved(self, now: float) -> dict:
+        """Write the unsaved revocations again, return the ones still valid."""
+        unsaved = {jti: exp for jti, exp in self._unsaved.items() if exp > now}
+        pending = dict(unsaved)
+        for jti, expires_at in unsaved.items():
+            try:
+                self.backend.add(jti, expires_at)
+            except SYNC_ERRORS:
+                break
+            del pending[jti]
+        self._unsaved = pending
+        return unsaved
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Revoke ``jti`` until ``expires_at``, the ``exp`` claim of the token.
+
+        Without the backend the revocation only applies to this process, until
+        a later sync stores it.
+        """
+        try:
+            self.backend.add(jti, expires_at)
+        except SYNC_ERRORS:
+            logger.exception("JWT blocklist write failed, revoking %s locally", jti)
+            self._unsaved = dict(self._unsaved, **{jti: expires_at})
+        with self._lock:
+            self._revoked = dict(self._revoked, **{jti: expires_at})
+
+    def is_revoked(self, jti: str) -> bool:
+        if time.monotonic() >= self._next_sync:
+            with self._lock:
+                # one sync per interval, concurrent checks use the current set
+                if time.monotonic() >= self._next_sync:
+                    self.sync()
+        self.checks += 1
+        if self._failed and self.fail_closed:
+            return True
+        expires_at = self._revoked.get(jti)
+        if expires_at is not None and expires_at > time.time():
+            self.hits += 1
+            return True
+        return False
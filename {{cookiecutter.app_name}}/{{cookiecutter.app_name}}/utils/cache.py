@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""Second-level cache of model rows on top of the flask_caching extension."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import sqlalchemy as sa
+from flask import current_app, has_app_context
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .routing import primary_reads
+
+try:
+    from redis import RedisError
+except ImportError:  # pragma: no cover
+    RedisError = OSError  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# what a cache backend raises when its server is unreachable
+CACHE_ERRORS = (RedisError, OSError)
+
+
+class LocalLRU(object):
+    """Thread-safe in-process LRU whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, predicate):
+        """Remove every entry whose key matches ``predicate``."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ModelCache(object):
+    """Read-through second-level cache for model rows.
+
+    Rows are stored as a tuple of column values under
+    ``model:<table>:<version>:<field>:<value>``, in the flask_caching backend
+    and in a small local LRU in front of it. Every committed write to a table
+    bumps its version, so older keys are never read again and simply expire.
+    Other processes see a bump after at most ``MODEL_CACHE_LOCAL_TTL`` seconds,
+    which is how long versions are kept in the local tier.
+
+    Models opt in by declaring ``__cache_keys__``, the unique columns that may be
+    looked up besides the primary key. Deferred columns and the attributes named
+    in ``__cache_exclude__`` (secrets such as password hashes) are never stored,
+    they load from the database when accessed. The whole cache is switched on
+    with ``MODEL_CACHE_ENABLED``.
+    """
+
+    info_key = "model_cache_dirty"
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.local = LocalLRU()
+        self.timeout = None
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        app.config.setdefault("MODEL_CACHE_ENABLED", False)
+        app.config.setdefault("MODEL_CACHE_TIMEOUT", 300)
+        app.config.setdefault("MODEL_CACHE_LOCAL_SIZE", 1024)
+        app.config.setdefault("MODEL_CACHE_LOCAL_TTL", 5)
+        self.timeout = app.config["MODEL_CACHE_TIMEOUT"]
+        self.local = LocalLRU(
+            app.config["MODEL_CACHE_LOCAL_SIZE"], app.config["MODEL_CACHE_LOCAL_TTL"]
+        )
+        app.extensions["model_cache"] = self
+
+    @staticmethod
+    def is_cached(model) -> bool:
+        return getattr(model, "__cache_keys__", None) is not None
+
+    def active(self, model) -> bool:
+        if not self.is_cached(model) or not has_app_context():
+            return False
+        return bool(current_app.config.get("MODEL_CACHE_ENABLED", False))
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "local_size": len(self.local),
+        }
+
+    # versions
+
+    @staticmethod
+    def _version_key(table: str) -> str:
+        return f"model:{table}:version"
+
+    def version(self, table: str):
+        """Current version of ``table``, raises ``CACHE_ERRORS`` on an outage."""
+        key = self._version_key(table)
+        version = self.local.get(key)
+        if version is None:
+            version = self.cache.get(key)
+            if version is None:
+                # start from the clock so a lost counter never reuses old versions
+                self.cache.add(key, time.time_ns() // 1000, timeout=0)
+                version = self.cache.get(key)
+            self.local.set(key, version)
+        return version
+
+    def bump(self, table: str) -> None:
+        """New version of ``table``, after its rows changed.
+
+        Runs after the commit succeeded: a cache outage is logged, not raised,
+        and the rows of this process are dropped. Other processes read the old
+        rows until ``MODEL_CACHE_TIMEOUT`` expires them.
+        """
+        key = self._version_key(table)
+        self.local.discard(lambda k: k.startswith(f"model:{table}:"))
+        try:
+            # flask_caching does not proxy ``inc``, the backend has it
+            version = self.cache.cache.inc(key)
+        except CACHE_ERRORS:
+            logger.exception("could not bump the cached version of %s", table)
+            return
+        if version is not None:
+            self.local.set(key, version)
+
+    def mark_dirty(self, session, table) -> None:
+        """Record a write to ``table``, its version is bumped once the session commits."""
+        session.info.setdefault(self.info_key, set()).add(table.name)
+
+    def after_commit(self, session) -> None:
+        tables = session.info.pop(self.info_key, None)
+        enabled = has_app_context() and current_app.config.get("MODEL_CACHE_ENABLED")
+        if tables and enabled:
+            for table in tables:
+                self.bump(table)
+
+    # rows
+
+    @staticmethod
+    def _key(table: str, version, field: str, value) -> str:
+        return f"model:{table}:{version}:{field}:{value}"
+
+    @staticmethod
+    def _columns(mapper) -> tuple:
+        """Keys of the column attributes stored for ``mapper``, resolved once."""
+        model = mapper.class_
+        keys = model.__dict__.get("__cache_columns__")
+        if keys is None:
+            exclude = set(getattr(model, "__cache_exclude__", ()))
+            keys = tuple(
+                prop.key
+                for prop in mapper.column_attrs
+                if not prop.deferred and prop.key not in exclude
+            )
+            model.__cache_columns__ = keys
+        return keys
+
+    @classmethod
+    def _dump(cls, obj):
+        state = sa.inspect(obj)
+        keys = cls._columns(state.mapper)
+        if state.unloaded.intersection(keys):
+            return None
+        return tuple(state.dict[key] for key in keys)
+
+    @classmethod
+    def _load(cls, model, session, values):
+        mapper = sa.inspect(model)
+        row = dict(zip(cls._columns(mapper), values))
+        pk = [row[mapper.get_property_by_column(c).key] for c in mapper.primary_key]
+        obj = session.identity_map.get(mapper.identity_key_from_primary_key(pk))
+        if obj is not None:
+            return obj
+        obj = mapper.class_manager.new_instance()
+        for key, value in row.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return session.merge(obj, load=False)
+
+    def get(self, model, session, field: str, value, loader):
+        """Return the instance with ``field == value``, calling ``loader`` on a miss.
+
+        A cache outage is logged and the row is loaded from the database.
+        Tables the session wrote to but did not commit yet are neither read
+        from nor stored in the cache: the cached rows predate the write and
+        the loaded ones may be rolled back.
+        """
+        if not self.active(model):
+            return loader()
+
+        table = model.__table__.name
+        if table in session.info.get(self.info_key, ()):
+            return loader()
+        try:
+            version = self.version(table)
+            key = self._key(table, version, field, value)
+            values = self.local.get(key)
+            if values is not None:
+                self.local_hits += 1
+            else:
+                values = self.cache.get(key)
+                if values is not None:
+                    self.remote_hits += 1
+                    self.local.set(key, values)
+        except CACHE_ERRORS:
+            logger.exception("could not read the cached rows of %s", table)
+            self.misses += 1
+            return loader()
+        if values is not None:
+            return self._load(model, session, values)
+
+        self.misses += 1
+        # a replica may lag behind the version read above, fill from the primary
+        with primary_reads(session):
+            obj = loader()
+        if obj is not None:
+            # keep the version read before loading, a concurrent bump wins
+            self.store(obj, version)
+        return obj
+
+    def store(self, obj, version) -> None:
+        values = self._dump(obj)
+        if values is None:
+            return
+        model = type(obj)
+        table = model.__table__.name
+        mapping = {}
+        for field in ("id",) + tuple(model.__cache_keys__):
+            mapping[self._key(table, version, field, getattr(obj, field))] = values
+        try:
+            self.cache.set_many(mapping, timeout=self.timeout)
+        except CACHE_ERRORS:
+            logger.exception("could not cache a row of %s", table)
+            return
+        for key in mapping:
+            self.local.set(key, values)
@@ -6,13 +6,23 @@ __author__ = "SamSa"
 
 import datetime
 import decimal
+import inspect
 import uuid
 
-from flask import jsonify
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+import sqlalchemy as sa
+from flask import current_app, jsonify, request, stream_with_context
 from flask.json.provider import DefaultJSONProvider
+from flask.views import MethodView
 from sqlalchemy.engine.result import ScalarResult
 from {{cookiecutter.app_name}}.database import PkModel
+from {{cookiecutter.app_name}}.extensions import async_db, db
 from {{cookiecutter.app_name}}.initialization.exception import CODE
+from {{cookiecutter.app_name}}.utils.utils import cached_schema
 
 
 class JsonEncoder(DefaultJSONProvider):
@@ -32,12 +42,14 @@ class JsonEncoder(DefaultJSONProvider):
             return str(obj)
         elif isinstance(obj, ScalarResult):
             return tuple(obj)
+        elif isinstance(obj, sa.Row):
+            return obj._asdict()
         elif isinstance(obj, PkModel):
-            return obj.to_dict()
+            return obj.serializer().dump(obj)
         elif isinstance(obj, bytes):
             return obj.decode()
         elif hasattr(obj, "tolist"):
-            return obj.to_list()
+            return obj.tolist()
         elif hasattr(obj, "__getitem__"):
             cls = list if isinstance(obj, (list, tuple)) else dict
             return cls(obj)
@@ -47,6 +59,180 @@ class JsonEncoder(DefaultJSONProvider):
             return super().default(obj)
 
 
+def _iterable(obj):
+    return tuple(item for item in obj)
+
+
+class FastJsonProvider(JsonEncoder):
+    """JSON provider resolving ``default`` through a per-type dispatch table.
+
+    Converters are looked up by the exact type of the object. The first
+    object of an unknown type walks its MRO (then the ``tolist`` /
+    ``__getitem__`` / ``__iter__`` fallbacks of :class:`JsonEncoder`) once and
+    the converter found is cached for that type. Encoding is done by orjson
+    when it is installed, with the stdlib ``json`` as fallback for the
+    ``json.dumps`` arguments orjson has no option for and for the documents
+    orjson rejects (e.g. integers wider than 64 bits); the output formats
+    are the ones of :class:`JsonEncoder` either way.
+
+    Select it with ``JSON_PROVIDER_CLASS`` in the settings.
+    """
+
+    converters = {
+        datetime.datetime: lambda obj: obj.strftime("%Y-%m-%d %H:%M:%S"),
+        datetime.date: lambda obj: obj.strftime("%Y-%m-%d"),
+        datetime.time: lambda obj: obj.isoformat(),
+        datetime.timedelta: str,
+        decimal.Decimal: float,
+        uuid.UUID: str,
+        bytes: bytes.decode,
+        ScalarResult: tuple,
+        sa.Row: lambda obj: obj._asdict(),
+        PkModel: lambda obj: obj.serializer().dump(obj),
+    }
+
+    @classmethod
+    def _resolve(cls, kind):
+        for base in kind.__mro__:
+            converter = cls.converters.get(base)
+            if converter is not None:
+                return converter
+        if hasattr(kind, "tolist"):
+            return lambda obj: obj.tolist()
+        if hasattr(kind, "__getitem__"):
+            return list if issubclass(kind, (list, tuple)) else dict
+        if hasattr(kind, "__iter__"):
+            return _iterable
+        return DefaultJSONProvider.default
+
+    @classmethod
+    def default(cls, obj):
+        dispatch = cls.__dict__.get("_dispatch")
+        if dispatch is None:
+            dispatch = {}
+            setattr(cls, "_dispatch", dispatch)
+        kind = type(obj)
+        converter = dispatch.get(kind)
+        if converter is None:
+            converter = dispatch[kind] = cls._resolve(kind)
+        return converter(obj)
+
+    def _orjson_option(self, kwargs: dict):
+        """The orjson ``option`` doing what the ``json.dumps`` ``kwargs`` do, or ``None``.
+
+        ``response()`` always passes ``indent=2`` or the compact separators,
+        both map to orjson. Non ASCII characters are written as UTF-8 whatever
+        ``ensure_ascii`` is, the document decodes the same.
+        """
+        kwargs = dict(kwargs)
+        kwargs.pop("ensure_ascii", None)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.pop("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        indent = kwargs.pop("indent", None)
+        separators = kwargs.pop("separators", None)
+        if kwargs:
+            return None
+        if indent is None and separators in (None, (",", ":")):
+            return option
+        if indent == 2 and separators in (None, (",", ": ")):
+            return option | orjson.OPT_INDENT_2
+        return None
+
+    def dumps(self, obj, **kwargs):
+        option = None if orjson is None else self._orjson_option(kwargs)
+        if option is None:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
 def json_response(data=None, code=CODE.OK.code, error=None):
 
-    return jsonify(locals())
\ No newline at end of file
+    return jsonify(locals())
+
+
+def _selects_entity(stmt) -> bool:
+    """Whether ``stmt`` selects one mapped entity, e.g. ``select(User)``."""
+    descriptions = stmt.column_descriptions
+    if len(descriptions) != 1:
+        return False
+    entity = descriptions[0]["entity"]
+    return entity is not None and descriptions[0]["expr"] is entity
+
+
+def stream_json_response(
+    rows,
+    schema=None,
+    code=CODE.OK.code,
+    error=None,
+    session=None,
+    yield_per: int = 500,
+):
+    """Stream a ``json_response`` style ``{data, code, error}`` envelope.
+
+    ``rows`` is any iterable or a ``select()``; a select is executed lazily with
+    ``yield_per`` so only one batch of rows is in memory at a time. A select of
+    one entity yields its instances, any other select yields a
+    ``{column: value}`` dict per row. Each row is dumped with ``schema`` (a
+    marshmallow schema class or instance) if given, and the body is sent
+    chunked, one batch of rows per chunk.
+    """
+    if isinstance(schema, type):
+        schema = cached_schema(schema)
+    dumps = current_app.json.dumps
+
+    def generate():
+        if isinstance(rows, sa.Select):
+            stmt = rows.execution_options(yield_per=yield_per)
+            result = (session or db.session).execute(stmt)
+            if _selects_entity(rows):
+                items = result.scalars()
+            else:
+                items = (row._asdict() for row in result)
+        else:
+            items = rows
+
+        chunk = ['{"data": [']
+        for index, row in enumerate(items):
+            if index:
+                chunk.append(",")
+            chunk.append(dumps(schema.dump(row) if schema is not None else row))
+            if len(chunk) >= 2 * yield_per:
+                yield "".join(chunk)
+                chunk = []
+        chunk.append(f'], "code": {dumps(code)}, "error": {dumps(error)}}}')
+        yield "".join(chunk)
+
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype="application/json"
+    )
+
+
+class AsyncMethodView(MethodView):
+    """``MethodView`` whose handlers may be coroutines.
+
+    Flask runs the dispatch in an event loop (``flask[async]``), the handler
+    uses ``Model.aio`` and the task's ``AsyncSession`` is closed once the
+    response is built, like ``db.session`` on teardown.
+    """
+
+    async def dispatch_request(self, **kwargs):
+        meth = getattr(self, request.method.lower(), None)
+        if meth is None and request.method == "HEAD":
+            meth = getattr(self, "get", None)
+        assert meth is not None, f"Unimplemented method {request.method!r}"
+        try:
+            rv = meth(**kwargs)
+            if inspect.isawaitable(rv):
+                rv = await rv
+            return rv
+        finally:
+            await async_db.remove()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Objects and views built on first use, for a faster app start."""
+import threading
+
+from werkzeug.utils import cached_property, import_string
+
+
+class LazyObject(object):
+    """Stand-in for ``import_string(import_name)(*args, **kwargs)``.
+
+    The module is imported and the object built on first attribute access,
+    so an extension the process never uses costs nothing at startup.
+    Callbacks given to :meth:`when_loaded` run on the object once it exists.
+    """
+
+    def __init__(self, import_name: str, *args, **kwargs):
+        object.__setattr__(self, "_import_name", import_name)
+        object.__setattr__(self, "_args", (args, kwargs))
+        object.__setattr__(self, "_obj", None)
+        object.__setattr__(self, "_callbacks", {})
+        object.__setattr__(self, "_lock", threading.RLock())
+
+    @property
+    def __wrapped__(self):
+        obj = self._obj
+        if obj is None:
+            with self._lock:
+                obj = self._obj
+                if obj is None:
+                    args, kwargs = self._args
+                    obj = import_string(self._import_name)(*args, **kwargs)
+                    object.__setattr__(self, "_obj", obj)
+                    for callback in self._callbacks.values():
+                        callback(obj)
+        return obj
+
+    @property
+    def loaded(self) -> bool:
+        return self._obj is not None
+
+    def when_loaded(self, callback, key=None) -> None:
+        """Run ``callback(obj)`` now if loaded, else when it is.
+
+        A later callback with the same ``key`` replaces the pending one.
+        """
+        with self._lock:
+            if self._obj is not None:
+                callback(self._obj)
+            else:
+                self._callbacks[key or callback] = callback
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.__wrapped__, name, value)
+
+    def __call__(self, *args, **kwargs):
+        return self.__wrapped__(*args, **kwargs)
+
+    def __repr__(self):
+        if self._obj is None:
+            return f"<LazyObject {self._import_name} (not loaded)>"
+        return repr(self._obj)
+
+
+def load(obj):
+    """The object behind the :class:`LazyObject` ``obj``, built now if needed."""
+    if isinstance(obj, LazyObject):
+        return obj.__wrapped__
+    return obj
+
+
+class LazyView(object):
+    """View function importing its ``MethodView`` on the first request.
+
+    ``methods`` are the ones the view implements, Flask needs them to build
+    the rule before the view exists.
+    """
+
+    def __init__(self, import_name: str, endpoint: str, methods):
+        self.import_name = import_name
+        self.__name__ = endpoint
+        self.methods = tuple(methods)
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name).as_view(self.__name__)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def load_views(app) -> None:
+    """Import every lazy view of ``app`` now, e.g. before forking workers."""
+    for view in app.view_functions.values():
+        if isinstance(view, LazyView):
+            view.view
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""Queue-based logging pipeline, files are written by one thread per process."""
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    WatchedFileHandler,
+)
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(filename)s:%(funcName)s:[line:%(lineno)d] - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        created = datetime.datetime.fromtimestamp(record.created).astimezone()
+        data = {
+            "ts": created.isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "location": f"{record.filename}:{record.funcName}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a ``rate`` of the records under WARNING of the hot loggers.
+
+    ``rates`` maps logger names to the kept fraction, ``{"sqlalchemy.engine":
+    0.1}``; a name covers its children like ``logging.Filter``.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return random.random() < rate
+            name = name.rpartition(".")[0]
+        return True
+
+
+class _NamesFilter(logging.Filter):
+    """Pass the records of any of ``names`` and their children."""
+
+    def __init__(self):
+        super().__init__()
+        self.names = set()
+
+    def filter(self, record):
+        name = record.name
+        while name:
+            if name in self.names:
+                return True
+            name = name.rpartition(".")[0]
+        return False
+
+
+class _QueueHandler(QueueHandler):
+    def __init__(self, pipeline):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+        # render the message and traceback here, the arguments may not
+        # survive until the listener thread gets to them
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline.dropped += 1
+
+
+class _QueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # blocking, the queue may be full and the thread is draining it
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline(object):
+    """Logging without I/O in the calling thread.
+
+    Loggers get a ``QueueHandler`` that only renders the record and puts it on
+    a bounded queue; one ``QueueListener`` thread per process writes the
+    files. When the queue is full (``LOG_QUEUE_SIZE``) records are dropped and
+    counted instead of blocking a request.
+
+    * ``LOG_FORMAT``: ``"text"`` or ``"json"`` (one object per line);
+    * ``LOG_SAMPLING``: kept fraction of the records under WARNING of hot
+      loggers, see :class:`SamplingFilter`;
+    * ``LOG_ROTATION``: ``"size"`` rotates at ``LOG_MAX_BYTES``, which is only
+      safe with one process per file; ``"external"`` reopens the file when
+      logrotate (or anything else) moved it, for several workers writing the
+      same file.
+
+    The listener is restarted in forked children and flushed at exit.
+
+    Under the gevent worker ``threading`` is monkey-patched, so the listener
+    is a greenlet and its file writes still block the hub while they run;
+    only the formatting and the handler locks leave the request greenlets.
+    It is not moved to a native thread: the queue and its locks are gevent
+    ones too and cannot be waited on from outside the hub.
+    """
+
+    def __init__(self):
+        self.format = "text"
+        self.rotation = "size"
+        self.max_bytes = 50 * 1024 * 1024
+        self.backup_count = 10
+        self.sampling = {}
+        self.queue_size = 10000
+        self.dropped = 0
+        self.queue = queue.Queue(self.queue_size)
+        self.listener = None
+        self._file_handlers = {}
+        self._stream_handler = None
+        self._queue_handlers = []
+        self._lock = threading.RLock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.stop)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault("LOG_FORMAT", "text")
+        config.setdefault("LOG_ROTATION", "size")
+        config.setdefault("LOG_MAX_BYTES", 50 * 1024 * 1024)
+        config.setdefault("LOG_BACKUP_COUNT", 10)
+        config.setdefault("LOG_SAMPLING", {})
+        config.setdefault("LOG_QUEUE_SIZE", 10000)
+        with self._lock:
+            self.format = config["LOG_FORMAT"]
+            self.rotation = config["LOG_ROTATION"]
+            self.max_bytes = int(config["LOG_MAX_BYTES"])
+            self.backup_count = int(config["LOG_BACKUP_COUNT"])
+            self.sampling = dict(config["LOG_SAMPLING"])
+            for handler in self._queue_handlers:
+                handler.filters = [SamplingFilter(self.sampling)]
+            if int(config["LOG_QUEUE_SIZE"]) != self.queue_size:
+                self.queue_size = int(config["LOG_QUEUE_SIZE"])
+                self._replace_queue()
+        app.extensions["log_pipeline"] = self
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "dropped": self.dropped}
+
+    def attach(
+        self, logger, filename: str, stream: bool = False, formatted: bool = True
+    ):
+        """Send the records of ``logger`` to ``filename`` (and stderr) through the queue."""
+        with self._lock:
+            file_handler = self._file_handlers.get(filename)
+            if file_handler is None:
+                file_handler = self._file_handlers[filename] = self._make_file_handler(
+                    filename, formatted
+                )
+                self._restart()
+            _add_name(file_handler, logger.name)
+            if stream:
+                if self._stream_handler is None:
+                    self._stream_handler = logging.StreamHandler()
+                    self._stream_handler.setFormatter(self._formatter(True))
+                    self._stream_handler.addFilter(_NamesFilter())
+                    self._restart()
+                _add_name(self._stream_handler, logger.name)
+            for handler in logger.handlers:
+                if isinstance(handler, _QueueHandler):
+                    break
+            else:
+                handler = _QueueHandler(self)
+                handler.addFilter(SamplingFilter(self.sampling))
+                self._queue_handlers.append(handler)
+                logger.addHandler(handler)
+            if self.listener is None:
+                self._restart()
+        logger.setLevel(logging.DEBUG)
+
+    def flush(self) -> None:
+        """Wait until every queued record is written."""
+        if self.listener is not None:
+            self.stop()
+            self._restart()
+
+    def stop(self) -> None:
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # a stream closed before us at exit, like logging.shutdown
+                    pass
+
+    def _formatter(self, formatted: bool):
+        if not formatted:
+            return logging.Formatter("%(message)s")
+        if self.format == "json":
+            return JsonFormatter()
+        return logging.Formatter(TEXT_FORMAT)
+
+    def _make_file_handler(self, filename: str, formatted: bool):
+        if self.rotation == "external":
+            handler = WatchedFileHandler(filename, delay=True)
+        else:
+            handler = RotatingFileHandler(
+                filename,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                delay=True,
+            )
+        handler.setFormatter(self._formatter(formatted))
+        handler.addFilter(_NamesFilter())
+        return handler
+
+    def _handlers(self) -> list:
+        handlers = list(self._file_handlers.values())
+        if self._stream_handler is not None:
+            handlers.append(self._stream_handler)
+        return handlers
+
+    def _restart(self) -> None:
+        with self._lock:
+            self.stop()
+            self.listener = _QueueListener(
+                self.queue, *self._handlers(), respect_handler_level=True
+            )
+            self.listener.start()
+
+    def _replace_queue(self) -> None:
+        self.stop()
+        self.queue = queue.Queue(self.queue_size)
+        for handler in self._queue_handlers:
+            handler.queue = self.queue
+        self._restart()
+
+    def _after_fork(self) -> None:
+        # the listener thread does not survive the fork and the queue lock may
+        # have been held by it
+        self.listener = None
+        self._lock = threading.RLock()
+        if self._queue_handlers:
+            self._replace_queue()
+
+
+def _add_name(handler, name: str) -> None:
+    for filter_ in handler.filters:
+        if isinstance(filter_, _NamesFilter):
+            filter_.names.add(name)
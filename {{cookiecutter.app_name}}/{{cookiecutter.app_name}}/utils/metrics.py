@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""Prometheus metrics of the requests, the database pool, the model cache and Celery."""
+import logging
+import os
+import shutil
+import threading
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover
+    prometheus_client = None  # type: ignore
+
+from flask import Response, current_app, g, request
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# seconds, from a fast cached read to a slow report
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _build_metrics() -> dict:
+    """The process wide collectors, registered once whatever the app count."""
+    with _metrics_lock:
+        if _metrics:
+            return _metrics
+        from prometheus_client import Gauge, Histogram
+
+        _metrics.update(
+            request_latency=Histogram(
+                "http_request_duration_seconds",
+                "Latency of the requests by URL rule.",
+                ("method", "rule", "status"),
+                buckets=LATENCY_BUCKETS,
+            ),
+            in_flight=Gauge(
+                "http_requests_in_progress",
+                "Requests being served.",
+                ("method", "rule"),
+                multiprocess_mode="livesum",
+            ),
+            pool_size=Gauge(
+                "db_pool_size",
+                "Connections kept by the pool.",
+                ("bind",),
+                multiprocess_mode="livesum",
+            ),
+            pool_checked_out=Gauge(
+                "db_pool_checked_out",
+                "Connections in use.",
+                ("bind",),
+                multiprocess_mode="livesum",
+            ),
+            pool_overflow=Gauge(
+                "db_pool_overflow",
+                "Connections over the pool size.",
+                ("bind",),
+                multiprocess_mode="livesum",
+            ),
+            pool_checkouts=Gauge(
+                "db_pool_checkouts",
+                "Checkouts since the process started.",
+                ("bind",),
+                multiprocess_mode="sum",
+            ),
+            pool_connect_seconds=Gauge(
+                "db_pool_connect_seconds",
+                "Time spent opening connections since the process started.",
+                ("bind",),
+                multiprocess_mode="sum",
+            ),
+            cache_requests=Gauge(
+                "model_cache_requests",
+                "Model cache reads since the process started, by result.",
+                ("result",),
+                multiprocess_mode="sum",
+            ),
+            task_runtime=Histogram(
+                "celery_task_runtime_seconds",
+                "Run time of the Celery tasks.",
+                ("task", "state"),
+                buckets=TASK_BUCKETS,
+            ),
+            task_queue_wait=Histogram(
+                "celery_task_queue_wait_seconds",
+                "Time between the publication of a task and its start.",
+                ("task",),
+                buckets=TASK_BUCKETS,
+            ),
+        )
+        return _metrics
+
+
+class Metrics(object):
+    """Prometheus metrics of the app, served on ``METRICS_PATH``.
+
+    * request latency histograms and in-flight gauges by URL rule (the rule
+      pattern, never the raw path, to keep the label set bounded);
+    * the pool counters of ``initialization.session`` and the hit counts of
+      ``utils.cache.ModelCache``, refreshed at most every
+      ``METRICS_REFRESH_INTERVAL`` seconds by each process;
+    * Celery task run time and queue wait, see :meth:`init_celery` and
+      :meth:`init_worker`.
+
+    Under gunicorn every worker writes its values in ``PROMETHEUS_MULTIPROC_DIR``
+    (set before the first import of ``prometheus_client``, as ``gunicorn.py``
+    does) and the endpoint adds them up, so a scrape sees the whole server
+    whichever worker serves it. Without ``prometheus_client`` installed, or
+    with ``METRICS_ENABLED`` off (the default), nothing is registered. The
+    endpoint has no authentication, keep it off the public routes.
+    """
+
+    def __init__(self):
+        self.metrics = None
+        self.interval = 5.0
+        self._next_refresh = 0.0
+        self._task_starts = {}
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", False)
+        app.config.setdefault("METRICS_PATH", "/metrics")
+        app.config.setdefault("METRICS_REFRESH_INTERVAL", 5)
+        app.config.setdefault("METRICS_WORKER_PORT", 9808)
+        if not app.config["METRICS_ENABLED"]:
+            return
+        if prometheus_client is None:
+            logger.warning("prometheus_client is not installed, metrics are disabled")
+            return
+        self.metrics = _build_metrics()
+        self.interval = float(app.config["METRICS_REFRESH_INTERVAL"])
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(app.config["METRICS_PATH"], "metrics", self.export)
+        app.extensions["metrics"] = self
+
+    @staticmethod
+    def _labels():
+        rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        return request.method, rule
+
+    def _before_request(self):
+        labels = self._labels()
+        self.metrics["in_flight"].labels(*labels).inc()
+        g._metrics_request = (labels, time.perf_counter())
+
+    def _after_request(self, response):
+        started = g.get("_metrics_request")
+        if started is not None:
+            labels, start = started
+            self.metrics["request_latency"].labels(
+                *labels, str(response.status_code)
+            ).observe(time.perf_counter() - start)
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return response
+
+    def _teardown_request(self, exc):
+        started = g.pop("_metrics_request", None)
+        if started is not None:
+            self.metrics["in_flight"].labels(*started[0]).dec()
+
+    def refresh(self, app=None) -> None:
+        """Copy the pool and cache counters of this process into the gauges."""
+        app = app or current_app
+        self._next_refresh = time.monotonic() + self.interval
+        metrics = self.metrics
+        lifecycle = app.extensions.get("session_lifecycle")
+        if lifecycle is not None:
+            for bind_key, stats in lifecycle.stats().items():
+                bind = bind_key or "default"
+                for name, key in (
+                    ("pool_size", "size"),
+                    ("pool_checked_out", "checkedout"),
+                    ("pool_overflow", "overflow"),
+                    ("pool_checkouts", "checkouts"),
+                    ("pool_connect_seconds", "connect_seconds"),
+                ):
+                    if key in stats:
+                        metrics[name].labels(bind).set(stats[key])
+        model_cache = app.extensions.get("model_cache")
+        if model_cache is not None:
+            stats = model_cache.stats()
+            for result in ("local_hits", "remote_hits", "misses"):
+                metrics["cache_requests"].labels(result).set(stats[result])
+
+    def export(self):
+        """The ``METRICS_PATH`` view."""
+        self.refresh()
+        if os.environ.get(MULTIPROC_ENV):
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(
+            prometheus_client.generate_latest(registry),
+            mimetype=prometheus_client.CONTENT_TYPE_LATEST,
+        )
+
+    # celery
+
+    def init_celery(self) -> None:
+        """Stamp the tasks sent by this process and time the ones it runs.
+
+        Called when the Celery app is configured, in web and worker processes
+        alike, see ``initialization``.
+        """
+        if self.metrics is None:
+            return
+        from celery import signals
+
+        signals.before_task_publish.connect(self._on_publish, weak=False)
+        signals.task_prerun.connect(self._on_prerun, weak=False)
+        signals.task_postrun.connect(self._on_postrun, weak=False)
+
+    @staticmethod
+    def _on_publish(headers=None, **kwargs):
+        if headers is not None:
+            headers.setdefault("published_at", time.time())
+
+    def _on_prerun(self, task_id=None, task=None, **kwargs):
+        self._task_starts[task_id] = time.perf_counter()
+        published_at = getattr(task.request, "published_at", None)
+        if published_at is not None:
+            self.metrics["task_queue_wait"].labels(task.name).observe(
+                max(0.0, time.time() - float(published_at))
+            )
+
+    def _on_postrun(self, task_id=None, task=None, state=None, **kwargs):
+        start = self._task_starts.pop(task_id, None)
+        if start is not None:
+            self.metrics["task_runtime"].labels(task.name, state or "UNKNOWN").observe(
+                time.perf_counter() - start
+            )
+
+    def init_worker(self, port: int) -> None:
+        """Serve the metrics of a Celery worker on ``port``, call it in the Celery app module.
+
+        The pool processes write their values in ``PROMETHEUS_MULTIPROC_DIR``,
+        emptied when the worker starts, and the main process serves their sum.
+        """
+        if self.metrics is None:
+            return
+        from celery import signals
+
+        def start_exporter(**kwargs):
+            self._start_exporter(port)
+
+        signals.worker_init.connect(start_exporter, weak=False)
+        signals.worker_process_shutdown.connect(self._on_process_shutdown, weak=False)
+
+    @staticmethod
+    def _start_exporter(port: int) -> None:
+        path = os.environ.get(MULTIPROC_ENV)
+        if path:
+            # values left by a previous worker would be added to the new ones
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        prometheus_client.start_http_server(port, registry=registry)
+
+    def _on_process_shutdown(self, pid=None, **kwargs):
+        self.mark_process_dead(pid or os.getpid())
+
+    @staticmethod
+    def mark_process_dead(pid: int) -> None:
+        """Drop the live gauges of a dead worker, gunicorn ``child_exit``."""
+        if prometheus_client is not None and os.environ.get(MULTIPROC_ENV):
+            multiprocess.mark_process_dead(pid)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Detection of repeated lazy relationship loads within a request."""
+import collections
+import logging
+from weakref import WeakKeyDictionary
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+class LazyLoadMonitor(object):
+    """Counts the lazy relationship loads of each request, a dev/test aid.
+
+    Every lazy load is counted by ``"Parent.Target"``; when one of them runs
+    more than ``NPLUSONE_THRESHOLD`` times in a request it is reported once,
+    logged or raised as :class:`NPlusOneError` with ``NPLUSONE_RAISE``. The
+    fix is a load profile, see ``ExtendMixin.load_profile``.
+
+    Only apps with ``NPLUSONE_ENABLED`` are watched.
+    """
+
+    def __init__(self):
+        self._settings = WeakKeyDictionary()
+        self.lazy_loads = 0
+        self.violations = 0
+
+    def init_app(self, app):
+        app.config.setdefault("NPLUSONE_ENABLED", False)
+        app.config.setdefault("NPLUSONE_THRESHOLD", 10)
+        app.config.setdefault("NPLUSONE_RAISE", False)
+        if not app.config["NPLUSONE_ENABLED"]:
+            self._settings.pop(app, None)
+            return
+        self._settings[app] = (
+            int(app.config["NPLUSONE_THRESHOLD"]),
+            bool(app.config["NPLUSONE_RAISE"]),
+        )
+        if not sa.event.contains(Session, "do_orm_execute", self._on_execute):
+            sa.event.listen(Session, "do_orm_execute", self._on_execute)
+        app.extensions["nplusone"] = self
+
+    def stats(self) -> dict:
+        return {"lazy_loads": self.lazy_loads, "violations": self.violations}
+
+    @staticmethod
+    def counts() -> collections.Counter:
+        """``{"Parent.Target": lazy loads}`` of the current request."""
+        return g.setdefault("_lazy_loads", collections.Counter())
+
+    def _on_execute(self, state):
+        if not state.is_select or not has_request_context():
+            return
+        parent = state.lazy_loaded_from
+        if parent is None:
+            return
+        settings = self._settings.get(current_app._get_current_object())
+        if settings is None:
+            return
+        threshold, raise_error = settings
+        key = f"{parent.class_.__name__}.{state.bind_mapper.class_.__name__}"
+        counts = self.counts()
+        counts[key] += 1
+        self.lazy_loads += 1
+        if counts[key] != threshold + 1:
+            return
+        self.violations += 1
+        message = (
+            f"{key} lazy loaded more than {threshold} times in "
+            f"{request.method} {request.path}, use a load profile"
+        )
+        if raise_error:
+            raise NPlusOneError(message)
+        logger.warning(message)
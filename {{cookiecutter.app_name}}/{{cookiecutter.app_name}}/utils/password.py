@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Password hashing on a bounded pool of worker threads."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from gevent import monkey as gevent_monkey
+    from gevent.threadpool import ThreadPool as GeventThreadPool
+except ImportError:  # pragma: no cover
+    gevent_monkey = GeventThreadPool = None
+
+
+def _gevent_patched() -> bool:
+    return gevent_monkey is not None and gevent_monkey.is_module_patched("threading")
+
+
+class PasswordHasher(object):
+    """bcrypt hashing and verification off the request greenlet.
+
+    bcrypt releases the GIL, so the work runs in a bounded pool of native
+    threads: a gevent ``ThreadPool`` when the worker is monkey patched (the
+    calling greenlet waits, the hub keeps serving), a ``ThreadPoolExecutor``
+    otherwise. Every hash uses the fixed cost ``BCRYPT_LOG_ROUNDS``;
+    ``needs_rehash`` tells when a stored hash was made with another cost.
+    The pool size is ``PASSWORD_POOL_SIZE``.
+    """
+
+    def __init__(self, bcrypt=None):
+        self.bcrypt = bcrypt
+        self.rounds = 12
+        self.size = 4
+        self._pool = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+        if hasattr(os, "register_at_fork"):
+            # pool threads do not survive a fork, children build their own
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_POOL_SIZE", 4)
+        self.rounds = int(app.config.get("BCRYPT_LOG_ROUNDS", 12))
+        self.size = int(app.config["PASSWORD_POOL_SIZE"])
+        app.extensions["password_hasher"] = self
+
+    def _reset_stats(self):
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _after_fork(self):
+        self._pool = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def stats(self) -> dict:
+        """Queue depth, running jobs and hash latency of this process."""
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "seconds": self.seconds,
+            "max_seconds": self.max_seconds,
+            "pool_size": self.size,
+        }
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if _gevent_patched():
+                        self._pool = GeventThreadPool(self.size)
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            self.size, thread_name_prefix="bcrypt"
+                        )
+        return self._pool
+
+    def _timed(self, fn, *args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` in the pool and wait for its result."""
+        pool = self._get_pool()
+        with self._lock:
+            self.queued += 1
+        if isinstance(pool, ThreadPoolExecutor):
+            return pool.submit(self._timed, fn, *args).result()
+        return pool.apply(self._timed, (fn,) + args)
+
+    def hash(self, password: str) -> str:
+        return self.run(
+            self.bcrypt.generate_password_hash, password, self.rounds
+        ).decode()
+
+    def check(self, hashed: str, password: str) -> bool:
+        if not hashed:
+            return False
+        return self.run(self.bcrypt.check_password_hash, hashed, password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when ``hashed`` was not made with the configured cost."""
+        # $2b$<cost>$<salt and hash>
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Redis client extension sharing one connection pool per process."""
+import os
+
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+
+class FlaskRedis(object):
+    """The redis client of the app, ``app.redis``.
+
+    Every consumer of a process shares one ``BlockingConnectionPool``: when
+    the ``REDIS_MAX_CONNECTIONS`` connections are busy a caller waits up to
+    ``REDIS_POOL_TIMEOUT`` seconds for one to come back, which only blocks the
+    calling greenlet under gevent, instead of failing. Commands are retried
+    with exponential backoff on connection errors and idle connections are
+    health checked before use. The pool is reset in forked children, so a
+    connection is never shared between a gunicorn/celery master and its
+    workers.
+
+    Attribute access is proxied to the ``redis.Redis`` client.
+    """
+
+    def __init__(self, app=None):
+        self.pool = None
+        self.client = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.reset)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault(
+            "REDIS_URL",
+            "redis://%s:%s/%s"
+            % (
+                config.get("REDIS_HOST", "localhost"),
+                config.get("REDIS_PORT", 6379),
+                config.get("REDIS_RESULTS_DB", 0),
+            ),
+        )
+        config.setdefault("REDIS_MAX_CONNECTIONS", 50)
+        config.setdefault("REDIS_POOL_TIMEOUT", 5)
+        config.setdefault("REDIS_SOCKET_TIMEOUT", 5)
+        config.setdefault("REDIS_HEALTH_CHECK_INTERVAL", 30)
+        config.setdefault("REDIS_RETRIES", 3)
+
+        self.pool = redis.BlockingConnectionPool.from_url(
+            config["REDIS_URL"],
+            max_connections=int(config["REDIS_MAX_CONNECTIONS"]),
+            timeout=config["REDIS_POOL_TIMEOUT"],
+            socket_timeout=config["REDIS_SOCKET_TIMEOUT"],
+            socket_connect_timeout=config["REDIS_SOCKET_TIMEOUT"],
+            health_check_interval=config["REDIS_HEALTH_CHECK_INTERVAL"],
+            retry=Retry(ExponentialBackoff(cap=1, base=0.05), config["REDIS_RETRIES"]),
+            retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+        )
+        self.client = redis.Redis(connection_pool=self.pool)
+        app.redis = self
+        app.extensions["redis"] = self
+
+    def reset(self):
+        """Drop the connections inherited from a parent, without closing them."""
+        if self.pool is not None:
+            self.pool.reset()
+
+    def disconnect(self):
+        """Close the connections of this process, e.g. in a master before it forks."""
+        if self.pool is not None:
+            self.pool.disconnect()
+
+    def __getattr__(self, name):
+        client = self.__dict__.get("client")
+        if client is None:
+            raise AttributeError(name)
+        return getattr(client, name)
+
+    def get_many(self, keys) -> list:
+        """Values of ``keys`` in one round-trip, None for missing keys."""
+        keys = list(keys)
+        if not keys:
+            return []
+        return self.client.mget(keys)
+
+    def set_many(self, mapping: dict, ex=None) -> None:
+        """Set every ``{key: value}`` of ``mapping`` in one pipelined round-trip."""
+        if not mapping:
+            return
+        with self.client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ex)
+            pipe.execute()
+
+    def delete_many(self, keys) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        return self.client.delete(*keys)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Session routing reads to replica engines and writes to the primary."""
+import itertools
+from contextlib import contextmanager
+from weakref import WeakKeyDictionary
+
+import sqlalchemy as sa
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.orm import scoped_session
+from sqlalchemy.sql.base import Executable
+
+REPLICA_PREFIX = "replica_"
+
+
+class RoutingSession(Session):
+    """Session sending reads of the default bind to a replica.
+
+    A SELECT goes to one of the replica engines, round robin, unless:
+
+    * it locks rows (``with_for_update``);
+    * the session already wrote, so the rest of the request reads its own
+      writes from the primary, even after commit. A flush and any statement
+      other than a SELECT construct count as writes: DML, ``text()`` (raw
+      SQL may write whatever it says) and functions;
+    * it runs inside ``with db.use_primary():``.
+
+    Everything else, and every statement of a model with its own
+    ``__bind_key__``, uses the engine Flask-SQLAlchemy picks.
+    """
+
+    _counter = itertools.count()
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None:
+            return engine
+        engines = self._db.engines
+        if engine is not engines.get(None):
+            return engine
+        if clause is None:
+            return engine
+        if not clause.is_select or clause.is_text:
+            if isinstance(clause, Executable):
+                self.info["wrote"] = True
+            return engine
+        if self.info.get("wrote") or self.info.get("use_primary"):
+            return engine
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return engine
+        replicas = self._db.replicas
+        if not replicas:
+            return engine
+        return replicas[next(self._counter) % len(replicas)]
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """``SQLAlchemy`` with read replicas.
+
+    ``SQLALCHEMY_REPLICA_URIS`` lists the replica URIs. Their engines are
+    built with the default engine options, kept apart from the binds (no
+    metadata, never touched by ``create_all``) and used by
+    :class:`RoutingSession`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        session_options = kwargs.setdefault("session_options", {})
+        session_options.setdefault("class_", RoutingSession)
+        super().__init__(*args, **kwargs)
+        self._app_replicas = WeakKeyDictionary()
+
+    def init_app(self, app):
+        super().init_app(app)
+        for engine in self._app_replicas.pop(app, ()):
+            engine.dispose()
+        options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+        options.setdefault("echo", app.config.get("SQLALCHEMY_ECHO", False))
+        self._app_replicas[app] = [
+            sa.create_engine(uri, **options)
+            for uri in app.config.setdefault("SQLALCHEMY_REPLICA_URIS", [])
+        ]
+
+    @property
+    def replicas(self) -> list:
+        """Replica engines of the current app."""
+        return self._app_replicas.get(current_app._get_current_object(), [])
+
+    @property
+    def replica_engines(self) -> dict:
+        """``{"replica_<n>": engine}`` of the current app."""
+        return {
+            f"{REPLICA_PREFIX}{index}": engine
+            for index, engine in enumerate(self.replicas)
+        }
+
+    def use_primary(self):
+        """Send every statement of the current session to the primary."""
+        return primary_reads(self.session())
+
+
+@contextmanager
+def primary_reads(session):
+    """Send every statement of ``session`` to the primary, even SELECTs."""
+    if isinstance(session, scoped_session):
+        session = session()
+    info = session.info
+    info["use_primary"] = info.get("use_primary", 0) + 1
+    try:
+        yield
+    finally:
+        info["use_primary"] -= 1
+
+
+@sa.event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session, flush_context):
+    session.info["wrote"] = True
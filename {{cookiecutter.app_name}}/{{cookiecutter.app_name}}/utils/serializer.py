@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Column plans serializing model instances without per-call introspection."""
+from operator import attrgetter
+
+import sqlalchemy as sa
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def _converter(column_type):
+    """Return the JSON converter for a column type, None when values are native."""
+    if isinstance(column_type, sa.DateTime):
+        return lambda value: value.strftime(DATETIME_FORMAT)
+    if isinstance(column_type, sa.Date):
+        return lambda value: value.strftime(DATE_FORMAT)
+    if isinstance(column_type, sa.Time):
+        return lambda value: value.isoformat()
+    if isinstance(column_type, (sa.Interval, sa.Uuid)):
+        return str
+    if isinstance(column_type, sa.Numeric) and not isinstance(column_type, sa.Float):
+        return float
+    if isinstance(column_type, sa.LargeBinary):
+        return bytes.decode
+    return None
+
+
+class ModelSerializer(object):
+    """Column plan of a mapped class, resolved once.
+
+    Holds the column names, one ``attrgetter`` fetching every column attribute
+    and the JSON converters picked from the column types, so dumping a row is a
+    zip over precomputed lists.
+    """
+
+    def __init__(self, mapper):
+        props = list(mapper.column_attrs)
+        self.columns = [prop.columns[0] for prop in props]
+        self.names = [column.name for column in self.columns]
+        keys = [prop.key for prop in props]
+        getter = attrgetter(*keys)
+        # attrgetter returns a bare value for a single attribute
+        self._values = getter if len(keys) > 1 else lambda obj: (getter(obj),)
+        self._converters = [
+            (index, converter)
+            for index, converter in enumerate(_converter(c.type) for c in self.columns)
+            if converter is not None
+        ]
+
+    def to_dict(self, obj) -> dict:
+        """``{column name: value}`` with the raw attribute values."""
+        return dict(zip(self.names, self._values(obj)))
+
+    def dump(self, obj) -> dict:
+        """``{column name: value}`` with JSON ready values."""
+        values = list(self._values(obj))
+        for index, converter in self._converters:
+            value = values[index]
+            if value is not None:
+                values[index] = converter(value)
+        return dict(zip(self.names, values))
+
+    def dump_many(self, objs) -> list:
+        dump = self.dump
+        return [dump(obj) for obj in objs]
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Gunicorn tuning profiles sized from the CPUs of the host or container."""
+import math
+import os
+
+# imported by gunicorn.py in the master, before gevent patches anything:
+# keep this module free of the app and of third party imports
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# workers = cpus * workers_per_cpu + extra_workers
+PROFILES = {
+    # requests mostly wait on the database, redis or HTTP: one gevent worker
+    # per cpu, each serving many requests at once
+    "io": {
+        "worker_class": "gevent",
+        "workers_per_cpu": 1,
+        "extra_workers": 0,
+        "threads": 1,
+        "worker_connections": 1000,
+        "max_requests": 10000,
+    },
+    # requests mostly compute: one process per cpu, the extra one runs while
+    # another waits on I/O, threads would only fight over the GIL
+    "cpu": {
+        "worker_class": "sync",
+        "workers_per_cpu": 1,
+        "extra_workers": 1,
+        "threads": 1,
+        "worker_connections": 1000,
+        "max_requests": 1000,
+    },
+    # both: a few threads per process overlap the waits
+    "mixed": {
+        "worker_class": "gthread",
+        "workers_per_cpu": 1,
+        "extra_workers": 0,
+        "threads": 4,
+        "worker_connections": 1000,
+        "max_requests": 5000,
+    },
+}
+DEFAULT_PROFILE = "io"
+
+
+def _read(path: str) -> str:
+    with open(path) as f:
+        return f.read().strip()
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT):
+    """Number of CPUs the cgroup quota allows, ``None`` if unlimited.
+
+    The quota is what ``docker --cpus`` sets.
+    """
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, period = _read(os.path.join(root, "cpu.max")).split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1, a quota of -1 is unlimited
+        quota = int(_read(os.path.join(root, "cpu", "cpu.cfs_quota_us")))
+        period = int(_read(os.path.join(root, "cpu", "cpu.cfs_period_us")))
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def cpu_count(root: str = CGROUP_ROOT) -> int:
+    """Number of CPUs this process may use: affinity mask, then cgroup quota."""
+    if hasattr(os, "sched_getaffinity"):
+        count = len(os.sched_getaffinity(0))
+    else:
+        count = os.cpu_count() or 1
+    limit = cgroup_cpu_limit(root)
+    if limit:
+        count = min(count, max(1, math.ceil(limit)))
+    return max(1, count)
+
+
+def _env_int(environ, name: str, default: int) -> int:
+    value = environ.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+def resolve(environ=None, cpus: int = None) -> dict:
+    """Worker settings of the ``GUNICORN_PROFILE`` profile, sized for ``cpus``.
+
+    ``GUNICORN_WORKERS``, ``GUNICORN_THREADS``, ``GUNICORN_WORKER_CLASS``,
+    ``GUNICORN_WORKER_CONNECTIONS``, ``GUNICORN_MAX_REQUESTS`` and
+    ``GUNICORN_MAX_REQUESTS_JITTER`` override the profile. A worker is
+    restarted after ``max_requests`` plus up to ``max_requests_jitter``
+    requests, the jitter keeps them from restarting all at once.
+    """
+    environ = os.environ if environ is None else environ
+    name = environ.get("GUNICORN_PROFILE") or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(
+            f"unknown GUNICORN_PROFILE {name!r}, expected one of {', '.join(PROFILES)}"
+        )
+    profile = PROFILES[name]
+    if cpus is None:
+        cpus = cpu_count()
+
+    workers = cpus * profile["workers_per_cpu"] + profile["extra_workers"]
+    max_requests = _env_int(environ, "GUNICORN_MAX_REQUESTS", profile["max_requests"])
+    return {
+        "profile": name,
+        "cpus": cpus,
+        "worker_class": environ.get("GUNICORN_WORKER_CLASS") or profile["worker_class"],
+        "workers": max(1, _env_int(environ, "GUNICORN_WORKERS", workers)),
+        "threads": max(1, _env_int(environ, "GUNICORN_THREADS", profile["threads"])),
+        "worker_connections": _env_int(
+            environ, "GUNICORN_WORKER_CONNECTIONS", profile["worker_connections"]
+        ),
+        "max_requests": max_requests,
+        "max_requests_jitter": _env_int(
+            environ, "GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10
+        ),
+    }
+
+
+REPORTED_SETTINGS = (
+    "bind",
+    "worker_class",
+    "workers",
+    "threads",
+    "worker_connections",
+    "max_requests",
+    "max_requests_jitter",
+    "timeout",
+    "keepalive",
+    "preload_app",
+    "loglevel",
+)
+
+
+def report(cfg, profile: str, cpus: int) -> str:
+    """One line of the effective settings of a gunicorn ``cfg``."""
+    values = {name: getattr(cfg, name, None) for name in REPORTED_SETTINGS}
+    # cfg.worker_class is the loaded class, report the name it was given
+    values["worker_class"] = getattr(cfg, "worker_class_str", values["worker_class"])
+    settings = " ".join(f"{name}={value}" for name, value in values.items())
+    return f"profile={profile} cpus={cpus} {settings}"
@@ -4,6 +4,8 @@
 
 __author__ = "SamSa"
 
+from functools import lru_cache
+
 
 class AttrDict(dict):
     # 继承自dict，实现可以通过.来操作元素
@@ -18,3 +20,9 @@ class AttrDict(dict):
 
     def __delattr__(self, item):
         self.__delitem__(item)
+
+
+@lru_cache(maxsize=None)
+def cached_schema(schema_class, many=False):
+    """Shared schema instance, so field resolution runs once per schema class."""
+    return schema_class(many=many)
@@ -11,6 +11,65 @@ from ..utils import AttrDict
 from .errors import ParseError
 
 
+def _json_coercer(kind):
+    """Coercer to ``list`` / ``dict``, JSON strings are decoded."""
+
+    def coerce(value):
+        if isinstance(value, str):
+            value = json.loads(value)
+            if not isinstance(value, kind):
+                raise ValueError(value)
+            return value
+        return value if isinstance(value, kind) else kind(value)
+
+    return coerce
+
+
+def _bool_coerce(value):
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered not in ("true", "false"):
+            raise ValueError(value)
+        return lowered == "true"
+    return value if isinstance(value, bool) else bool(value)
+
+
+def _type_coercer(kind):
+    def coerce(value):
+        return value if isinstance(value, kind) else kind(value)
+
+    return coerce
+
+
+def _coercer(kind):
+    """Return the coercion function of the argument type ``kind``, None if untyped."""
+    if not kind:
+        return None
+    if kind in (list, dict):
+        return _json_coercer(kind)
+    if kind == bool:
+        return _bool_coerce
+    return _type_coercer(kind)
+
+
+def _value_check(coerce, filter, type_message, filter_message):
+    """Return ``check(value)`` coercing then filtering a value, None if neither is set."""
+    if coerce is None and filter is None:
+        return None
+
+    def check(value):
+        if coerce is not None:
+            try:
+                value = coerce(value)
+            except (TypeError, ValueError, AssertionError):
+                raise ParseError(type_message)
+        if filter is not None and not filter(value):
+            raise ParseError(filter_message)
+        return value
+
+    return check
+
+
 # 需要校验的参数对象
 class Argument(object):
     """
@@ -43,57 +102,97 @@ class Argument(object):
         if filter and not callable(self.filter):
             raise TypeError("Argument filter is not callable")
 
-    def parse(self, has_key, value):
-        if not has_key:
-            if self.required and self.default is None:
-                raise ParseError(
-                    self.help or "Required Error: %s is required" % self.name
-                )
-            else:
-                return self.default
-        elif value in ["", "", None]:
-            if self.default is not None:
-                return self.default
-            elif self.required:
-                raise ParseError(
-                    self.help or "Value Error: %s must not be null" % self.name
-                )
-            elif self.help:
-                raise ParseError(self.help)
-            else:
-                return value
-        try:
-            if self.type:
-                if self.type in (list, dict) and isinstance(value, str):
-                    value = json.loads(value)
-                    assert isinstance(value, self.type)
-                elif self.type == bool and isinstance(value, str):
-                    assert value.lower() in ["true", "false"]
-                    value = value.lower() == "true"
-                elif not isinstance(value, self.type):
-                    value = self.type(value)
-        except (TypeError, ValueError, AssertionError):
-            raise ParseError(
-                self.help or "Type Error: %s type must be %s" % (self.name, self.type)
-            )
-
-        if self.filter:
-            if not self.filter(value):
-                raise ParseError(
-                    self.help or "Value Error: %s filter check failed" % self.name
-                )
+    def stages(self):
+        """Build the parse steps of this argument.
 
+        Type branching, messages and the validator list are resolved here once.
+        Returns ``(prepare, validators, handler)``: ``prepare(has_key, value)``
+        handles presence, null, type and filter checks and returns
+        ``(value, checked)``, where ``checked`` is False for defaults and nulls,
+        which skip the validators and the handler.
+        """
+        name, default, help = self.name, self.default, self.help
+        validators = ()
         if isinstance(self.validators, Iterable):
-            for validator in self.validators:
+            validators = tuple(self.validators)
+        # message raised for a missing key / a null value, None when allowed
+        missing_error = None
+        if self.required and default is None:
+            missing_error = help or "Required Error: %s is required" % name
+        null_error = None
+        if default is None and (self.required or help):
+            null_error = help or "Value Error: %s must not be null" % name
+        check = _value_check(
+            _coercer(self.type),
+            self.filter,
+            help or "Type Error: %s type must be %s" % (name, self.type),
+            help or "Value Error: %s filter check failed" % name,
+        )
+
+        def prepare(has_key, value):
+            if not has_key:
+                if missing_error is not None:
+                    raise ParseError(missing_error)
+                return default, False
+            if value is None or (isinstance(value, str) and value == ""):
+                if null_error is not None:
+                    raise ParseError(null_error)
+                return (value if default is None else default), False
+            if check is not None:
+                value = check(value)
+            return value, True
+
+        return prepare, validators, self.handler
+
+    def compile(self, stages=None):
+        """Build the parse function of this argument.
+
+        The returned ``parse(has_key, value)`` only runs the steps configured.
+        """
+        prepare, validators, handler = stages or self.stages()
+
+        def parse(has_key, value):
+            value, checked = prepare(has_key, value)
+            if not checked:
+                return value
+            for validator in validators:
                 validator(value)
+            if handler is not None:
+                value = handler(value)
+            return value
 
-        if self.handler:
-            value = self.handler(value)
-        return value
+        return parse
+
+    def parse(self, has_key, value):
+        parse = self.__dict__.get("_parse")
+        if parse is None:
+            parse = self._parse = self.compile()
+        return parse(has_key, value)
+
+
+def _validate_many(validator, values):
+    """``{position: message}`` of the values rejected by ``validator``."""
+    validate_many = getattr(validator, "validate_many", None)
+    if validate_many is not None:
+        return validate_many(values)
+    failed = {}
+    for position, value in enumerate(values):
+        try:
+            validator(value)
+        except ParseError as err:
+            failed[position] = err.message
+    return failed
 
 
 # 解析器基类
 class BaseParser(object):
+    """Parser of a fixed set of arguments.
+
+    Arguments are compiled once when the parser is built, and ``parse`` keeps
+    no state on the instance, so a parser can be declared at module level and
+    shared by every request.
+    """
+
     def __init__(self, *args):
         self.args = []
         for e in args:
@@ -102,8 +201,15 @@ class BaseParser(object):
             elif not isinstance(e, Argument):
                 raise TypeError("%r is not instance of Argument" % e)
             self.args.append(e)
+        self._compile()
 
-    def _get(self, key):
+    def _compile(self):
+        self._plan = []
+        for e in self.args:
+            stages = e.stages()
+            self._plan.append((e.name, e.required, e.compile(stages), stages))
+
+    def _get(self, data, key):
         raise NotImplementedError
 
     def _init(self, data):
@@ -111,38 +217,113 @@ class BaseParser(object):
 
     def add_argument(self, **kwargs):
         self.args.append(Argument(**kwargs))
+        self._compile()
+
+    def parse(self, data=None, clear=False, all_errors=False):
+        """Parse ``data``, return ``(result, None)`` or ``(None, error)``.
 
-    def parse(self, data=None, clear=False):
+        The error is the message of the first invalid field, or with
+        ``all_errors`` a ``{field: message}`` dict of every invalid field;
+        the first error stays the default, API clients read ``error`` as a
+        string.
+        """
         rst = AttrDict()
+        errors = {}
         try:
-            self._init(data)
-            for e in self.args:
-                has_key, value = self._get(e.name)
-                if clear and has_key is False and e.required is False:
-                    continue
-                rst[e.name] = e.parse(has_key, value)
+            data = self._init(data)
         except ParseError as err:
-            return None, err.message
+            return None, {"__all__": err.message} if all_errors else err.message
+        for name, required, parse, _ in self._plan:
+            has_key, value = self._get(data, name)
+            if clear and has_key is False and required is False:
+                continue
+            try:
+                rst[name] = parse(has_key, value)
+            except ParseError as err:
+                if not all_errors:
+                    return None, err.message
+                errors[name] = err.message
+        if errors:
+            return None, errors
         return rst, None
 
+    def _prepare_column(self, datas, name, required, prepare, clear, results, errors):
+        """Run ``prepare`` on the ``name`` value of every row of ``parse_many``.
+
+        Defaults and nulls go to ``results``, failures to ``errors``; returns
+        the indexes and values of the rows left to validate.
+        """
+        indexes, values = [], []
+        for index, data in enumerate(datas):
+            if data is None:
+                continue
+            has_key, value = self._get(data, name)
+            if clear and has_key is False and required is False:
+                continue
+            try:
+                value, checked = prepare(has_key, value)
+            except ParseError as err:
+                errors.setdefault(index, {})[name] = err.message
+                continue
+            if checked:
+                indexes.append(index)
+                values.append(value)
+            else:
+                results[index][name] = value
+        return indexes, values
+
+    def parse_many(self, rows, clear=False):
+        """Parse a list of payloads, return ``(results, errors)``.
+
+        Rows are validated column by column: each argument's validators see the
+        values of every row at once through ``validate_many`` when they have it.
+        ``results`` holds one result per row, None for invalid rows, and
+        ``errors`` maps the index of each invalid row to its ``{field: message}``
+        dict (``{"__all__": message}`` for an unparseable row).
+        """
+        results = []
+        errors = {}
+        datas = []
+        for index, data in enumerate(rows):
+            try:
+                datas.append(self._init(data))
+            except ParseError as err:
+                datas.append(None)
+                errors[index] = {"__all__": err.message}
+            results.append(AttrDict())
+
+        for name, required, _, (prepare, validators, handler) in self._plan:
+            indexes, values = self._prepare_column(
+                datas, name, required, prepare, clear, results, errors
+            )
+            for validator in validators:
+                if not indexes:
+                    break
+                failed = _validate_many(validator, values)
+                for position, message in failed.items():
+                    errors.setdefault(indexes[position], {})[name] = message
+                if failed:
+                    indexes = [i for p, i in enumerate(indexes) if p not in failed]
+                    values = [v for p, v in enumerate(values) if p not in failed]
+            for index, value in zip(indexes, values):
+                results[index][name] = value if handler is None else handler(value)
+
+        return [None if i in errors else r for i, r in enumerate(results)], errors
+
 
 # Json解析器
 class JsonParser(BaseParser):
-    def __init__(self, *args):
-        self.__data = None
-        super(JsonParser, self).__init__(*args)
-
-    def _get(self, key):
-        return key in self.__data, self.__data.get(key)
+    def _get(self, data, key):
+        return key in data, data.get(key)
 
     def _init(self, data):
         try:
             if isinstance(data, (str, bytes)):
-                self.__data = json.loads(data) if data else {}
+                data = json.loads(data) if data else {}
             else:
                 assert hasattr(data, "__contains__")
                 assert hasattr(data, "get")
                 assert callable(data.get)
-                self.__data = data
+            return data
         except (ValueError, AssertionError):
             raise ParseError("Invalid data type for parse")
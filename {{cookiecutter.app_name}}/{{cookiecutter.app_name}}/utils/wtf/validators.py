@@ -10,10 +10,30 @@ try:
 except ImportError:
     email_validator = None  # type: ignore
 
-from .errors import StopValidation, ValidationError
+from .errors import ParseError, StopValidation, ValidationError
 
 
-class Length:
+class BatchValidator:
+    """
+    Base of the validators, adds ``validate_many``.
+
+    ``validate_many(values)`` checks a whole column of values and returns the
+    ``{index: message}`` of the failures instead of raising. The default runs
+    ``__call__`` on each value, validators override it where the check can be
+    done without raising per value.
+    """
+
+    def validate_many(self, values):
+        errors = {}
+        for index, value in enumerate(values):
+            try:
+                self(value)
+            except ParseError as e:
+                errors[index] = e.message
+        return errors
+
+
+class Length(BatchValidator):
     """
     Validates the length of a string.
 
@@ -45,6 +65,18 @@ class Length:
         if length >= self.min and (self.max == -1 or length <= self.max):
             return
 
+        raise ValidationError(self._message(length))
+
+    def validate_many(self, values):
+        low, high = self.min, self.max
+        lengths = [value and len(value) or 0 for value in values]
+        return {
+            index: self._message(length)
+            for index, length in enumerate(lengths)
+            if length < low or (high != -1 and length > high)
+        }
+
+    def _message(self, length):
         if self.message is not None:
             message = self.message
 
@@ -69,10 +101,10 @@ class Length:
                 "min": self.min,
             }
 
-        raise ValidationError(message % dict(min=self.min, max=self.max, length=length))
+        return message % dict(min=self.min, max=self.max, length=length)
 
 
-class NumberRange:
+class NumberRange(BatchValidator):
     """
     Validates that a number is of a minimum and/or maximum value, inclusive.
     This will work with any comparable number type, such as floats and
@@ -98,14 +130,27 @@ class NumberRange:
         self.message = message
 
     def __call__(self, value):
-        if (
-            value is not None
-            and not math.isnan(value)
-            and (self.min is None or value >= self.min)
-            and (self.max is None or value <= self.max)
-        ):
+        if self._valid(value):
             return
 
+        raise ValidationError(self._message())
+
+    def validate_many(self, values):
+        valid = self._valid
+        failed = [index for index, value in enumerate(values) if not valid(value)]
+        if not failed:
+            return {}
+        message = self._message()
+        return dict.fromkeys(failed, message)
+
+    def _valid(self, value):
+        if value is None or math.isnan(value):
+            return False
+        return (self.min is None or value >= self.min) and (
+            self.max is None or value <= self.max
+        )
+
+    def _message(self):
         if self.message is not None:
             message = self.message
 
@@ -123,10 +168,10 @@ class NumberRange:
                 "min": self.min,
             }
 
-        raise ValidationError(message % dict(min=self.min, max=self.max))
+        return message % dict(min=self.min, max=self.max)
 
 
-class DataRequired:
+class DataRequired(BatchValidator):
     """
     Checks the field's data is 'truthy' otherwise stops the validation chain.
 
@@ -168,7 +213,7 @@ class DataRequired:
         raise StopValidation(message)
 
 
-class Regexp:
+class Regexp(BatchValidator):
     """
     Validates the field against a user provided regexp.
 
@@ -182,12 +227,22 @@ class Regexp:
         Error message to raise in case of a validation error.
     """
 
+    default_message = "Invalid input."
+
     def __init__(self, regex, flags=0, message=None):
         if isinstance(regex, str):
             regex = re.compile(regex, flags)
         self.regex = regex
         self.message = message
 
+    def validate_many(self, values):
+        match = self.regex.match
+        failed = [index for index, value in enumerate(values) if not match(value or "")]
+        if not failed:
+            return {}
+        message = self.message if self.message is not None else self.default_message
+        return dict.fromkeys(failed, message)
+
     def __call__(self, value, message=None):
         match = self.regex.match(value or "")
         if match:
@@ -195,14 +250,14 @@ class Regexp:
 
         if message is None:
             if self.message is None:
-                message = "Invalid input."
+                message = self.default_message
             else:
                 message = self.message
 
         raise ValidationError(message)
 
 
-class Email:
+class Email(BatchValidator):
     """
     Validates an email address. Requires email_validator package to be
     installed. For ex: pip install wtforms[email].
@@ -258,7 +313,7 @@ class Email:
             raise ValidationError(message) from e
 
 
-class IPAddress:
+class IPAddress(BatchValidator):
     """
     Validates an IP address.
 
@@ -328,6 +383,9 @@ class MacAddress(Regexp):
         Error message to raise in case of a validation error.
     """
 
+    # also the message of Regexp.validate_many
+    default_message = "Invalid Mac address."
+
     def __init__(self, message=None):
         pattern = r"^(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}$"
         super().__init__(pattern, message=message)
@@ -335,7 +393,7 @@ class MacAddress(Regexp):
     def __call__(self, value):
         message = self.message
         if message is None:
-            message = "Invalid Mac address."
+            message = self.default_message
 
         super().__call__(value, message)
 
@@ -367,6 +425,9 @@ class URL(Regexp):
             require_tld=require_tld, allow_ip=True
         )
 
+    # the hostname is checked on each match, keep the per-value loop
+    validate_many = BatchValidator.validate_many
+
     def __call__(self, value):
         message = self.message
         if message is None:
@@ -377,7 +438,7 @@ class URL(Regexp):
             raise ValidationError(message)
 
 
-class UUID:
+class UUID(BatchValidator):
     """
     Validates a UUID.
 
@@ -398,7 +459,7 @@ class UUID:
             raise ValidationError(message) from exc
 
 
-class AnyOf:
+class AnyOf(BatchValidator):
     """
     Compares the incoming data to a sequence of valid inputs.
 
@@ -412,28 +473,52 @@ class AnyOf:
     """
 
     def __init__(self, values, message=None, values_formatter=None):
+        if not isinstance(values, T.Collection):
+            # a generator would be used up by the lookup, before the message
+            values = tuple(values)
         self.values = values
         self.message = message
         if values_formatter is None:
             values_formatter = self.default_values_formatter
         self.values_formatter = values_formatter
+        try:
+            self._lookup = frozenset(values)
+        except TypeError:
+            self._lookup = None
 
     def __call__(self, value):
         if value in self.values:
             return
 
+        raise ValidationError(self._message())
+
+    def validate_many(self, values):
+        lookup, fallback = self._lookup, self.values
+        failed = []
+        for index, value in enumerate(values):
+            try:
+                found = value in lookup
+            except TypeError:
+                # no set of the values, or an unhashable value
+                found = value in fallback
+            if not found:
+                failed.append(index)
+        if not failed:
+            return {}
+        return dict.fromkeys(failed, self._message())
+
+    def _message(self):
         message = self.message
         if message is None:
             message = "Invalid value, must be one of: %(values)s."
-
-        raise ValidationError(message % dict(values=self.values_formatter(self.values)))
+        return message % dict(values=self.values_formatter(self.values))
 
     @staticmethod
     def default_values_formatter(values):
         return ", ".join(str(x) for x in values)
 
 
-class NoneOf:
+class NoneOf(BatchValidator):
     """
     Compares the incoming data to a sequence of invalid inputs.
 
@@ -447,21 +532,45 @@ class NoneOf:
     """
 
     def __init__(self, values, message=None, values_formatter=None):
+        if not isinstance(values, T.Collection):
+            # a generator would be used up by the lookup, before the message
+            values = tuple(values)
         self.values = values
         self.message = message
         if values_formatter is None:
             values_formatter = self.default_values_formatter
         self.values_formatter = values_formatter
+        try:
+            self._lookup = frozenset(values)
+        except TypeError:
+            self._lookup = None
 
     def __call__(self, value):
         if value not in self.values:
             return
 
+        raise ValidationError(self._message())
+
+    def validate_many(self, values):
+        lookup, fallback = self._lookup, self.values
+        failed = []
+        for index, value in enumerate(values):
+            try:
+                found = value in lookup
+            except TypeError:
+                # no set of the values, or an unhashable value
+                found = value in fallback
+            if found:
+                failed.append(index)
+        if not failed:
+            return {}
+        return dict.fromkeys(failed, self._message())
+
+    def _message(self):
         message = self.message
         if message is None:
             message = "Invalid value, can't be any of: %(values)s."
-
-        raise ValidationError(message % dict(values=self.values_formatter(self.values)))
+        return message % dict(values=self.values_formatter(self.values))
 
     @staticmethod
     def default_values_formatter(v):
@@ -515,7 +624,7 @@ class HostnameValidation:
         return True
 
 
-class DateTime:
+class DateTime(BatchValidator):
     """
     Validates a UUID.
 
@@ -538,7 +647,7 @@ class DateTime:
             raise ValidationError(message)
 
 
-class ChoiceFiled:
+class ChoiceFiled(BatchValidator):
     def __init__(self, message=None, choice_list: T.Union[T.Iterable, None] = None):
         self.message = message
         self.choice_list = choice_list